@@ -1,3 +1,98 @@
 # app_config.py - Application configurations
 WINDOW_WIDTH = 1100
 WINDOW_HEIGHT = 700
+
+# Batch operations: number of Token IDs sent per UPDATE statement (one commit per chunk)
+BATCH_CHUNK_SIZE = 1000
+
+# Database connection pool (one pool per config section)
+DB_POOL_SIZE = 4
+DB_CONNECT_TIMEOUT = 10
+DB_KEEPALIVE_INTERVAL = 300  # seconds between pings of idle pooled connections
+# Login/switch: all endpoints of a system (comma separated hosts plus `failover` sections) are
+# probed in parallel with a short timeout; "first" takes the first to answer, "rtt" the fastest
+# within the timeout. Failed rounds are retried DB_CONNECT_ATTEMPTS times with doubling backoff.
+DB_ENDPOINT_CONNECT_TIMEOUT = 3
+DB_ENDPOINT_SELECTION = "first"
+DB_CONNECT_ATTEMPTS = 4
+DB_CONNECT_BACKOFF = 1
+DB_CONNECT_BACKOFF_MAX = 8
+# Number of pooled connections a single batch operation may spread its chunks over
+BATCH_CONNECTIONS = 1
+# Write governor of batch UPDATEs: at most WRITE_ROWS_PER_SECOND Token IDs per second (None = unlimited,
+# bursts of WRITE_BURST_ROWS, None = one chunk); chunks wait with doubling backoff while the server has
+# more than WRITE_MAX_THREADS_RUNNING running threads or replicates more than WRITE_MAX_REPLICATION_LAG
+# seconds behind, checked every WRITE_LOAD_CHECK_INTERVAL seconds. Chunks failing with a lock wait
+# timeout or deadlock are retried WRITE_LOCK_RETRIES times. A config section may override each
+# setting with a `write_<name>` key, e.g. `write_rows_per_second = 2000`.
+WRITE_ROWS_PER_SECOND = None
+WRITE_BURST_ROWS = None
+WRITE_MAX_THREADS_RUNNING = 50
+WRITE_MAX_REPLICATION_LAG = 10
+WRITE_LOAD_CHECK_INTERVAL = 2
+WRITE_BACKOFF = 1
+WRITE_BACKOFF_MAX = 30
+WRITE_LOCK_RETRIES = 3
+
+# Bulk OCSP checks: maximum number of concurrent OCSP requests
+OCSP_BULK_WORKERS = 8
+
+# File extensions of certificate files, picked up by the bulk OCSP checker and the certificate inventory
+CERT_EXTENSIONS = (".cer", ".crt", ".pem", ".der")
+
+# OCSP response cache (responses are served until nextUpdate, at most OCSP_CACHE_MAX_AGE seconds;
+# responses without nextUpdate and UNKNOWN statuses are never cached)
+OCSP_CACHE_FILE = "cache/ocsp_cache.sqlite3"
+OCSP_CACHE_MAX_AGE = 24 * 3600
+OCSP_CACHE_MAX_ENTRIES = 50000
+
+# Offline CRL revocation lookups: one sorted serial index per issuer
+CRL_INDEX_DIR = "cache/crl"
+
+# Certificate inventory: metadata index of certificate folders, parsed by CERT_INVENTORY_WORKERS
+# processes (None = one per CPU) in batches of CERT_INVENTORY_BATCH_SIZE files
+CERT_INVENTORY_FILE = "cache/cert_inventory.sqlite3"
+CERT_INVENTORY_WORKERS = None
+CERT_INVENTORY_BATCH_SIZE = 64
+
+# Rows pulled per fetchmany() call when reading large result sets
+FETCH_SIZE = 500
+
+# Startup timing report, rewritten on every start (set CTS_STARTUP_REPORT=1 to also print it)
+STARTUP_REPORT_FILE = "log/startup.json"
+
+# Audit log: JSONL records under AUDIT_LOG_DIR/YYYY/MM/<section>.jsonl; closed months are gzipped
+AUDIT_LOG_DIR = "log"
+AUDIT_LOG_COMPRESS_CLOSED_MONTHS = True
+
+# Token ID history index built from the audit logs
+AUDIT_INDEX_FILE = "cache/audit_index.sqlite3"
+
+# Prepared statements: IN lists are padded to one of these sizes so only a few statement shapes
+# exist (keep the largest >= BATCH_CHUNK_SIZE); at most STATEMENT_CACHE_SIZE statements per connection
+ID_BUCKET_SIZES = (1, 10, 50, 200, 1000)
+STATEMENT_CACHE_SIZE = 32
+
+# Get Info cache: results are reused for TOKEN_INFO_CACHE_TTL seconds unless a batch operation touches the ID
+TOKEN_INFO_CACHE_TTL = 300
+TOKEN_INFO_CACHE_MAX_ENTRIES = 500
+
+# Operation metrics: p50/p95 over the last METRICS_SAMPLES calls, shown in the status bar and written
+# every METRICS_WRITE_INTERVAL seconds to METRICS_DIR/metrics.prom (Prometheus textfile) and metrics.json
+METRICS_SAMPLES = 1000
+METRICS_DIR = "log"
+METRICS_WRITE_INTERVAL = 60
+
+# Undo journal: values overwritten by batch operations, kept for the newest UNDO_JOURNAL_MAX_OPERATIONS
+# operations of each system
+UNDO_JOURNAL_FILE = "cache/undo_journal.sqlite3"
+UNDO_JOURNAL_MAX_OPERATIONS = 200
+
+# Batch job store: every batch run with its Token IDs and per-chunk checkpoints, so interrupted or
+# failed jobs can be resumed; the newest BATCH_JOB_MAX_JOBS finished jobs of each system are kept
+BATCH_JOB_FILE = "cache/batch_jobs.sqlite3"
+BATCH_JOB_MAX_JOBS = 500
+
+# A "running" job is only taken for interrupted once the process that runs it is gone or has not
+# checkpointed a chunk for this many seconds (other sessions may share the job store)
+BATCH_JOB_HEARTBEAT_TIMEOUT = 900
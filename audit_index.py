@@ -0,0 +1,190 @@
+import os
+import re
+import ast
+import glob
+import gzip
+import json
+import sqlite3
+import threading
+import app_config
+
+# Text log line written before the JSONL audit log: "2026-01-01 11:22:01,780 - INFO - <message>"
+TEXT_LINE = re.compile(r"^(\d{4}-\d{2}-\d{2}) (\d{2}:\d{2}:\d{2}),(\d{3}) - (\w+) - (.*)$")
+TEXT_BATCH = re.compile(r"^(\[.*\]) - (.*?)\s*$")
+TEXT_UNINITIALIZE = re.compile(r"^Uninitialized Token ID: (\S+)")
+PARTIAL_SUFFIX = " (partial)"
+
+def parse_text_line(line, section):
+    """Parses one line of a legacy .log file into an event dict, or returns None."""
+    match = TEXT_LINE.match(line.rstrip("\n"))
+    if not match:
+        return None
+    day, clock, millis, _, message = match.groups()
+    event = {"time": f"{day}T{clock}.{millis}", "section": section, "status": "ok", "user": "", "note": ""}
+    batch = TEXT_BATCH.match(message)
+    if batch:
+        try:
+            token_ids = [str(token_id) for token_id in ast.literal_eval(batch.group(1))]
+        except (ValueError, SyntaxError):
+            return None
+        operation = batch.group(2)
+        if operation.endswith(PARTIAL_SUFFIX):
+            operation, event["status"] = operation[:-len(PARTIAL_SUFFIX)], "partial"
+        event.update(operation=operation, token_ids=token_ids)
+        return event
+    uninitialize = TEXT_UNINITIALIZE.match(message)
+    if uninitialize:
+        event.update(operation="Uninitialize", token_ids=[uninitialize.group(1)])
+        return event
+    return None
+
+def parse_jsonl_line(line, section):
+    """Parses one JSONL audit record into an event dict, or returns None for records without Token IDs."""
+    try:
+        entry = json.loads(line)
+    except ValueError:
+        return None
+    if not entry.get("token_ids"):
+        return None
+    return {
+        "time": entry.get("time", ""),
+        "section": entry.get("section") or section,
+        "operation": entry.get("operation", ""),
+        "status": entry.get("status", "ok"),
+        "user": entry.get("user", ""),
+        "note": entry.get("note", ""),
+        "token_ids": [str(token_id) for token_id in entry["token_ids"]],
+    }
+
+class AuditIndex:
+    """
+    SQLite index of the audit log history: every logged operation with the Token IDs it touched.
+    update() reads only what was appended to each log file since the last run (legacy .log files,
+    .jsonl files and gzipped closed months), so searches stay instant over years of logs.
+    """
+    def __init__(self, path=None, log_dir=None):
+        self.path = path or app_config.AUDIT_INDEX_FILE
+        self.log_dir = log_dir or app_config.AUDIT_LOG_DIR
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS indexed_file (
+                path TEXT PRIMARY KEY,
+                offset INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS audit_event (
+                id INTEGER PRIMARY KEY,
+                time TEXT NOT NULL,
+                section TEXT NOT NULL,
+                operation TEXT NOT NULL,
+                status TEXT NOT NULL,
+                user TEXT NOT NULL,
+                note TEXT NOT NULL,
+                token_count INTEGER NOT NULL,
+                source TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS audit_token (
+                token_id TEXT NOT NULL,
+                event_id INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_audit_token ON audit_token (token_id);
+            CREATE INDEX IF NOT EXISTS idx_audit_event_source ON audit_event (source);
+        """)
+        self._db.commit()
+
+    def _log_files(self):
+        patterns = ("*.log", "*.jsonl", "*.jsonl.gz")
+        files = []
+        for pattern in patterns:
+            files.extend(glob.glob(os.path.join(self.log_dir, "*", "*", pattern)))
+        return sorted(files)
+
+    def _offset(self, key):
+        row = self._db.execute("SELECT offset FROM indexed_file WHERE path = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _forget(self, key):
+        self._db.execute("DELETE FROM audit_token WHERE event_id IN (SELECT id FROM audit_event WHERE source = ?)", (key,))
+        self._db.execute("DELETE FROM audit_event WHERE source = ?", (key,))
+        self._db.execute("DELETE FROM indexed_file WHERE path = ?", (key,))
+
+    def update(self):
+        """Indexes new log entries. Returns the number of events added."""
+        added = 0
+        with self._lock:
+            for path in self._log_files():
+                added += self._index_file(path)
+            self._db.commit()
+        return added
+
+    def _index_file(self, path):
+        key = os.path.relpath(path, self.log_dir)
+        compressed = path.endswith(".gz")
+        if not compressed and os.path.exists(path + ".gz"):
+            return 0  # left over from an interrupted compression; the .gz holds the same records
+        section = os.path.basename(path).split(".")[0]
+        parse = parse_text_line if key.endswith(".log") else parse_jsonl_line
+        offset = self._offset(key)
+        if compressed and offset is None:
+            # A closed month that was compressed after we indexed the plain file: continue from there
+            plain_key = key[:-len(".gz")]
+            offset = self._offset(plain_key)
+            if offset is not None:
+                self._db.execute("UPDATE audit_event SET source = ? WHERE source = ?", (key, plain_key))
+                self._db.execute("UPDATE indexed_file SET path = ? WHERE path = ?", (key, plain_key))
+        elif compressed:
+            return 0  # gzipped months never change
+        offset = offset or 0
+        if not compressed and os.path.getsize(path) < offset:
+            self._forget(key)  # the file was truncated or replaced
+            offset = 0
+
+        added = 0
+        opener = gzip.open if compressed else open
+        with opener(path, "rb") as f:
+            f.seek(offset)
+            for raw_line in f:
+                if not raw_line.endswith(b"\n"):
+                    break  # a record still being written; picked up on the next update
+                offset += len(raw_line)
+                event = parse(raw_line.decode("utf-8", errors="replace"), section)
+                if event is not None:
+                    self._add_event(event, key)
+                    added += 1
+        self._db.execute("INSERT OR REPLACE INTO indexed_file VALUES (?, ?)", (key, offset))
+        return added
+
+    def _add_event(self, event, source):
+        cursor = self._db.execute(
+            "INSERT INTO audit_event (time, section, operation, status, user, note, token_count, source) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (event["time"], event["section"], event["operation"], event["status"], event["user"], event["note"],
+             len(event["token_ids"]), source))
+        event_id = cursor.lastrowid
+        self._db.executemany("INSERT INTO audit_token VALUES (?, ?)",
+                             ((token_id, event_id) for token_id in dict.fromkeys(event["token_ids"])))
+
+    def search(self, token_id, limit=1000):
+        """
+        Returns the history of a Token ID, newest first, as (token_id, time, section, operation,
+        status, user, note, token_count, source) rows. A trailing '*' searches by prefix.
+        """
+        token_id = token_id.strip()
+        if not token_id:
+            raise ValueError("Please enter a Token ID.")
+        if token_id.endswith("*"):
+            condition, value = "t.token_id >= ? AND t.token_id < ?", (token_id[:-1], token_id[:-1] + "\uffff")
+        else:
+            condition, value = "t.token_id = ?", (token_id,)
+        with self._lock:
+            return self._db.execute(
+                "SELECT t.token_id, e.time, e.section, e.operation, e.status, e.user, e.note, e.token_count, e.source "
+                f"FROM audit_token t JOIN audit_event e ON e.id = t.event_id WHERE {condition} "
+                "ORDER BY e.time DESC LIMIT ?", value + (limit,)).fetchall()
+
+    def rebuild(self):
+        """Drops the index and re-reads every log file."""
+        with self._lock:
+            self._db.executescript("DELETE FROM audit_token; DELETE FROM audit_event; DELETE FROM indexed_file;")
+        return self.update()
@@ -0,0 +1,157 @@
+import os
+import glob
+import gzip
+import json
+import queue
+import shutil
+import atexit
+import getpass
+import logging
+import threading
+from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener
+import app_config
+
+def _current_user():
+    try:
+        return getpass.getuser()
+    except Exception:
+        return "unknown"
+
+USER = _current_user()
+
+# Diagnostics of the audit log itself (not audit records)
+logger = logging.getLogger("cts.audit")
+
+class MonthlyJSONLHandler(logging.Handler):
+    """
+    Writes one JSON object per record to log/YYYY/MM/<section>.jsonl, where the section is the
+    logger name. The month is taken from each record's timestamp, so a session running across the
+    end of a month rolls over to the new file; months closed for a full month are gzip-compressed if enabled.
+    Only used from the QueueListener thread, so callers never wait on the disk.
+    """
+    def __init__(self, base_log_dir, compress_closed=False):
+        super().__init__()
+        self.base_log_dir = base_log_dir
+        self.compress_closed = compress_closed
+        self._streams = {}  # section -> (month_dir, stream)
+
+    def _path(self, section, month_dir):
+        return os.path.join(self.base_log_dir, month_dir, f"{section}.jsonl")
+
+    def _stream_for(self, section, created):
+        month_dir = datetime.fromtimestamp(created).strftime(os.path.join("%Y", "%m"))
+        current = self._streams.get(section)
+        if current and current[0] == month_dir:
+            return current[1]
+        if current:
+            current[1].close()
+        path = self._path(section, month_dir)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        stream = open(path, "a", encoding="utf-8")
+        self._streams[section] = (month_dir, stream)
+        if self.compress_closed:
+            self._compress_closed_months(section, path)
+        return stream
+
+    def _compress_closed_months(self, section, current_path):
+        """
+        gzips this section's JSONL files (also ones left from previous sessions) of months that
+        ended at least a full month ago, so another instance still writing the previous month
+        around the month boundary is never cut off. The archive is written under a temporary name
+        and renamed into place before the plain file is removed.
+        """
+        current_month = self._month_number(os.path.dirname(current_path))
+        pattern = os.path.join(self.base_log_dir, "*", "*", f"{section}.jsonl")
+        for path in glob.glob(pattern):
+            month = self._month_number(os.path.dirname(path))
+            if current_month is None or month is None or current_month - month < 2:
+                continue
+            try:
+                if not os.path.exists(path + ".gz"):
+                    with open(path, "rb") as source, gzip.open(path + ".gz.tmp", "wb") as target:
+                        shutil.copyfileobj(source, target)
+                    os.replace(path + ".gz.tmp", path + ".gz")
+                # Also finishes a compression an earlier session was cut off in
+                os.remove(path)
+            except OSError as e:
+                logger.warning("Could not compress audit log %s: %s", path, e)
+
+    @staticmethod
+    def _month_number(month_dir):
+        """Returns year * 12 + month of a .../YYYY/MM directory, or None if it is not one."""
+        year, month = os.path.basename(os.path.dirname(month_dir)), os.path.basename(month_dir)
+        if not (year.isdigit() and month.isdigit()):
+            return None
+        return int(year) * 12 + int(month)
+
+    def emit(self, record):
+        try:
+            entry = {
+                "time": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+                "level": record.levelname,
+                "section": record.name,
+                "user": USER,
+            }
+            entry.update(getattr(record, "audit", None) or {"message": record.getMessage()})
+            stream = self._stream_for(record.name, record.created)
+            stream.write(json.dumps(entry, ensure_ascii=False, default=str) + "\n")
+            stream.flush()
+        except Exception:
+            self.handleError(record)
+
+    def close(self):
+        for _, stream in self._streams.values():
+            stream.close()
+        self._streams.clear()
+        super().close()
+
+_queue = queue.SimpleQueue()
+_listener = None
+_lock = threading.Lock()
+
+def _start_listener(base_log_dir):
+    global _listener
+    with _lock:
+        if _listener is None:
+            handler = MonthlyJSONLHandler(base_log_dir, app_config.AUDIT_LOG_COMPRESS_CLOSED_MONTHS)
+            _listener = QueueListener(_queue, handler)
+            _listener.start()
+            atexit.register(stop_audit_logging)
+
+def stop_audit_logging():
+    """Writes out the queued records and closes the log files."""
+    global _listener
+    with _lock:
+        if _listener is not None:
+            _listener.stop()
+            for handler in _listener.handlers:
+                handler.close()
+            _listener = None
+
+def get_audit_logger(section_name, base_log_dir=None):
+    """Returns the section's logger; records are queued and written by a background listener thread."""
+    _start_listener(base_log_dir or app_config.AUDIT_LOG_DIR)
+    logger = logging.getLogger(section_name)
+    with _lock:
+        if not logger.handlers:
+            logger.setLevel(logging.INFO)
+            logger.addHandler(QueueHandler(_queue))
+            logger.propagate = False
+    return logger
+
+def log_operation(logger, operation, token_ids, affected, duration, status="ok", error=None, note=None):
+    """Logs one audit record for an operation on a list of Token IDs (note: the block/notification text)."""
+    audit = {
+        "operation": operation,
+        "status": status,
+        "token_count": len(token_ids),
+        "affected": affected,
+        "duration": round(duration, 3),
+        "token_ids": list(token_ids),
+    }
+    if note:
+        audit["note"] = note
+    if error:
+        audit["error"] = error
+    logger.info(f"{operation} ({status}): {len(token_ids)} Token IDs, {affected} affected", extra={"audit": audit})
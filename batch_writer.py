@@ -0,0 +1,147 @@
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+import mysql.connector
+import app_config
+from statements import execute_ids
+
+class BatchError(Exception):
+    """Raised when a chunk of a batch update fails. Earlier chunks stay committed."""
+    def __init__(self, message, affected_rows, committed_ids):
+        super().__init__(message)
+        self.affected_rows = affected_rows
+        self.committed_ids = committed_ids
+
+class BatchCancelled(BatchError):
+    """Raised when a batch is cancelled between chunks. Earlier chunks stay committed."""
+
+def chunked(items, chunk_size):
+    """Splits a list into consecutive chunks of at most chunk_size items."""
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be at least 1.")
+    return [items[i:i + chunk_size] for i in range(0, len(items), chunk_size)]
+
+def run_batch_update(connections, sql_template, params, token_ids, chunk_size=None, progress_callback=None,
+                     cancel_event=None, checkpoint_callback=None, governor=None, snapshot_sql=None,
+                     snapshot_callback=None):
+    """
+    Runs a batch UPDATE over token_ids in parameterized chunks, committing after each chunk.
+    Chunks run as cached prepared statements with the IN list padded to a bucket size.
+
+    `sql_template` must contain the `{id_placeholders}` marker where the IN list goes; `params`
+    are the values for the placeholders that precede it. `connections` is a single connection or
+    a list of them; with several connections the chunks are partitioned round-robin and each
+    partition runs on its own thread. `progress_callback(done_chunks, total_chunks, affected_rows)`
+    is called after every committed chunk. Setting `cancel_event` stops the batch before the next chunk.
+    `checkpoint_callback(chunk_index, affected_rows, error)` is called with the 0-based index of
+    every chunk once it was committed (error None) or rolled back (the error message).
+    A `governor` (see write_governor.WriteGovernor) paces the chunks and retries those that hit a
+    lock wait timeout or deadlock. With `snapshot_sql` (a SELECT ... FOR UPDATE template with the
+    same IN list marker) every chunk first reads and locks its rows in the transaction that updates
+    them, and `snapshot_callback(chunk_index, rows)` receives those prior rows once the chunk committed.
+
+    Returns the total number of affected rows. Raises BatchError on the first failed chunk or
+    callback and BatchCancelled if the batch was cancelled.
+    """
+    if not isinstance(connections, (list, tuple)):
+        connections = [connections]
+    chunk_size = chunk_size or app_config.BATCH_CHUNK_SIZE
+    chunks = chunked(list(token_ids), chunk_size)
+    indexed_chunks = list(enumerate(chunks))
+    partitions = [indexed_chunks[i::len(connections)] for i in range(len(connections))]
+
+    lock = threading.Lock()
+    failed = threading.Event()
+    state = {"done": 0, "affected": 0, "committed_ids": []}
+
+    def cancelled():
+        return cancel_event is not None and cancel_event.is_set()
+
+    def run_partition(conn, partition):
+        try:
+            for index, chunk in partition:
+                attempt = 0
+                while True:
+                    if failed.is_set() or cancelled():
+                        return
+                    try:
+                        if governor and not governor.throttle(conn, len(chunk), cancel_event):
+                            return
+                        prior_rows = execute_ids(conn, snapshot_sql, (), chunk).fetchall() if snapshot_sql else None
+                        cursor = execute_ids(conn, sql_template, params, chunk)
+                        conn.commit()
+                        break
+                    except mysql.connector.Error as e:
+                        conn.rollback()
+                        if governor and governor.should_retry(e, attempt, cancel_event):
+                            attempt += 1
+                            continue
+                        failed.set()
+                        if checkpoint_callback:
+                            checkpoint_callback(index, 0, str(e))
+                        raise
+                # Counted before the callbacks run, so a failing callback still reports the chunk as committed
+                with lock:
+                    state["done"] += 1
+                    state["affected"] += cursor.rowcount
+                    state["committed_ids"].extend(chunk)
+                    done, affected = state["done"], state["affected"]
+                if snapshot_callback:
+                    snapshot_callback(index, prior_rows)
+                if checkpoint_callback:
+                    checkpoint_callback(index, cursor.rowcount, None)
+                if progress_callback:
+                    progress_callback(done, len(chunks), affected)
+        except Exception:
+            failed.set()  # stops the other partitions as well
+            raise
+
+    try:
+        if len(connections) == 1:
+            run_partition(connections[0], partitions[0])
+        else:
+            with ThreadPoolExecutor(max_workers=len(connections)) as pool:
+                # Each partition runs in a copy of the caller's context so its work counts towards the caller's metrics
+                futures = [pool.submit(contextvars.copy_context().run, run_partition, conn, part)
+                           for conn, part in zip(connections, partitions) if part]
+                for future in futures:
+                    future.result()
+    except Exception as e:
+        # A failed chunk, or a callback (e.g. a checkpoint in the local job store) failing after
+        # earlier chunks committed: either way the committed chunks are reported with the error
+        raise BatchError(
+            f"{e}\n\n{state['done']}/{len(chunks)} chunks ({state['affected']} records) were committed before the error.",
+            state["affected"], state["committed_ids"]) from e
+    if state["done"] < len(chunks) and cancelled():
+        raise BatchCancelled(
+            f"Cancelled after {state['done']}/{len(chunks)} chunks ({state['affected']} records committed).",
+            state["affected"], state["committed_ids"])
+    return state["affected"]
+
+def run_batch_select(conn, sql_template, params, token_ids, chunk_size=None, fetch_size=None, progress_callback=None,
+                     cancel_event=None):
+    """
+    Runs a SELECT over token_ids in parameterized chunks and returns all rows.
+
+    `sql_template` uses the same `{id_placeholders}` marker as run_batch_update. Rows are pulled
+    with fetchmany(fetch_size) so the client never buffers a whole result set at once.
+    `progress_callback(done_chunks, total_chunks, rows_so_far)` is called after every chunk.
+    Raises BatchCancelled if `cancel_event` is set between chunks.
+    """
+    chunk_size = chunk_size or app_config.BATCH_CHUNK_SIZE
+    fetch_size = fetch_size or app_config.FETCH_SIZE
+    chunks = chunked(list(token_ids), chunk_size)
+    rows = []
+    for done, chunk in enumerate(chunks, start=1):
+        if cancel_event is not None and cancel_event.is_set():
+            raise BatchCancelled(f"Cancelled after {done - 1}/{len(chunks)} chunks ({len(rows)} rows fetched).",
+                                 0, [])
+        cursor = execute_ids(conn, sql_template, params, chunk)
+        while True:
+            batch = cursor.fetchmany(fetch_size)
+            if not batch:
+                break
+            rows.extend(batch)
+        if progress_callback:
+            progress_callback(done, len(chunks), len(rows))
+    return rows
@@ -0,0 +1,84 @@
+"""
+Offline benchmark of the OCSP path against the local responder in benchmarks/ocsp_responder.py.
+
+Measures single-check latency of check_certificate_status and bulk_check throughput for several
+worker counts (always fetching from the responder), then a bulk pass served from the OCSP cache.
+The OCSP cache lives in a temporary directory, so the application's cache is not touched.
+
+Usage (from the repository root):
+  python -m benchmarks.bench_ocsp --certs 500 --latency 0.02 --workers 1 4 8 16
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import app_config
+from benchmarks.ocsp_responder import create_fixture
+from benchmarks.report import latency_summary, base_meta, write_report
+
+def run_benchmarks(args, directory):
+    # Must be set before the first OCSP call creates the default cache
+    app_config.OCSP_CACHE_FILE = os.path.join(directory, "ocsp_cache.sqlite3")
+    from ocsp_client import check_certificate_status
+    from ocsp_bulk import bulk_check, collect_certificate_files
+
+    responder, issuer_path, cert_dir = create_fixture(directory, args.certs, args.revoked, args.unknown, args.latency,
+                                                      args.jitter, args.error_rate, args.seed)
+    cert_files = collect_certificate_files([cert_dir])
+    results = []
+    with responder:
+        timings = []
+        failures = 0
+        for i in range(args.single_checks):
+            started = time.perf_counter()
+            try:
+                check_certificate_status(cert_files[i % len(cert_files)], issuer_path, force_refresh=True)
+            except Exception:
+                failures += 1
+            timings.append(time.perf_counter() - started)
+        results.append({"operation": "check_certificate_status", "errors": failures, **latency_summary(timings)})
+        print(f"single check: p50 {results[-1]['p50_ms']} ms, p95 {results[-1]['p95_ms']} ms")
+
+        passes = [(workers, True) for workers in args.workers] + [(max(args.workers), False)]
+        for workers, force_refresh in passes:
+            started = time.perf_counter()
+            bulk_results = bulk_check([cert_dir], [issuer_path], max_workers=workers, force_refresh=force_refresh)
+            seconds = time.perf_counter() - started
+            errors = sum(1 for result in bulk_results if result["error"])
+            statuses = {}
+            for result in bulk_results:
+                if result["cert_status"]:
+                    statuses[result["cert_status"]] = statuses.get(result["cert_status"], 0) + 1
+            results.append({"operation": "bulk_check", "source": "responder" if force_refresh else "cache",
+                            "workers": workers, "certificates": len(bulk_results), "seconds": round(seconds, 4),
+                            "certificates_per_second": round(len(bulk_results) / seconds, 1) if seconds else None,
+                            "errors": errors, "statuses": statuses})
+            print(f"bulk {'responder' if force_refresh else 'cache':<9} {workers:>3} workers  {seconds:8.3f}s  "
+                  f"{errors} errors")
+    return results
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark OCSP checks against a local responder.")
+    parser.add_argument("--certs", type=int, default=200, help="Leaf certificates in the fixture")
+    parser.add_argument("--revoked", type=float, default=0.1, help="Share of revoked leaves")
+    parser.add_argument("--unknown", type=float, default=0.05, help="Share of leaves answered as unknown")
+    parser.add_argument("--latency", type=float, default=0.02, help="Responder latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Random extra latency (0..jitter) in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests answered with HTTP 500")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, app_config.OCSP_BULK_WORKERS, 16],
+                        help="Bulk worker counts to measure")
+    parser.add_argument("--single-checks", type=int, default=50, help="check_certificate_status calls")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default=None, help="Report path (default benchmarks/results/ocsp-<timestamp>.json)")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory(prefix="cts-ocsp-bench-") as directory:
+        results = run_benchmarks(args, directory)
+    meta = dict(base_meta(), certs=args.certs, revoked=args.revoked, unknown=args.unknown, latency=args.latency,
+                jitter=args.jitter, error_rate=args.error_rate, seed=args.seed)
+    write_report("ocsp", meta, results, args.output)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,185 @@
+"""
+Benchmark of the TMS operations against a local MySQL/MariaDB server.
+
+Creates (or reuses) synthetic `token` and `token_ms` tables with the columns used by functions.py,
+then measures batch update throughput, single and multi-token lookup latency and Python memory
+use for several list sizes. Writes a JSON report so runs can be compared.
+
+Usage (from the repository root, against a disposable database):
+  python -m benchmarks.bench_tms --host 127.0.0.1 --user root --password secret --rows 1000000
+  python -m benchmarks.bench_tms --rows 100000 --sizes 100 1000 10000 --output benchmarks/results/run.json
+
+A throwaway server can be started with e.g.
+  docker run -d --name cts-bench -e MYSQL_ROOT_PASSWORD=secret -p 3306:3306 mysql:8
+"""
+import os
+import sys
+import time
+import random
+import logging
+import tempfile
+import argparse
+import tracemalloc
+import mysql.connector
+import app_config
+from functions import (get_info_TMS1, get_info_TMS2, lookup_tokens_tms1, lookup_tokens_tms2, block_tms1, unblock_tms1,
+                       notifications_tms1, off_notifications_tms1, block_tms2, unblock_tms2, notifications_tms2,
+                       off_notifications_tms2)
+from benchmarks.report import latency_summary, base_meta, write_report
+
+TMS1_ID_BASE = 54000000000000
+TMS2_ID_PREFIX = "HID"
+INSERT_BATCH = 5000
+
+SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS token (
+        TokenID VARCHAR(64) NOT NULL PRIMARY KEY,
+        MST VARCHAR(20),
+        SubjectName VARCHAR(255),
+        isPushNotice TINYINT NULL,
+        NoticeInfo TEXT NULL,
+        IsBlock TINYINT NOT NULL DEFAULT 0,
+        IsUnblock TINYINT NOT NULL DEFAULT 0,
+        isInitialize TINYINT NULL
+    )""",
+    """CREATE TABLE IF NOT EXISTS token_ms (
+        token_hid VARCHAR(64) NOT NULL PRIMARY KEY,
+        use_specific_notification TINYINT NULL,
+        token_notification_status TINYINT NULL,
+        token_block_status TINYINT NULL,
+        token_title VARCHAR(255) NULL,
+        token_notification TEXT NULL,
+        token_note TEXT NULL,
+        token_valid_from DATETIME NULL,
+        token_valid_to DATETIME NULL
+    )""",
+]
+
+def tms1_id(i):
+    return str(TMS1_ID_BASE + i)
+
+def tms2_id(i):
+    return f"{TMS2_ID_PREFIX}{i:010d}"
+
+def connect(args, database=None):
+    return mysql.connector.connect(host=args.host, port=args.port, user=args.user, password=args.password,
+                                   database=database, autocommit=False)
+
+def provision(args):
+    """Creates the benchmark database and fills both tables with args.rows rows unless they already have them."""
+    conn = connect(args)
+    cursor = conn.cursor()
+    cursor.execute(f"CREATE DATABASE IF NOT EXISTS `{args.database}`")
+    cursor.execute(f"USE `{args.database}`")
+    for statement in SCHEMA:
+        cursor.execute(statement)
+    for table, insert, make_row in (
+        ("token", "INSERT INTO token (TokenID, MST, SubjectName, IsBlock, IsUnblock) VALUES (%s, %s, %s, 0, 0)",
+         lambda i: (tms1_id(i), f"{i % 10**10:010d}", f"CONG TY BENCHMARK {i}")),
+        ("token_ms", "INSERT INTO token_ms (token_hid, token_block_status) VALUES (%s, 0)",
+         lambda i: (tms2_id(i),)),
+    ):
+        cursor.execute(f"SELECT COUNT(*) FROM {table}")
+        if cursor.fetchone()[0] == args.rows:
+            print(f"{table}: reusing {args.rows} rows")
+            continue
+        cursor.execute(f"TRUNCATE TABLE {table}")
+        started = time.perf_counter()
+        for start in range(0, args.rows, INSERT_BATCH):
+            cursor.executemany(insert, [make_row(i) for i in range(start, min(start + INSERT_BATCH, args.rows))])
+            conn.commit()
+        print(f"{table}: inserted {args.rows} rows in {time.perf_counter() - started:.1f}s")
+    cursor.close()
+    return conn
+
+def measure(func):
+    """Runs func() and returns (result, seconds, peak Python memory in bytes)."""
+    tracemalloc.start()
+    started = time.perf_counter()
+    try:
+        result = func()
+    finally:
+        seconds = time.perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return result, seconds, peak
+
+def run_benchmarks(conn, args, logger):
+    rng = random.Random(args.seed)
+    results = []
+
+    def sample_ids(make_id, size):
+        return [make_id(i) for i in rng.sample(range(args.rows), min(size, args.rows))]
+
+    # Single-token Get Info latency (cold server cache is not controlled; repeat for a distribution)
+    for name, get_info, make_id in (("get_info_tms1", get_info_TMS1, tms1_id), ("get_info_tms2", get_info_TMS2, tms2_id)):
+        timings = []
+        for token_id in sample_ids(make_id, args.single_lookups):
+            started = time.perf_counter()
+            get_info(conn, token_id)
+            timings.append(time.perf_counter() - started)
+        results.append({"operation": name, "ids": 1, **latency_summary(timings)})
+
+    batch_operations = [
+        ("lookup_tms1", tms1_id, lambda ids: lookup_tokens_tms1(conn, ids)),
+        ("block_tms1", tms1_id, lambda ids: block_tms1(conn, ids, "Benchmark block", logger)),
+        ("unblock_tms1", tms1_id, lambda ids: unblock_tms1(conn, ids, logger)),
+        ("notifications_tms1", tms1_id, lambda ids: notifications_tms1(conn, ids, "Benchmark notice", logger)),
+        ("off_notifications_tms1", tms1_id, lambda ids: off_notifications_tms1(conn, ids, logger)),
+        ("lookup_tms2", tms2_id, lambda ids: lookup_tokens_tms2(conn, ids)),
+        ("block_tms2", tms2_id, lambda ids: block_tms2(conn, ids, "Benchmark block", logger)),
+        ("unblock_tms2", tms2_id, lambda ids: unblock_tms2(conn, ids, logger)),
+        ("notifications_tms2", tms2_id, lambda ids: notifications_tms2(conn, ids, "Title", "Benchmark notice", logger)),
+        ("off_notifications_tms2", tms2_id, lambda ids: off_notifications_tms2(conn, ids, logger)),
+    ]
+    for size in args.sizes:
+        for name, make_id, operation in batch_operations:
+            ids = sample_ids(make_id, size)
+            result, seconds, peak = measure(lambda: operation(ids))
+            rows = len(result[0]) if name.startswith("lookup") else result
+            results.append({"operation": name, "ids": len(ids), "rows": rows, "seconds": round(seconds, 4),
+                            "ids_per_second": round(len(ids) / seconds, 1) if seconds else None,
+                            "peak_memory_kb": round(peak / 1024, 1)})
+            print(f"{name:<24} {len(ids):>8} ids  {seconds:8.3f}s  peak {peak / 1024:10.1f} KiB")
+    return results
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the TMS operations against a local MySQL/MariaDB.")
+    parser.add_argument("--host", default=os.environ.get("CTS_BENCH_HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=int(os.environ.get("CTS_BENCH_PORT", "3306")))
+    parser.add_argument("--user", default=os.environ.get("CTS_BENCH_USER", "root"))
+    parser.add_argument("--password", default=os.environ.get("CTS_BENCH_PASSWORD", ""))
+    parser.add_argument("--database", default="cts_bench", help="Scratch database (created, tables truncated)")
+    parser.add_argument("--rows", type=int, default=100000, help="Rows per table (100k-5M)")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000, 100000], help="Token ID list sizes")
+    parser.add_argument("--single-lookups", type=int, default=200, help="Get Info calls per schema")
+    parser.add_argument("--seed", type=int, default=42, help="Seed for picking the Token IDs")
+    parser.add_argument("--output", default=None, help="Report path (default benchmarks/results/tms-<timestamp>.json)")
+    args = parser.parse_args(argv)
+
+    # Batch functions log through a logger; keep benchmark runs out of the audit logs
+    logger = logging.getLogger("cts.benchmark")
+    logger.addHandler(logging.NullHandler())
+    logger.propagate = False
+
+    conn = provision(args)
+    try:
+        server_cursor = conn.cursor()
+        server_cursor.execute("SELECT VERSION()")
+        server_version = server_cursor.fetchone()[0]
+        server_cursor.close()
+        # Batch runs are journaled and stored as jobs; keep them out of the application's stores
+        with tempfile.TemporaryDirectory(prefix="cts-tms-bench-") as directory:
+            app_config.UNDO_JOURNAL_FILE = os.path.join(directory, "undo_journal.sqlite3")
+            app_config.BATCH_JOB_FILE = os.path.join(directory, "batch_jobs.sqlite3")
+            results = run_benchmarks(conn, args, logger)
+    finally:
+        conn.close()
+
+    meta = dict(base_meta(), server_version=server_version, rows=args.rows, sizes=args.sizes, seed=args.seed,
+                batch_chunk_size=app_config.BATCH_CHUNK_SIZE, fetch_size=app_config.FETCH_SIZE)
+    write_report("tms", meta, results, args.output)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,232 @@
+"""
+Local OCSP responder stand-in for offline OCSP checks and benchmarks.
+
+TestPKI generates a throwaway root CA, an issuing CA and leaf certificates whose AIA extension
+points at an OCSPResponder running on 127.0.0.1. Each leaf is answered as good, revoked or
+unknown; the responder can add latency and fail a share of requests with HTTP 500.
+
+Serve a fixture for manual testing (e.g. the Check OCSP / Bulk OCSP screens):
+  python -m benchmarks.ocsp_responder --dir /tmp/ocsp-fixture --certs 100 --revoked 0.2 --latency 0.05
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import threading
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from cryptography import x509
+from cryptography.x509 import ocsp
+from cryptography.x509.oid import NameOID, AuthorityInformationAccessOID
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+
+STATUSES = {
+    "good": ocsp.OCSPCertStatus.GOOD,
+    "revoked": ocsp.OCSPCertStatus.REVOKED,
+    "unknown": ocsp.OCSPCertStatus.UNKNOWN,
+}
+
+def _name(common_name, uid=None):
+    attributes = [x509.NameAttribute(NameOID.COMMON_NAME, common_name)]
+    if uid:
+        attributes.append(x509.NameAttribute(NameOID.USER_ID, uid))
+    return x509.Name(attributes)
+
+class TestPKI:
+    """A root CA, an issuing CA and the leaves it issued, with the OCSP status of every leaf."""
+    def __init__(self, validity_days=30):
+        self.now = datetime.now(timezone.utc)
+        self.validity = timedelta(days=validity_days)
+        self.root_key = ec.generate_private_key(ec.SECP256R1())
+        self.root = self._sign(_name("CTS Test Root CA"), _name("CTS Test Root CA"), self.root_key.public_key(),
+                               self.root_key, 1, ca=True)
+        self.issuer_key = ec.generate_private_key(ec.SECP256R1())
+        self.issuer = self._sign(_name("CTS Test Issuing CA"), self.root.subject, self.issuer_key.public_key(),
+                                 self.root_key, 2, ca=True)
+        self.leaves = {}    # serial number -> certificate
+        self.statuses = {}  # serial number -> OCSPCertStatus
+        self._next_serial = 1000
+
+    def _sign(self, subject, issuer_name, public_key, signing_key, serial, ca=False, ocsp_url=None):
+        builder = (x509.CertificateBuilder().subject_name(subject).issuer_name(issuer_name).public_key(public_key)
+                   .serial_number(serial).not_valid_before(self.now - timedelta(days=1))
+                   .not_valid_after(self.now + self.validity)
+                   .add_extension(x509.BasicConstraints(ca=ca, path_length=None), critical=True))
+        if ocsp_url:
+            builder = builder.add_extension(x509.AuthorityInformationAccess([x509.AccessDescription(
+                AuthorityInformationAccessOID.OCSP, x509.UniformResourceIdentifier(ocsp_url))]), critical=False)
+        return builder.sign(signing_key, hashes.SHA256())
+
+    def issue_leaf(self, ocsp_url, status="good"):
+        """Issues a leaf certificate checked at ocsp_url and answered with status ('good', 'revoked', 'unknown')."""
+        serial = self._next_serial
+        self._next_serial += 1
+        key = ec.generate_private_key(ec.SECP256R1())
+        cert = self._sign(_name(f"CONG TY TEST {serial}", f"MST:{serial:010d}"), self.issuer.subject,
+                          key.public_key(), self.issuer_key, serial, ocsp_url=ocsp_url)
+        self.leaves[serial] = cert
+        self.statuses[serial] = STATUSES[status]
+        return cert
+
+    def write(self, directory):
+        """Writes root.pem, issuer.pem and certs/<serial>.pem (every other leaf as DER .cer). Returns (issuer_path, cert_dir)."""
+        cert_dir = os.path.join(directory, "certs")
+        os.makedirs(cert_dir, exist_ok=True)
+        for file_name, cert in (("root.pem", self.root), ("issuer.pem", self.issuer)):
+            with open(os.path.join(directory, file_name), "wb") as f:
+                f.write(cert.public_bytes(serialization.Encoding.PEM))
+        for serial, cert in self.leaves.items():
+            encoding, extension = ((serialization.Encoding.DER, ".cer") if serial % 2
+                                   else (serialization.Encoding.PEM, ".pem"))
+            with open(os.path.join(cert_dir, f"{serial}{extension}"), "wb") as f:
+                f.write(cert.public_bytes(encoding))
+        return os.path.join(directory, "issuer.pem"), cert_dir
+
+    def build_response(self, request):
+        """Returns the DER OCSP response for a parsed OCSP request, signed by the issuing CA."""
+        cert = self.leaves.get(request.serial_number)
+        if cert is None:
+            return ocsp.OCSPResponseBuilder.build_unsuccessful(
+                ocsp.OCSPResponseStatus.UNAUTHORIZED).public_bytes(serialization.Encoding.DER)
+        status = self.statuses[request.serial_number]
+        revoked = status == ocsp.OCSPCertStatus.REVOKED
+        now = datetime.now(timezone.utc)
+        builder = ocsp.OCSPResponseBuilder().add_response(
+            cert=cert, issuer=self.issuer, algorithm=request.hash_algorithm, cert_status=status,
+            this_update=now, next_update=now + timedelta(hours=1),
+            revocation_time=now - timedelta(days=1) if revoked else None,
+            revocation_reason=x509.ReasonFlags.key_compromise if revoked else None,
+        ).responder_id(ocsp.OCSPResponderEncoding.HASH, self.issuer)
+        return builder.sign(self.issuer_key, hashes.SHA256()).public_bytes(serialization.Encoding.DER)
+
+class OCSPResponder:
+    """
+    HTTP OCSP responder for a TestPKI on 127.0.0.1 (port 0 picks a free port). Every answer is
+    delayed by latency seconds plus up to jitter seconds, and error_rate of the requests get HTTP 500.
+    Use as a context manager or call start() / stop().
+    """
+    def __init__(self, pki, port=0, latency=0.0, jitter=0.0, error_rate=0.0, seed=None):
+        self.pki = pki
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.requests = 0
+        self.errors = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self._server.server_address[1]}/"
+
+    def _draw(self):
+        """Returns (delay, fail) for one request."""
+        with self._lock:
+            self.requests += 1
+            fail = self._random.random() < self.error_rate
+            if fail:
+                self.errors += 1
+            return self.latency + self._random.uniform(0, self.jitter), fail
+
+    def _handler_class(self):
+        responder = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive, like real responders
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                delay, fail = responder._draw()
+                if delay:
+                    time.sleep(delay)
+                if fail:
+                    self._reply(500, b"", "text/plain")
+                    return
+                try:
+                    der = responder.pki.build_response(ocsp.load_der_ocsp_request(body))
+                except ValueError:
+                    der = ocsp.OCSPResponseBuilder.build_unsuccessful(
+                        ocsp.OCSPResponseStatus.MALFORMED_REQUEST).public_bytes(serialization.Encoding.DER)
+                self._reply(200, der, "application/ocsp-response")
+
+            def _reply(self, code, body, content_type):
+                self.send_response(code)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def serve_forever(self):
+        """Serves in the calling thread until interrupted."""
+        try:
+            self._server.serve_forever()
+        finally:
+            self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+def create_fixture(directory, count, revoked=0.1, unknown=0.05, latency=0.0, jitter=0.0, error_rate=0.0, seed=42,
+                   port=0):
+    """
+    Generates a TestPKI with count leaves (the given shares revoked/unknown, the rest good), writes it
+    to directory and returns (responder, issuer_path, cert_dir). The responder is not started yet.
+    """
+    rng = random.Random(seed)
+    pki = TestPKI()
+    responder = OCSPResponder(pki, port=port, latency=latency, jitter=jitter, error_rate=error_rate, seed=seed)
+    for _ in range(count):
+        draw = rng.random()
+        status = "revoked" if draw < revoked else "unknown" if draw < revoked + unknown else "good"
+        pki.issue_leaf(responder.url, status)
+    issuer_path, cert_dir = pki.write(directory)
+    return responder, issuer_path, cert_dir
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve a throwaway PKI from a local OCSP responder.")
+    parser.add_argument("--dir", required=True, help="Directory for the generated certificates")
+    parser.add_argument("--certs", type=int, default=20, help="Number of leaf certificates")
+    parser.add_argument("--revoked", type=float, default=0.1, help="Share of revoked leaves")
+    parser.add_argument("--unknown", type=float, default=0.05, help="Share of leaves answered as unknown")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every answer")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Random extra seconds (0..jitter) per answer")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests answered with HTTP 500")
+    parser.add_argument("--port", type=int, default=0)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    responder, issuer_path, cert_dir = create_fixture(args.dir, args.certs, args.revoked, args.unknown, args.latency,
+                                                      args.jitter, args.error_rate, args.seed, args.port)
+    print(f"OCSP responder: {responder.url}\nIssuer: {issuer_path}\nCertificates: {cert_dir}\nPress Ctrl+C to stop.")
+    try:
+        responder.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
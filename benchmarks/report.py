@@ -0,0 +1,43 @@
+import os
+import json
+import platform
+import subprocess
+from datetime import datetime
+
+RESULTS_DIR = os.path.join("benchmarks", "results")
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+def latency_summary(timings):
+    """p50/p95/max of a list of durations in seconds, in milliseconds."""
+    return {"runs": len(timings),
+            "p50_ms": round(percentile(timings, 0.5) * 1000, 3),
+            "p95_ms": round(percentile(timings, 0.95) * 1000, 3),
+            "max_ms": round(max(timings) * 1000, 3)}
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def base_meta():
+    """Run metadata shared by every benchmark report."""
+    return {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "git_revision": git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+    }
+
+def write_report(name, meta, results, output=None):
+    """Writes {"meta", "results"} to output (default benchmarks/results/<name>-<timestamp>.json). Returns the path."""
+    output = output or os.path.join(RESULTS_DIR, f"{name}-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump({"meta": meta, "results": results}, f, indent=2)
+    print(f"Report written to {output}")
+    return output
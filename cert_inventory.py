@@ -0,0 +1,282 @@
+import os
+import sqlite3
+import hashlib
+import threading
+import multiprocessing
+from datetime import datetime, timedelta, timezone
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes
+from cryptography.x509.oid import NameOID, ExtensionOID, AuthorityInformationAccessOID
+import app_config
+# functions.py is not imported here: every worker process imports this module, so it stays light
+
+# Columns returned by the inventory queries, in order
+INVENTORY_COLUMNS = ["subject_cn", "mst", "uid", "serial_hex", "serial_dec", "issuer_cn", "not_before", "not_after",
+                     "ocsp_urls", "crl_urls", "is_ca", "path"]
+
+# UID prefixes used by Vietnamese CAs for the tax code of an organisation
+MST_PREFIXES = ("MST:", "MNS:")
+
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+def _attribute_values(name, oid):
+    return [attribute.value for attribute in name.get_attributes_for_oid(oid)]
+
+def _access_urls(cert):
+    ocsp_urls, crl_urls = [], []
+    try:
+        aia = cert.extensions.get_extension_for_oid(ExtensionOID.AUTHORITY_INFORMATION_ACCESS).value
+        ocsp_urls = [ad.access_location.value for ad in aia if ad.access_method == AuthorityInformationAccessOID.OCSP]
+    except x509.ExtensionNotFound:
+        pass
+    try:
+        crl_points = cert.extensions.get_extension_for_oid(ExtensionOID.CRL_DISTRIBUTION_POINTS).value
+        crl_urls = [name.value for point in crl_points for name in (point.full_name or [])
+                    if isinstance(name, x509.UniformResourceIdentifier)]
+    except x509.ExtensionNotFound:
+        pass
+    return ocsp_urls, crl_urls
+
+def _is_ca(cert):
+    try:
+        return cert.extensions.get_extension_for_class(x509.BasicConstraints).value.ca
+    except x509.ExtensionNotFound:
+        return False
+
+def certificate_metadata(cert):
+    """Returns the inventory fields of a certificate, read from the parsed name attributes and extensions."""
+    uids = _attribute_values(cert.subject, NameOID.USER_ID)
+    mst = next((uid.split(":", 1)[1] for uid in uids if uid.upper().startswith(MST_PREFIXES)), "")
+    common_names = _attribute_values(cert.subject, NameOID.COMMON_NAME)
+    issuer_names = _attribute_values(cert.issuer, NameOID.COMMON_NAME)
+    ocsp_urls, crl_urls = _access_urls(cert)
+    return {
+        "fingerprint": cert.fingerprint(hashes.SHA256()).hex(),
+        "subject_cn": common_names[0] if common_names else cert.subject.rfc4514_string(),
+        "uid": ", ".join(uids),
+        "mst": mst,
+        "serial_hex": format(cert.serial_number, "X"),
+        "serial_dec": str(cert.serial_number),  # up to 20 bytes, too large for an SQLite integer
+        "issuer_cn": issuer_names[0] if issuer_names else cert.issuer.rfc4514_string(),
+        "issuer": cert.issuer.rfc4514_string(),
+        "not_before": cert.not_valid_before_utc.strftime(TIME_FORMAT),
+        "not_after": cert.not_valid_after_utc.strftime(TIME_FORMAT),
+        "ocsp_urls": " ".join(ocsp_urls),
+        "crl_urls": " ".join(crl_urls),
+        "is_ca": int(_is_ca(cert)),
+    }
+
+def scan_file(path, known_digest=None):
+    """
+    Hashes and parses one certificate file (PEM, PEM bundle or DER). Runs in a worker process.
+    Returns {"path", "digest", "certificates", "error"}; "certificates" is None when the content
+    still matches known_digest and does not need to be re-indexed.
+    """
+    result = {"path": path, "digest": None, "certificates": [], "error": ""}
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+        result["digest"] = hashlib.sha256(data).hexdigest()
+        if result["digest"] == known_digest:
+            result["certificates"] = None
+            return result
+        if b"-----BEGIN" in data:
+            certs = x509.load_pem_x509_certificates(data)
+        else:
+            certs = [x509.load_der_x509_certificate(data)]
+        result["certificates"] = [certificate_metadata(cert) for cert in certs]
+    except Exception as e:
+        result["error"] = str(e)
+    return result
+
+def scan_files(items):
+    """Scans a batch of (path, known_digest) items; batching keeps the inter-process overhead low."""
+    return [scan_file(path, known_digest) for path, known_digest in items]
+
+def normalize_serial(text):
+    """Returns (serial_hex, serial_dec) for a serial typed as hex (with optional colons/spaces/0x) or decimal."""
+    text = text.strip().replace(" ", "").replace(":", "")
+    if text.lower().startswith("0x"):
+        text = text[2:]
+    try:
+        serial_hex = format(int(text, 16), "X")
+    except ValueError:
+        serial_hex = None
+    serial_dec = str(int(text)) if text.isdigit() else None
+    if serial_hex is None and serial_dec is None:
+        raise ValueError(f"'{text}' is not a valid serial number.")
+    return serial_hex, serial_dec
+
+class CertificateInventory:
+    """
+    SQLite index of the certificates found under one or more folders. scan() walks the folders,
+    re-parses only files whose size or mtime changed (and whose content hash differs) in a process
+    pool, and drops files that disappeared, so queries by serial, MST or expiry date are instant.
+    """
+    def __init__(self, path=None):
+        self.path = path or app_config.CERT_INVENTORY_FILE
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS scanned_file (
+                path TEXT PRIMARY KEY,
+                mtime_ns INTEGER NOT NULL,
+                size INTEGER NOT NULL,
+                digest TEXT,
+                error TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS certificate (
+                path TEXT NOT NULL,
+                fingerprint TEXT NOT NULL,
+                subject_cn TEXT NOT NULL,
+                uid TEXT NOT NULL,
+                mst TEXT NOT NULL,
+                serial_hex TEXT NOT NULL,
+                serial_dec TEXT NOT NULL,
+                issuer_cn TEXT NOT NULL,
+                issuer TEXT NOT NULL,
+                not_before TEXT NOT NULL,
+                not_after TEXT NOT NULL,
+                ocsp_urls TEXT NOT NULL,
+                crl_urls TEXT NOT NULL,
+                is_ca INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_certificate_path ON certificate (path);
+            CREATE INDEX IF NOT EXISTS idx_certificate_serial_hex ON certificate (serial_hex);
+            CREATE INDEX IF NOT EXISTS idx_certificate_serial_dec ON certificate (serial_dec);
+            CREATE INDEX IF NOT EXISTS idx_certificate_mst ON certificate (mst);
+            CREATE INDEX IF NOT EXISTS idx_certificate_not_after ON certificate (not_after);
+        """)
+        self._db.commit()
+
+    @staticmethod
+    def _walk(roots):
+        """Yields (path, mtime_ns, size) of every certificate file under roots (files are taken as given)."""
+        for root in roots:
+            if os.path.isfile(root):
+                stat = os.stat(root)
+                yield os.path.abspath(root), stat.st_mtime_ns, stat.st_size
+                continue
+            for dirpath, _, filenames in os.walk(root):
+                for name in filenames:
+                    if name.lower().endswith(app_config.CERT_EXTENSIONS):
+                        path = os.path.abspath(os.path.join(dirpath, name))
+                        try:
+                            stat = os.stat(path)
+                        except OSError:
+                            continue
+                        yield path, stat.st_mtime_ns, stat.st_size
+
+    def scan(self, roots, max_workers=None, progress_callback=None, cancel_event=None):
+        """
+        Updates the index from the certificate files under roots (folders or files).
+        `progress_callback(done_files, total_files, certificates)` is called as batches finish.
+        Returns a dict with the counts of files seen, parsed, unchanged, removed and failed.
+        """
+        with self._lock:
+            known = {path: (mtime_ns, size, digest) for path, mtime_ns, size, digest
+                     in self._db.execute("SELECT path, mtime_ns, size, digest FROM scanned_file")}
+        found = {}
+        to_scan = []
+        for path, mtime_ns, size in self._walk(roots):
+            found[path] = (mtime_ns, size)
+            previous = known.get(path)
+            if previous is None or previous[:2] != (mtime_ns, size):
+                to_scan.append((path, previous[2] if previous else None))
+
+        # Files that were indexed under one of the roots but no longer exist
+        prefixes = tuple(os.path.join(os.path.abspath(root), "") for root in roots if not os.path.isfile(root))
+        removed = [path for path in known if path not in found and path.startswith(prefixes)]
+        stats = {"files": len(found), "parsed": 0, "unchanged": len(found) - len(to_scan), "removed": len(removed),
+                 "failed": 0, "certificates": 0}
+        with self._lock:
+            for path in removed:
+                self._forget(path)
+            self._db.commit()
+
+        batch_size = app_config.CERT_INVENTORY_BATCH_SIZE
+        batches = [to_scan[i:i + batch_size] for i in range(0, len(to_scan), batch_size)]
+        done = 0
+        if batches:
+            # Spawned (not forked) workers: the caller is usually a thread of the Tk application
+            with ProcessPoolExecutor(max_workers=max_workers or app_config.CERT_INVENTORY_WORKERS,
+                                     mp_context=multiprocessing.get_context("spawn")) as pool:
+                futures = [pool.submit(scan_files, batch) for batch in batches]
+                try:
+                    for future in as_completed(futures):
+                        results = future.result()
+                        with self._lock:
+                            for result in results:
+                                self._store(result, *found[result["path"]], stats)
+                            self._db.commit()
+                        done += len(results)
+                        if progress_callback:
+                            progress_callback(done, len(to_scan), stats["certificates"])
+                        if cancel_event is not None and cancel_event.is_set():
+                            break
+                finally:
+                    for future in futures:
+                        future.cancel()
+        stats["cancelled"] = done < len(to_scan)
+        return stats
+
+    def _forget(self, path):
+        self._db.execute("DELETE FROM certificate WHERE path = ?", (path,))
+        self._db.execute("DELETE FROM scanned_file WHERE path = ?", (path,))
+
+    def _store(self, result, mtime_ns, size, stats):
+        path = result["path"]
+        if result["certificates"] is not None:
+            # New or changed content: replace the file's certificates
+            self._db.execute("DELETE FROM certificate WHERE path = ?", (path,))
+            for cert in result["certificates"]:
+                self._db.execute(f"INSERT INTO certificate (path, {', '.join(cert)}) VALUES (?{', ?' * len(cert)})",
+                                 (path, *cert.values()))
+            stats["parsed"] += 1
+            stats["certificates"] += len(result["certificates"])
+        else:
+            stats["unchanged"] += 1
+        if result["error"]:
+            stats["failed"] += 1
+        self._db.execute("INSERT OR REPLACE INTO scanned_file VALUES (?, ?, ?, ?, ?)",
+                         (path, mtime_ns, size, result["digest"], result["error"]))
+
+    def _query(self, condition, params, limit):
+        with self._lock:
+            return self._db.execute(
+                f"SELECT {', '.join(INVENTORY_COLUMNS)} FROM certificate WHERE {condition} "
+                "ORDER BY not_after, subject_cn LIMIT ?", tuple(params) + (limit,)).fetchall()
+
+    def find_by_serial(self, serial, limit=1000):
+        """Certificates with a serial number typed as hex or decimal."""
+        serial_hex, serial_dec = normalize_serial(serial)
+        return self._query("serial_hex = ? OR serial_dec = ?", (serial_hex or "", serial_dec or ""), limit)
+
+    def find_by_text(self, text, limit=1000):
+        """Certificates whose MST or UID starts with text, or whose subject CN contains it."""
+        text = text.strip()
+        if not text:
+            raise ValueError("Please enter an MST, UID or name.")
+        return self._query("mst LIKE ? OR uid LIKE ? OR uid LIKE ? OR subject_cn LIKE ?",
+                           (f"{text}%", f"{text}%", f"%:{text}%", f"%{text}%"), limit)
+
+    def expiring_between(self, start, end, include_ca=False, limit=100000):
+        """Certificates whose notAfter (UTC) falls in [start, end)."""
+        condition = "not_after >= ? AND not_after < ?" + ("" if include_ca else " AND is_ca = 0")
+        return self._query(condition, (start.strftime(TIME_FORMAT), end.strftime(TIME_FORMAT)), limit)
+
+    def expiring_this_month(self, include_ca=False):
+        """Certificates expiring in the current calendar month of the tool's local time (UTC+7)."""
+        local_now = datetime.now(timezone.utc) + timedelta(hours=7)
+        month_start = local_now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+        next_month = (month_start + timedelta(days=32)).replace(day=1)
+        return self.expiring_between(month_start - timedelta(hours=7), next_month - timedelta(hours=7), include_ca)
+
+    def counts(self):
+        """Returns (files, certificates, files that failed to parse)."""
+        with self._lock:
+            return self._db.execute(
+                "SELECT (SELECT COUNT(*) FROM scanned_file), (SELECT COUNT(*) FROM certificate), "
+                "(SELECT COUNT(*) FROM scanned_file WHERE error != '')").fetchone()
@@ -0,0 +1,317 @@
+"""
+Headless command-line entry point for scripting the CTS operations (cron jobs, pipelines).
+
+Every command prints one JSON document to stdout and exits with:
+  0  the operation succeeded
+  1  the operation ran but failed, was cancelled or found nothing (see "error" / "missing")
+  2  invalid input
+  3  the config could not be decrypted or the database could not be reached
+
+The config password is read from the CTS_CONFIG_PASSWORD environment variable, or prompted for.
+
+Examples:
+  python cli.py block --system TMS1 --ids blocked.txt --note "Token revoked"
+  cat ids.txt | python cli.py notifications-off --system TMS2_CMC
+  python cli.py get-info --system TMS1 0123456789
+  python cli.py ocsp certs/ --issuer ca.cer
+  python cli.py export --system TMS2 --output tokens.jsonl.gz --format jsonl --compress
+  python cli.py jobs --system TMS1
+  python cli.py resume --system TMS1 --job 42 --failed-only
+"""
+import os
+import sys
+import json
+import getpass
+import argparse
+import threading
+import mysql.connector
+import app_config
+from batch_writer import BatchError, BatchCancelled
+from database import ConfigVault, ConnectionManager
+from functions import (setup_logging, note_hotro_tms1, notifications_tms1, off_notifications_tms1, block_tms1,
+                       unblock_tms1, uninitialize_tms1, notifications_tms2, off_notifications_tms2, block_tms2,
+                       unblock_tms2, lookup_tokens_tms1, lookup_tokens_tms2, TMS1_LOOKUP_COLUMNS, TMS2_LOOKUP_COLUMNS,
+                       resume_batch_job)
+from repository import TMS1Repository, TMS2Repository
+from job_store import get_job_store, JOB_COLUMNS
+from ocsp_bulk import bulk_check, export_results_csv
+from id_list import load_ids_from_file, parse_ids_from_text
+from token_export import EXPORT_SCHEMAS, EXPORT_FORMATS, export_tokens, guess_schema
+
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_USAGE = 2
+EXIT_UNAVAILABLE = 3
+
+PASSWORD_ENV = "CTS_CONFIG_PASSWORD"
+
+# Batch commands: schema -> (function, text options passed after the ID list)
+BATCH_COMMANDS = {
+    "block": {"tms1": (block_tms1, ["note"]), "tms2": (block_tms2, ["note"])},
+    "unblock": {"tms1": (unblock_tms1, []), "tms2": (unblock_tms2, [])},
+    "notifications-on": {"tms1": (notifications_tms1, ["content"]), "tms2": (notifications_tms2, ["title", "content"])},
+    "notifications-off": {"tms1": (off_notifications_tms1, []), "tms2": (off_notifications_tms2, [])},
+    "note-hotro": {"tms1": (note_hotro_tms1, ["content"])},
+}
+
+LOOKUPS = {
+    "tms1": (lookup_tokens_tms1, TMS1_LOOKUP_COLUMNS),
+    "tms2": (lookup_tokens_tms2, TMS2_LOOKUP_COLUMNS),
+}
+
+REPOSITORIES = {
+    "tms1": TMS1Repository,
+    "tms2": TMS2Repository,
+}
+
+class CommandError(Exception):
+    """Ends a command with the given exit code and message."""
+    def __init__(self, message, exit_code):
+        super().__init__(message)
+        self.exit_code = exit_code
+
+def read_ids(args):
+    """Reads Token IDs from the positional arguments, --ids FILE, or stdin ('-' or nothing given)."""
+    if getattr(args, "token_ids", None):
+        id_list = parse_ids_from_text(args.token_ids, "arguments")
+    elif args.ids and args.ids != "-":
+        column = int(args.column) if args.column and args.column.isdigit() else args.column
+        id_list = load_ids_from_file(args.ids, column)
+    else:
+        id_list = parse_ids_from_text(sys.stdin, "stdin")
+    if not len(id_list):
+        raise CommandError("No valid Token IDs were given.", EXIT_USAGE)
+    return id_list
+
+def run_cancellable(func):
+    """
+    Runs func(cancel_event) on a worker thread so Ctrl+C cancels between chunks (keeping the
+    committed ones logged) instead of interrupting a chunk half-way.
+    """
+    cancel_event = threading.Event()
+    outcome = {}
+
+    def run():
+        try:
+            outcome["result"] = func(cancel_event)
+        except BaseException as e:
+            outcome["error"] = e
+
+    worker = threading.Thread(target=run, name="cts-cli")
+    worker.start()
+    while worker.is_alive():
+        try:
+            worker.join(0.2)
+        except KeyboardInterrupt:
+            cancel_event.set()
+    if "error" in outcome:
+        raise outcome["error"]
+    return outcome["result"]
+
+class Session:
+    """Decrypts the config and opens the pool of one section, on first use."""
+    def __init__(self, section_name):
+        self.section_name = section_name
+        self.db = None
+
+    def open(self):
+        password = os.environ.get(PASSWORD_ENV) or getpass.getpass("Config password: ")
+        try:
+            vault = ConfigVault.unlock(password)
+            try:
+                endpoints = vault.get_endpoints(self.section_name)
+            finally:
+                vault.wipe()
+        except ValueError as e:
+            raise CommandError(str(e), EXIT_USAGE)
+        except Exception as e:
+            raise CommandError(str(e), EXIT_UNAVAILABLE)
+        self.db = ConnectionManager(pool_size=max(1, app_config.BATCH_CONNECTIONS))
+        try:
+            self.db.connect_section(self.section_name, endpoints)
+        except mysql.connector.Error as e:
+            raise CommandError(f"Could not connect to {self.section_name}: {e}", EXIT_UNAVAILABLE)
+        return self.db
+
+    def close(self):
+        if self.db:
+            self.db.close()
+
+def cmd_batch(args, session):
+    schema = args.schema or guess_schema(args.system)
+    if schema not in BATCH_COMMANDS[args.command]:
+        raise CommandError(f"'{args.command}' is not available for {schema.upper()}.", EXIT_USAGE)
+    batch_func, option_names = BATCH_COMMANDS[args.command][schema]
+    id_list = read_ids(args)
+    options = [getattr(args, name) or "" for name in option_names]
+    logger = setup_logging(args.system)
+    db = session.open()
+
+    result = {"requested": len(id_list), "duplicates": id_list.duplicates, "invalid": id_list.invalid, "affected": 0}
+    try:
+        def run(cancel_event):
+            with db.connections(args.system, app_config.BATCH_CONNECTIONS) as conns:
+                return batch_func(conns, id_list.ids, *options, logger, cancel_event=cancel_event)
+        result["affected"] = run_cancellable(run)
+    except BatchError as e:
+        result.update(affected=e.affected_rows, committed=len(e.committed_ids),
+                      error="Cancelled" if isinstance(e, BatchCancelled) else str(e))
+        return result, EXIT_FAILED
+    return result, EXIT_OK
+
+def cmd_jobs(args, session):
+    repository = REPOSITORIES[args.schema or guess_schema(args.system)]
+    jobs = get_job_store().jobs(args.system, repository.table, args.limit)
+    return {"jobs": [dict(zip(JOB_COLUMNS, job)) for job in jobs]}, EXIT_OK
+
+def cmd_resume(args, session):
+    repository = REPOSITORIES[args.schema or guess_schema(args.system)]
+    logger = setup_logging(args.system)
+    db = session.open()
+
+    result = {"job": args.job, "affected": 0}
+    try:
+        def run(cancel_event):
+            with db.connections(args.system, app_config.BATCH_CONNECTIONS) as conns:
+                return resume_batch_job(conns, repository, args.job, logger, args.failed_only,
+                                        cancel_event=cancel_event)
+        result["affected"] = run_cancellable(run)
+    except BatchError as e:
+        result.update(affected=e.affected_rows, committed=len(e.committed_ids),
+                      error="Cancelled" if isinstance(e, BatchCancelled) else str(e))
+        return result, EXIT_FAILED
+    return result, EXIT_OK
+
+def cmd_get_info(args, session):
+    schema = args.schema or guess_schema(args.system)
+    lookup_func, columns = LOOKUPS[schema]
+    id_list = read_ids(args)
+    db = session.open()
+
+    def run(cancel_event):
+        with db.connection(args.system) as conn:
+            return lookup_func(conn, id_list.ids, cancel_event=cancel_event)
+    rows, missing_ids = run_cancellable(run)
+    result = {"tokens": [dict(zip(columns, row)) for row in rows], "missing": missing_ids}
+    return result, EXIT_FAILED if missing_ids else EXIT_OK
+
+def cmd_uninitialize(args, session):
+    logger = setup_logging(args.system)
+    db = session.open()
+    with db.connection(args.system) as conn:
+        affected = uninitialize_tms1(conn, args.token_id, logger)
+    result = {"token_id": args.token_id, "affected": affected}
+    if not affected:
+        result["error"] = "Token ID not found or already uninitialized."
+    return result, EXIT_OK if affected else EXIT_FAILED
+
+def cmd_ocsp(args, session):
+    results = run_cancellable(lambda cancel_event: bulk_check(args.paths, args.issuer, args.workers,
+                                                              cancel_event=cancel_event,
+                                                              force_refresh=args.force_refresh))
+    if args.csv:
+        export_results_csv(results, args.csv)
+    errors = sum(1 for result in results if result["error"])
+    revoked = sum(1 for result in results if result["cert_status"] == "REVOKED")
+    return {"checked": len(results), "revoked": revoked, "errors": errors, "results": results}, \
+        EXIT_FAILED if errors else EXIT_OK
+
+def cmd_export(args, session):
+    schema = args.schema or guess_schema(args.system)
+    columns = args.columns.split(",") if args.columns else EXPORT_SCHEMAS[schema]["columns"]
+    unknown_filters = [name for name in args.filter if name not in EXPORT_SCHEMAS[schema]["filters"]]
+    if unknown_filters:
+        raise CommandError(f"Unknown filters: {unknown_filters}. Available: {list(EXPORT_SCHEMAS[schema]['filters'])}",
+                           EXIT_USAGE)
+    db = session.open()
+
+    def run(cancel_event):
+        with db.connection(args.system) as conn:
+            return export_tokens(conn, schema, columns, args.filter, args.output, args.format, args.compress,
+                                 cancel_event=cancel_event)
+    rows = run_cancellable(run)
+    return {"rows": rows, "path": os.path.abspath(args.output)}, EXIT_OK
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="cli.py", description="CTS Tool headless batch mode. Prints JSON results.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    def add_system(command):
+        command.add_argument("--system", required=True, help="Config section to connect to (e.g. TMS1, TMS2_CMC)")
+        command.add_argument("--schema", choices=sorted(LOOKUPS), help="TMS schema; guessed from the system name by default")
+
+    def add_ids(command):
+        command.add_argument("--ids", help="Text or CSV file with Token IDs; '-' or nothing reads stdin")
+        command.add_argument("--column", help="ID column of a CSV file (name or 0-based index; with an index, "
+                                              "a first row that is not a valid Token ID is skipped as a header)")
+
+    for name, schemas in BATCH_COMMANDS.items():
+        command = commands.add_parser(name, help=f"Batch {name} ({', '.join(s.upper() for s in schemas)})")
+        add_system(command)
+        add_ids(command)
+        option_names = {option for _, options in schemas.values() for option in options}
+        for option in sorted(option_names):
+            command.add_argument(f"--{option}", help=f"{option.capitalize()} text")
+        command.set_defaults(handler=cmd_batch)
+
+    command = commands.add_parser("jobs", help="List the stored batch jobs of a system")
+    add_system(command)
+    command.add_argument("--limit", type=int, default=20, help="Newest jobs to list")
+    command.set_defaults(handler=cmd_jobs)
+
+    command = commands.add_parser("resume", help="Resume a failed, cancelled or interrupted batch job")
+    add_system(command)
+    command.add_argument("--job", type=int, required=True, help="Job number (see 'jobs')")
+    command.add_argument("--failed-only", action="store_true", help="Only retry the chunks that failed")
+    command.set_defaults(handler=cmd_resume)
+
+    command = commands.add_parser("get-info", help="Look up Token IDs")
+    add_system(command)
+    add_ids(command)
+    command.add_argument("token_ids", nargs="*", help="Token IDs (instead of --ids)")
+    command.set_defaults(handler=cmd_get_info)
+
+    command = commands.add_parser("uninitialize", help="Uninitialize one TMS1 Token ID")
+    command.add_argument("--system", required=True, help="Config section to connect to")
+    command.add_argument("token_id")
+    command.set_defaults(handler=cmd_uninitialize)
+
+    command = commands.add_parser("ocsp", help="Check the OCSP status of certificate files or folders")
+    command.add_argument("paths", nargs="+", help="Certificate files or folders")
+    command.add_argument("--issuer", nargs="*", default=[], help="Issuer certificate files or folders")
+    command.add_argument("--workers", type=int, default=None, help="Concurrent OCSP requests")
+    command.add_argument("--force-refresh", action="store_true", help="Ignore cached OCSP responses")
+    command.add_argument("--csv", help="Also write the results to this CSV file")
+    command.set_defaults(handler=cmd_ocsp)
+
+    command = commands.add_parser("export", help="Export the token table to CSV/JSONL")
+    add_system(command)
+    command.add_argument("--output", required=True, help="Output file")
+    command.add_argument("--columns", help="Comma separated columns (default: all)")
+    command.add_argument("--filter", action="append", default=[], help="Predefined filter name (repeatable)")
+    command.add_argument("--format", choices=EXPORT_FORMATS, default="csv")
+    command.add_argument("--compress", action="store_true", help="gzip the output")
+    command.set_defaults(handler=cmd_export)
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    session = Session(getattr(args, "system", None))
+    output = {"command": args.command, "system": session.section_name}
+    try:
+        result, exit_code = args.handler(args, session)
+        output.update(result)
+    except CommandError as e:
+        output["error"], exit_code = str(e), e.exit_code
+    except (ValueError, FileNotFoundError) as e:
+        output["error"], exit_code = str(e), EXIT_USAGE
+    except Exception as e:
+        output["error"], exit_code = str(e), EXIT_FAILED
+    finally:
+        session.close()
+    output["ok"] = exit_code == EXIT_OK
+    print(json.dumps(output, ensure_ascii=False, indent=2, default=str))
+    return exit_code
+
+if __name__ == "__main__":
+    sys.exit(main())
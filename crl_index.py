@@ -0,0 +1,247 @@
+import os
+import json
+import mmap
+import struct
+import hashlib
+from datetime import timezone, datetime
+from cryptography import x509
+from cryptography.x509.oid import NameOID
+import app_config
+from functions import hex_to_decimal, decimal_to_hex, format_ocsp_time
+
+# One index record: 20-byte big-endian serial, revocation time (unix seconds), reason code.
+SERIAL_SIZE = 20
+RECORD = struct.Struct(f">{SERIAL_SIZE}sqB")
+REASONS = list(x509.ReasonFlags)
+NO_REASON = 255
+
+# lookup() result for serials the index cannot hold: their revocation status is not known
+UNKNOWN = "unknown"
+
+def load_crl(path):
+    """Loads a CRL from a PEM or DER file."""
+    with open(path, "rb") as f:
+        data = f.read()
+    if b"-----BEGIN" in data:
+        return x509.load_pem_x509_crl(data)
+    return x509.load_der_x509_crl(data)
+
+def _extension_value(crl, ext_class):
+    try:
+        return crl.extensions.get_extension_for_class(ext_class).value
+    except x509.ExtensionNotFound:
+        return None
+
+def _timestamp(value):
+    return value.timestamp() if value else None
+
+def _common_name(name):
+    attributes = name.get_attributes_for_oid(NameOID.COMMON_NAME)
+    return attributes[0].value if attributes else name.rfc4514_string()
+
+def _serial_key(serial_number):
+    return serial_number.to_bytes(SERIAL_SIZE, "big")
+
+def _entry_records(crl):
+    """
+    Returns ([(key, record)] of the CRL entries, skipped count). Negative serials and serials wider
+    than SERIAL_SIZE bytes cannot be stored and are skipped; lookup() reports such serials as UNKNOWN.
+    """
+    records, skipped = [], 0
+    for entry in crl:
+        try:
+            records.append((_serial_key(entry.serial_number), _entry_record(entry)))
+        except OverflowError:
+            skipped += 1
+    return records, skipped
+
+def _entry_record(entry):
+    reason = NO_REASON
+    reason_ext = next((ext for ext in entry.extensions if isinstance(ext.value, x509.CRLReason)), None)
+    if reason_ext is not None:
+        reason = REASONS.index(reason_ext.value.reason)
+    return RECORD.pack(_serial_key(entry.serial_number), int(_timestamp(entry.revocation_date_utc)), reason)
+
+def parse_serials(lines, serial_format="hex"):
+    """
+    Parses serial numbers typed as hex (the format shown by the OCSP views) or decimal.
+    Returns a list of (input, serial_number or None).
+    """
+    parsed = []
+    for line in lines:
+        text = line.strip().replace(" ", "").replace(":", "")
+        if not text:
+            continue
+        if serial_format == "hex":
+            value = hex_to_decimal(text[2:] if text.lower().startswith("0x") else text)
+        else:
+            value = int(text) if text.isdigit() else None
+        parsed.append((line.strip(), value))
+    return parsed
+
+class CRLIndex:
+    """
+    Sorted, fixed-width index of the serials revoked by one issuer, stored in `serials.bin` next to
+    a `meta.json` describing the CRL it was built from. Lookups binary-search the memory-mapped file.
+    """
+    def __init__(self, directory):
+        self.directory = directory
+        self.meta_path = os.path.join(directory, "meta.json")
+        self.data_path = os.path.join(directory, "serials.bin")
+        with open(self.meta_path, "r", encoding="utf-8") as f:
+            self.meta = json.load(f)
+
+    @property
+    def count(self):
+        return self.meta["count"]
+
+    def describe(self):
+        next_update = self.meta.get("next_update")
+        stale = " (EXPIRED)" if next_update and next_update < datetime.now(timezone.utc).timestamp() else ""
+        skipped = self.meta.get("skipped", 0)
+        unindexed = f" (+{skipped} not indexable)" if skipped else ""
+        return f"{self.meta['issuer_cn']} - CRL #{self.meta.get('crl_number')} - {self.count} entries{unindexed}{stale}"
+
+    def _records(self):
+        """Yields every stored record as raw bytes, in serial order."""
+        with open(self.data_path, "rb") as f:
+            while True:
+                record = f.read(RECORD.size)
+                if not record:
+                    break
+                yield record
+
+    def lookup(self, serial_numbers):
+        """
+        Returns {serial_number: (revocation_timestamp, reason_name), None if not revoked, or UNKNOWN}
+        for each serial. Serials that cannot be indexed (negative or wider than SERIAL_SIZE bytes)
+        are UNKNOWN: the CRL may have revoked them, but such entries are skipped on import.
+        """
+        results = {serial_number: UNKNOWN for serial_number in serial_numbers
+                   if serial_number < 0 or serial_number.bit_length() > SERIAL_SIZE * 8}
+        serial_numbers = [serial_number for serial_number in serial_numbers if serial_number not in results]
+        if self.count == 0:
+            return dict(results, **dict.fromkeys(serial_numbers))
+        with open(self.data_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            for serial_number in serial_numbers:
+                results[serial_number] = None
+                key = _serial_key(serial_number)
+                low, high = 0, self.count
+                while low < high:
+                    mid = (low + high) // 2
+                    offset = mid * RECORD.size
+                    mid_key = data[offset:offset + SERIAL_SIZE]
+                    if mid_key < key:
+                        low = mid + 1
+                    elif mid_key > key:
+                        high = mid
+                    else:
+                        _, revoked_at, reason = RECORD.unpack_from(data, offset)
+                        results[serial_number] = (revoked_at, REASONS[reason].name if reason != NO_REASON else "")
+                        break
+        return results
+
+class CRLStore:
+    """Manages one CRLIndex per issuer under a cache directory."""
+    def __init__(self, directory=None):
+        self.directory = directory or app_config.CRL_INDEX_DIR
+        os.makedirs(self.directory, exist_ok=True)
+
+    def list_indexes(self):
+        indexes = []
+        for name in sorted(os.listdir(self.directory)):
+            if os.path.exists(os.path.join(self.directory, name, "meta.json")):
+                indexes.append(CRLIndex(os.path.join(self.directory, name)))
+        return indexes
+
+    def _index_dir(self, crl):
+        issuer_hash = hashlib.sha1(crl.issuer.public_bytes()).hexdigest()[:16]
+        return os.path.join(self.directory, issuer_hash)
+
+    def import_crl(self, path):
+        """
+        Loads a full or delta CRL into the index of its issuer and returns (CRLIndex, message).
+        A full CRL replaces the index unless it is older than the indexed one; a delta CRL is merged
+        into an index built from its base CRL (or a newer one).
+        """
+        crl = load_crl(path)
+        crl_number = _extension_value(crl, x509.CRLNumber)
+        crl_number = crl_number.crl_number if crl_number else None
+        delta = _extension_value(crl, x509.DeltaCRLIndicator)
+        directory = self._index_dir(crl)
+        existing = CRLIndex(directory) if os.path.exists(os.path.join(directory, "meta.json")) else None
+        current_number = existing.meta.get("crl_number") if existing else None
+
+        if delta is not None:
+            if crl_number is None:
+                raise ValueError("Delta CRL has no CRL number extension and cannot be ordered against the index.")
+            if existing is None or current_number is None or current_number < delta.crl_number:
+                raise ValueError(f"Delta CRL #{crl_number} needs base CRL #{delta.crl_number} to be loaded first.")
+            if crl_number <= current_number:
+                return existing, f"Index is already at CRL #{current_number}; delta CRL #{crl_number} skipped."
+            records = {record[:SERIAL_SIZE]: record for record in existing._records()}
+            entries, skipped = _entry_records(crl)
+            total_skipped = existing.meta.get("skipped", 0) + skipped
+            for key, record in entries:
+                if RECORD.unpack(record)[2] == REASONS.index(x509.ReasonFlags.remove_from_crl):
+                    records.pop(key, None)
+                else:
+                    records[key] = record
+            action = "merged delta CRL"
+        else:
+            if existing is not None and current_number is not None and crl_number is not None and crl_number <= current_number:
+                return existing, f"Index is already at CRL #{current_number}; CRL #{crl_number} skipped."
+            entries, skipped = _entry_records(crl)
+            total_skipped = skipped
+            records = dict(entries)
+            action = "built from full CRL"
+
+        os.makedirs(directory, exist_ok=True)
+        data_path = os.path.join(directory, "serials.bin")
+        with open(data_path + ".tmp", "wb") as f:
+            for key in sorted(records):
+                f.write(records[key])
+        os.replace(data_path + ".tmp", data_path)
+        meta = {
+            "issuer": crl.issuer.rfc4514_string(),
+            "issuer_cn": _common_name(crl.issuer),
+            "crl_number": crl_number,
+            "this_update": _timestamp(crl.last_update_utc),
+            "next_update": _timestamp(crl.next_update_utc),
+            "count": len(records),
+            "skipped": total_skipped,
+            "source": os.path.abspath(path),
+        }
+        with open(os.path.join(directory, "meta.json.tmp"), "w", encoding="utf-8") as f:
+            json.dump(meta, f, indent=2)
+        os.replace(os.path.join(directory, "meta.json.tmp"), os.path.join(directory, "meta.json"))
+        index = CRLIndex(directory)
+        note = (f" ({skipped} entries with serials that do not fit {SERIAL_SIZE} bytes could not be indexed; "
+                f"lookups of such serials report UNKNOWN)" if skipped else "")
+        return index, f"Index {action}: {index.describe()}{note}"
+
+def check_serials(index, lines, serial_format="hex"):
+    """
+    Checks typed serial numbers against a CRL index.
+    Returns a list of dicts with input, serial (hex), status (REVOKED / NOT REVOKED / UNKNOWN /
+    INVALID), revocation_time and reason. UNKNOWN serials cannot be held by the index.
+    """
+    parsed = parse_serials(lines, serial_format)
+    found = index.lookup([value for _, value in parsed if value is not None])
+    results = []
+    for text, value in parsed:
+        result = {"input": text, "serial": decimal_to_hex(value) or "", "status": "INVALID",
+                  "revocation_time": "", "reason": ""}
+        if value is not None:
+            hit = found.get(value)
+            if hit is None:
+                result["status"] = "NOT REVOKED"
+            elif hit == UNKNOWN:
+                result["status"] = "UNKNOWN"
+            else:
+                revoked_at, reason = hit
+                result["status"] = "REVOKED"
+                result["revocation_time"] = format_ocsp_time(datetime.fromtimestamp(revoked_at, timezone.utc).replace(tzinfo=None))
+                result["reason"] = reason
+        results.append(result)
+    return results
@@ -1,8 +1,16 @@
 import configparser
+import logging
 import time
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from contextlib import contextmanager
 import mysql.connector
+from mysql.connector import pooling
 import os
 import base64
+import app_config
+from write_governor import configure_governor
 from cryptography.fernet import Fernet
 from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
@@ -10,6 +18,9 @@ from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
 ENCRYPTED_CONFIG_FILE = 'config.encrypted'
 SALT_SIZE = 16
 
+# Diagnostics only; never printed, since the CLI writes JSON to stdout
+logger = logging.getLogger("cts.database")
+
 def derive_key(password: bytes, salt: bytes) -> bytes:
     """Derives a cryptographic key from a password and salt."""
     kdf = PBKDF2HMAC(
@@ -20,67 +31,291 @@ def derive_key(password: bytes, salt: bytes) -> bytes:
     )
     return base64.urlsafe_b64encode(kdf.derive(password))
 
-def get_database_config(section_name, password_str: str):
+class ConfigVault:
     """
-    Reads the encrypted config file, decrypts it in memory using the provided password,
-    and returns the configuration for the requested section.
+    Holds the decrypted config for the session so systems can be switched without deriving the key
+    again. The plaintext is kept in a bytearray and only parsed on demand; wipe() overwrites it.
     """
-    if not password_str:
-        raise ValueError("Password is required to decrypt configuration.")
+    def __init__(self, plaintext: bytearray):
+        self._plaintext = plaintext
 
-    if not os.path.exists(ENCRYPTED_CONFIG_FILE):
-        raise FileNotFoundError(
-            f"The encrypted config file '{ENCRYPTED_CONFIG_FILE}' was not found. "
-            f"Please run encrypt_config.py to create it."
-        )
+    @classmethod
+    def unlock(cls, password_str: str):
+        """
+        Reads the encrypted config file and decrypts it in memory using the provided password.
+        Raises ValueError for a missing password, FileNotFoundError for a missing file and Exception
+        if decryption fails.
+        """
+        if not password_str:
+            raise ValueError("Password is required to decrypt configuration.")
 
-    try:
-        # 1. Read the salt and the encrypted data
-        with open(ENCRYPTED_CONFIG_FILE, 'rb') as f:
-            salt = f.read(SALT_SIZE)
-            encrypted_data = f.read()
-        
-        # 2. Derive the key from the provided password and the salt
-        key = derive_key(password_str.encode('utf-8'), salt)
-        
-        # 3. Decrypt the data
-        f = Fernet(key)
-        decrypted_data = f.decrypt(encrypted_data)
-        
-        # 4. Parse the decrypted data (which is in INI format)
+        if not os.path.exists(ENCRYPTED_CONFIG_FILE):
+            raise FileNotFoundError(
+                f"The encrypted config file '{ENCRYPTED_CONFIG_FILE}' was not found. "
+                f"Please run encrypt_config.py to create it."
+            )
+
+        try:
+            # 1. Read the salt and the encrypted data
+            with open(ENCRYPTED_CONFIG_FILE, 'rb') as f:
+                salt = f.read(SALT_SIZE)
+                encrypted_data = f.read()
+
+            # 2. Derive the key from the provided password and the salt
+            key = derive_key(password_str.encode('utf-8'), salt)
+
+            # 3. Decrypt the data into a buffer that can be overwritten later
+            plaintext = bytearray(Fernet(key).decrypt(encrypted_data))
+            vault = cls(plaintext)
+            vault._parse()
+            return vault
+        except Exception as e:
+            # This can happen if the password is wrong, the file is corrupt, etc.
+            raise Exception(f"Failed to decrypt or parse config file. Check password or file integrity. Error: {e}")
+
+    def _parse(self):
+        if self._plaintext is None:
+            raise RuntimeError("The configuration has been wiped.")
         config = configparser.ConfigParser()
-        config.read_string(decrypted_data.decode('utf-8'))
-        
-        return config[section_name]
+        config.read_string(self._plaintext.decode('utf-8'))
+        return config
 
-    except FileNotFoundError:
-        raise
-    except Exception as e:
-        # This can happen if the password is wrong, the file is corrupt, etc.
-        raise Exception(f"Failed to decrypt or parse config file. Check password or file integrity. Error: {e}")
+    def sections(self):
+        return self._parse().sections()
 
+    def get_section(self, section_name):
+        """Returns the connection settings of a section as a dict."""
+        config = self._parse()
+        if not config.has_section(section_name):
+            raise ValueError(f"System '{section_name}' was not found in the configuration.")
+        return dict(config[section_name])
+
+    def get_endpoints(self, section_name):
+        """
+        Returns every endpoint a section can be reached at, as connection dicts with a "name".
+        `host` may list several hosts (comma separated, optionally host:port), and `failover` may
+        name other sections (e.g. the internal CMC host) that hold the same database with their
+        own credentials.
+        """
+        config = self._parse()
+        endpoints = []
+        failover = [name.strip() for name in self.get_section(section_name).get("failover", "").split(",")]
+        for name in dict.fromkeys([section_name] + [name for name in failover if name]):
+            if not config.has_section(name):
+                raise ValueError(f"Failover system '{name}' of '{section_name}' was not found in the configuration.")
+            settings = dict(config[name])
+            for host in [h.strip() for h in settings["host"].split(",") if h.strip()]:
+                host, _, port = host.partition(":")
+                endpoints.append(dict(settings, host=host, port=int(port or settings.get("port", 3306)),
+                                      name=f"{name} ({host})"))
+        return endpoints
+
+    def wipe(self):
+        """Overwrites the decrypted config. Strings already handed out cannot be wiped in Python."""
+        if self._plaintext is not None:
+            self._plaintext[:] = bytes(len(self._plaintext))
+            self._plaintext = None
+
+def probe_endpoint(endpoint, timeout=None):
+    """Opens and pings a connection to one endpoint with a short timeout. Returns the round trip in seconds."""
+    started = time.perf_counter()
+    conn = mysql.connector.connect(host=endpoint["host"], port=endpoint.get("port", 3306), user=endpoint["user"],
+                                   password=endpoint["password"], database=endpoint["database"],
+                                   connection_timeout=timeout or app_config.DB_ENDPOINT_CONNECT_TIMEOUT)
+    try:
+        conn.ping()
+        return time.perf_counter() - started
+    finally:
+        conn.close()
+
+def race_endpoints(endpoints, timeout=None, selection=None):
+    """
+    Probes all endpoints in parallel and returns (endpoint, rtt) of the first one to answer, or
+    with selection="rtt" of the fastest one among those that answered within the timeout.
+    Raises the last mysql.connector.Error if none could be reached.
+    """
+    if not endpoints:
+        raise ValueError("No database endpoints are configured.")
+    selection = selection or app_config.DB_ENDPOINT_SELECTION
+    pool = ThreadPoolExecutor(max_workers=len(endpoints), thread_name_prefix="cts-connect")
+    futures = {pool.submit(probe_endpoint, endpoint, timeout): endpoint for endpoint in endpoints}
+    answered, error = [], None
+    try:
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    answered.append((futures[future], future.result()))
+                except mysql.connector.Error as e:
+                    error = e
+            if answered and selection != "rtt":
+                break
+    finally:
+        # Slower probes finish (and close their connections) in the background
+        pool.shutdown(wait=False)
+    if not answered:
+        raise error
+    return min(answered, key=lambda item: item[1])
 
-def connect_to_database(config, max_retries=3, retry_delay=5):
+class ConnectionManager:
     """
-    Connects to the database using the provided configuration dictionary.
+    Keeps one bounded connection pool per config section. Connections are validated (pinged,
+    reconnected if stale) when borrowed, and idle connections are pinged periodically so they
+    do not hit the server's wait_timeout.
     """
-    retries = 0
-    conn = None
-    host = config["host"]
-    user = config["user"]
-    password = config["password"]
-    database = config["database"]
-
-    while retries < max_retries:
+    def __init__(self, pool_size=None, keepalive_interval=None):
+        self.pool_size = pool_size or app_config.DB_POOL_SIZE
+        self.keepalive_interval = keepalive_interval or app_config.DB_KEEPALIVE_INTERVAL
+        self._pools = {}
+        self._slots = {}
+        self.endpoints = {}  # section -> name of the endpoint its pool was opened on
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._keepalive_thread = threading.Thread(target=self._keepalive_loop, name="cts-db-keepalive", daemon=True)
+        self._keepalive_thread.start()
+
+    def add_section(self, section_name, config):
+        """Creates the pool for a section. Raises mysql.connector.Error if the server cannot be reached."""
+        with self._lock:
+            if section_name in self._pools:
+                return
+        pool = pooling.MySQLConnectionPool(
+            pool_name="cts." + re.sub(r"[^a-zA-Z0-9._:\-]", "_", section_name),
+            pool_size=self.pool_size,
+            host=config["host"],
+            port=int(config.get("port", 3306)),
+            user=config["user"],
+            password=config["password"],
+            database=config["database"],
+            connection_timeout=app_config.DB_CONNECT_TIMEOUT,
+            # Keep the session on return to the pool: a reset would drop the cached prepared statements
+            pool_reset_session=False,
+        )
+        with self._lock:
+            self._pools[section_name] = pool
+            self._slots[section_name] = threading.BoundedSemaphore(self.pool_size)
+
+    def connect_section(self, section_name, endpoints, cancel_event=None, status_callback=None):
+        """
+        Opens the pool of a section on the first of its endpoints to answer (see race_endpoints).
+        Rounds in which no endpoint answers are retried with exponential backoff, waiting on
+        cancel_event rather than sleeping. `status_callback(message)` receives progress messages.
+        Also sets up the section's write governor from its write_<name> keys (ValueError if invalid).
+        Returns the endpoint used; raises mysql.connector.Error when every attempt failed or was cancelled.
+        """
+        def report(message):
+            if status_callback:
+                status_callback(message)
+
+        configure_governor(section_name, endpoints[0])
+        attempts = app_config.DB_CONNECT_ATTEMPTS
+        for attempt in range(1, attempts + 1):
+            report(f"Connecting to {section_name} ({len(endpoints)} endpoint(s), attempt {attempt}/{attempts})...")
+            try:
+                endpoint, rtt = race_endpoints(endpoints)
+                self.add_section(section_name, endpoint)
+                self.endpoints[section_name] = endpoint["name"]
+                report(f"Connected via {endpoint['name']} in {rtt * 1000:.0f} ms")
+                return endpoint
+            except mysql.connector.Error as e:
+                if attempt == attempts:
+                    raise
+                delay = min(app_config.DB_CONNECT_BACKOFF * 2 ** (attempt - 1), app_config.DB_CONNECT_BACKOFF_MAX)
+                report(f"No endpoint of {section_name} answered ({e}). Retrying in {delay:g}s...")
+                if cancel_event is None:
+                    time.sleep(delay)
+                elif cancel_event.wait(delay):
+                    raise mysql.connector.Error(msg="Connection attempt cancelled.")
+
+    def has_section(self, section_name):
+        return section_name in self._pools
+
+    def _borrow(self, section_name, blocking=True):
+        slots = self._slots[section_name]
+        if not slots.acquire(blocking=blocking):
+            return None
+        try:
+            conn = self._pools[section_name].get_connection()
+            # Validate on borrow: a connection idle past wait_timeout is transparently reopened
+            conn.ping(reconnect=True, attempts=2, delay=0)
+            return conn
+        except Exception:
+            slots.release()
+            raise
+
+    def _release(self, section_name, conn):
+        try:
+            # Sessions are not reset on return (pool_reset_session=False), so end the borrower's
+            # transaction here: the next borrower would otherwise read from its REPEATABLE READ
+            # snapshot, and the metadata locks it holds on the token tables would stay taken
+            try:
+                conn.rollback()
+            except mysql.connector.Error as e:
+                logger.warning("Rollback on release of a %s connection failed: %s", section_name, e)
+            conn.close()  # returns the connection to its pool
+        finally:
+            self._slots[section_name].release()
+
+    @contextmanager
+    def connection(self, section_name):
+        """Borrows a validated connection for the duration of the with-block, waiting if the pool is exhausted."""
+        conn = self._borrow(section_name)
+        try:
+            yield conn
+        finally:
+            self._release(section_name, conn)
+
+    @contextmanager
+    def connections(self, section_name, count):
+        """
+        Borrows one connection (waiting if needed) plus up to count - 1 more that are free right now.
+        Used to spread batch chunks over several connections without starving other operations.
+        """
+        borrowed = [self._borrow(section_name)]
+        try:
+            while len(borrowed) < count:
+                conn = self._borrow(section_name, blocking=False)
+                if conn is None:
+                    break
+                borrowed.append(conn)
+            yield borrowed
+        finally:
+            for conn in borrowed:
+                self._release(section_name, conn)
+
+    def _keepalive_loop(self):
+        while not self._stop_event.wait(self.keepalive_interval):
+            for section_name in list(self._pools):
+                self.ping_idle(section_name)
+
+    def ping_idle(self, section_name):
+        """Pings every connection currently idle in the section's pool; busy ones are skipped."""
+        borrowed = []
         try:
-            conn = mysql.connector.connect(host=host, user=user, password=password, database=database)
-            if conn.is_connected():
-                print("Connected to the database!")
-                return conn
+            while True:
+                conn = self._borrow(section_name, blocking=False)
+                if conn is None:
+                    break
+                borrowed.append(conn)
         except mysql.connector.Error as e:
-            print(f"Failed to connect to the database: {e}")
-            retries += 1
-            time.sleep(retry_delay)
+            logger.warning("Keepalive ping failed for %s: %s", section_name, e)
+        finally:
+            for conn in borrowed:
+                self._release(section_name, conn)
 
-    print(f"Unable to connect to the database after {max_retries} retries.")
-    return None
+    def close(self):
+        """Stops the keepalive thread and closes all idle pooled connections."""
+        self._stop_event.set()
+        for section_name, pool in list(self._pools.items()):
+            # Take every idle connection out of the pool and disconnect it instead of returning it
+            while self._slots[section_name].acquire(blocking=False):
+                try:
+                    conn = pool.get_connection()
+                except mysql.connector.PoolError:
+                    break
+                try:
+                    conn.disconnect()
+                except mysql.connector.Error as e:
+                    logger.debug("Closing a connection of %s failed: %s", section_name, e)
+        self._pools.clear()
@@ -0,0 +1,98 @@
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+POLL_INTERVAL_MS = 100
+
+class Task:
+    """A unit of background work. Handed to the worker function so it can report progress and check for cancellation."""
+    def __init__(self, key, on_success=None, on_error=None, on_progress=None):
+        self.key = key
+        self.cancel_event = threading.Event()
+        self.on_success = on_success
+        self.on_error = on_error
+        self.on_progress = on_progress
+        self._results = None
+
+    def report_progress(self, *args):
+        """Thread-safe: queues a progress update to be delivered on the Tk thread."""
+        if self.on_progress:
+            self._results.put(("progress", self, args))
+
+    def cancel(self):
+        self.cancel_event.set()
+
+class BackgroundExecutor:
+    """
+    Runs blocking operations (DB queries, OCSP requests) on a thread pool and delivers their
+    results back on the Tk main loop by polling a result queue with `after()`.
+    Only one task per key may be in flight at a time.
+    """
+    def __init__(self, root, max_workers=4):
+        self.root = root
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="cts-worker")
+        self._results = queue.Queue()
+        self._running = {}
+        self._closed = False
+        self._poll_id = self.root.after(POLL_INTERVAL_MS, self._poll)
+
+    def is_busy(self, key):
+        return key in self._running
+
+    def has_running(self):
+        return bool(self._running)
+
+    def submit(self, key, func, on_success=None, on_error=None, on_progress=None):
+        """
+        Runs func(task) on a worker thread. Callbacks are invoked on the Tk thread.
+        Returns the Task, or None if a task with the same key is still running.
+        """
+        if self._closed or self.is_busy(key):
+            return None
+        task = Task(key, on_success, on_error, on_progress)
+        task._results = self._results
+        self._running[key] = task
+
+        def run():
+            try:
+                self._results.put(("done", task, func(task)))
+            except Exception as e:
+                self._results.put(("error", task, e))
+
+        self._pool.submit(run)
+        return task
+
+    def cancel(self, key):
+        task = self._running.get(key)
+        if task:
+            task.cancel()
+
+    def _poll(self):
+        try:
+            while True:
+                kind, task, payload = self._results.get_nowait()
+                if kind == "progress":
+                    task.on_progress(*payload)
+                    continue
+                self._running.pop(task.key, None)
+                if kind == "done" and task.on_success:
+                    task.on_success(payload)
+                elif kind == "error" and task.on_error:
+                    task.on_error(payload)
+        except queue.Empty:
+            pass
+        finally:
+            # Reschedule even if a callback raised, otherwise every later task would hang
+            if not self._closed:
+                self._poll_id = self.root.after(POLL_INTERVAL_MS, self._poll)
+
+    def shutdown(self):
+        """Cancels running tasks and stops the worker pool without waiting for in-flight calls."""
+        self._closed = True
+        for task in self._running.values():
+            task.cancel()
+        try:
+            self.root.after_cancel(self._poll_id)
+        except Exception:
+            pass
+        self._pool.shutdown(wait=False, cancel_futures=True)
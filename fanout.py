@@ -0,0 +1,59 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import app_config
+from batch_writer import BatchError, BatchCancelled
+from functions import setup_logging
+from token_export import guess_schema
+
+def compatible_sections(section_names, schema):
+    """Returns the config sections that hold the given TMS schema (TMS1, TMS1_CMC, localtms1 -> tms1)."""
+    return [name for name in section_names if guess_schema(name) == schema]
+
+def run_batch_on_sections(db_manager, vault, sections, batch_func, args, progress_callback=None, cancel_event=None):
+    """
+    Runs the same batch function (block_tms1, notifications_tms2, ...) against several sections in parallel.
+
+    Missing pools are opened from the decrypted config, every section writes its own log, and a
+    failure in one section does not stop the others. `progress_callback(done, total, affected)` gets
+    the chunk counts summed over all sections.
+    Returns a list of dicts with section, affected and error (None on success), in the given order.
+    """
+    lock = threading.Lock()
+    progress = {section: (0, 0, 0) for section in sections}
+
+    def report(section, done, total, affected):
+        with lock:
+            progress[section] = (done, total, affected or 0)
+            sums = [sum(values) for values in zip(*progress.values())]
+        if progress_callback:
+            progress_callback(*sums)
+
+    def run_one(section):
+        result = {"section": section, "affected": 0, "error": None}
+        try:
+            if not db_manager.has_section(section):
+                db_manager.connect_section(section, vault.get_endpoints(section), cancel_event)
+            with db_manager.connections(section, app_config.BATCH_CONNECTIONS) as conns:
+                result["affected"] = batch_func(conns, *args, setup_logging(section),
+                                                progress_callback=lambda *p: report(section, *p),
+                                                cancel_event=cancel_event)
+        except BatchError as e:
+            # Cancelled or failed part-way: the committed chunks stay applied
+            result["affected"] = e.affected_rows
+            result["error"] = "Cancelled" if isinstance(e, BatchCancelled) else str(e)
+        except Exception as e:
+            result["error"] = str(e)
+        return result
+
+    with ThreadPoolExecutor(max_workers=max(1, len(sections)), thread_name_prefix="cts-fanout") as pool:
+        return list(pool.map(run_one, sections))
+
+def format_section_results(results):
+    """One line per section, e.g. 'TMS1_CMC: 120 records updated' or 'TMS1: FAILED after 40 records - ...'."""
+    lines = []
+    for result in results:
+        if result["error"] is None:
+            lines.append(f"{result['section']}: {result['affected']} records updated")
+        else:
+            lines.append(f"{result['section']}: FAILED after {result['affected']} records - {result['error']}")
+    return "\n".join(lines)
@@ -1,31 +1,16 @@
-import os
-import subprocess
-import sys
 import time
-import mysql.connector
-import logging
-import tkinter as tk
-from tkinter import messagebox
-import requests
-from datetime import datetime, timezone, timedelta
-from cryptography.hazmat.primitives.hashes import SHA256, SHA1
-from cryptography.hazmat.primitives.serialization import Encoding
-from cryptography.hazmat.primitives import hashes, serialization
-from cryptography.hazmat.primitives.asymmetric import padding as asymmetric_padding
-from cryptography.x509 import load_pem_x509_certificate, ocsp, ExtensionOID, AuthorityInformationAccessOID, oid
-from cryptography.x509.oid import AuthorityInformationAccessOID, ExtendedKeyUsageOID
-from cryptography.x509.ocsp import OCSPRequestBuilder, OCSPCertStatus, OCSPResponseStatus, load_der_ocsp_response
+from datetime import timedelta
+from batch_writer import run_batch_update, BatchError, BatchCancelled
+from audit_log import get_audit_logger, log_operation
+from repository import TMS1Repository, TMS2Repository
+from token_cache import token_info_cache
+from metrics import timed
+from undo_journal import get_undo_journal
+from job_store import get_job_store
+from write_governor import get_governor
 
 # --- Helper Functions ---
 
-def get_text_data(text_widget):
-    """Gets multiline text from a Text widget and returns it as a list of strings."""
-    return text_widget.get("1.0", tk.END).strip().split('\n')
-
-def get_text_single(text_widget):
-    """Gets all text from a Text widget and returns it as a single stripped string."""
-    return text_widget.get("1.0", tk.END).strip()
-
 def hex_to_decimal(hex_string):
     """Converts a single hex string to a decimal integer."""
     try:
@@ -40,27 +25,12 @@ def decimal_to_hex(decimal_number):
     except (ValueError, TypeError):
         return None
 
-def setup_logging(section_name, base_log_dir="log"):
-    """Sets up logging to a file in a structured directory like log/YYYY/MM/section.log."""
-    now = datetime.now()
-    year = now.strftime("%Y")
-    month = now.strftime("%m")
-
-    log_dir = os.path.join(base_log_dir, year, month)
-    os.makedirs(log_dir, exist_ok=True)
-
-    log_file = os.path.join(log_dir, f"{section_name}.log")
-    formatter = logging.Formatter("%(asctime)s - %(levelname)s - %(message)s")
-    file_handler = logging.FileHandler(log_file, mode="a", encoding="utf-8")
-    file_handler.setLevel(logging.INFO)
-    file_handler.setFormatter(formatter)
-
-    logger = logging.getLogger(section_name)
-    if not logger.handlers:
-        logger.setLevel(logging.INFO)
-        logger.addHandler(file_handler)
-        logger.propagate = False
-    return logger
+def setup_logging(section_name, base_log_dir=None):
+    """
+    Returns the section's audit logger. Records are written as JSONL to log/YYYY/MM/section.jsonl
+    by a background listener, rolling over with the month of each record.
+    """
+    return get_audit_logger(section_name, base_log_dir)
 
 def extract_common_name(subject):
     """Extracts the Common Name (CN) from a certificate subject string."""
@@ -76,313 +46,243 @@ def extract_uid(subject):
     except IndexError:
         return "N/A"
 
-# --- OCSP Functions ---
-
-def check_certificate_status(cert_path, issuer_path, result_text):
-    """Performs an OCSP check for the given certificate."""
-    if not cert_path or not issuer_path:
-        messagebox.showwarning("Warning", "Please select both a certificate and an issuer file.")
-        return
+def find_missing_ids(token_ids, rows):
+    """Returns the IDs (in input order, without duplicates) that have no row; the ID must be the first column."""
+    found = {str(row[0]) for row in rows}
+    return [token_id for token_id in dict.fromkeys(token_ids) if token_id not in found]
+
+def run_token_batch(conn, repository, update_name, params, token_hid, logger, log_action, progress_callback=None,
+                    cancel_event=None):
+    """
+    Runs a named chunked batch UPDATE of a repository as a new job of the batch job store (see
+    run_batch_job) and logs the affected Token IDs. Returns the number of updated records.
+    """
+    note = " | ".join(str(param) for param in params if param)
+    job_id = get_job_store().create(logger.name, repository, update_name, log_action, params, token_hid, note)
+    return run_batch_job(conn, repository, job_id, logger, progress_callback, cancel_event)
+
+def run_batch_job(conn, repository, job_id, logger, progress_callback=None, cancel_event=None, failed_only=False):
+    """
+    Runs the chunks of a stored batch job that were not committed yet (or only its failed chunks),
+    checkpointing every chunk in the job store. The values each chunk overwrites are read in its
+    transaction and saved in the undo journal (under the logger's section). The named updates set
+    fixed values, so a chunk that committed just before an interruption can safely run again.
+    Raises ValueError if the job is still running in another session.
+    Returns the number of updated records; on failure or cancellation the committed part is logged
+    and the BatchError is re-raised.
+    """
+    store = get_job_store()
+    job = store.job(job_id)
+    if job is None:
+        raise ValueError(f"Batch job #{job_id} no longer exists.")
+    if (job["section"], job["table_name"]) != (logger.name, repository.table):
+        raise ValueError(f"Batch job #{job_id} belongs to {job['section']} ({job['table_name']}).")
+    if job["status"] == "running":
+        raise ValueError(f"Batch job #{job_id} is still running in another session.")
+    store.start(job_id)  # read the chunks only once this run owns the job
+    chunks = store.chunks_to_run(job_id, failed_only)
+    if not chunks:
+        store.finish(job_id, job["status"], job["error"])
+        raise ValueError(f"Batch job #{job_id} has no {'failed' if failed_only else 'remaining'} chunks to run.")
+    token_hid = [token_id for _, chunk in chunks for token_id in chunk]
+    log_action, params, note = job["operation"], tuple(job["params"]), job["note"]
+
+    def checkpoint(position, affected, error):
+        store.checkpoint(job_id, chunks[position][0], affected, error)
+
+    started = time.perf_counter()
+    columns = repository.updated_columns(job["update_name"])
+    journal = get_undo_journal()
+    journal_id = journal.begin(logger.name, repository, columns, log_action, len(token_hid), note)
     try:
-        with open(cert_path, "rb") as cert_file, open(issuer_path, "rb") as issuer_file:
-            pem_cert = cert_file.read()
-            pem_issuer = issuer_file.read()
-
-        cert = load_pem_x509_certificate(pem_cert)
-        issuer = load_pem_x509_certificate(pem_issuer)
-
-        def get_ocsp_server(cert):
-            try:
-                aia = cert.extensions.get_extension_for_oid(ExtensionOID.AUTHORITY_INFORMATION_ACCESS).value
-                ocsps = [ia for ia in aia if ia.access_method == AuthorityInformationAccessOID.OCSP]
-                if not ocsps:
-                    raise ValueError('No OCSP server entry in AIA')
-                return ocsps[0].access_location.value
-            except Exception as e:
-                raise ValueError(f"Failed to extract OCSP URL: {e}")
-
-        builder = OCSPRequestBuilder().add_certificate(cert, issuer, hashes.SHA1()) # Using SHA1 as per original code
-        req = builder.build()
-        ocsp_server_url = get_ocsp_server(cert)
-
-        response = requests.post(
-            ocsp_server_url,
-            data=req.public_bytes(serialization.Encoding.DER),
-            headers={'Content-Type': 'application/ocsp-request'},
-            timeout=10
-        )
-        response.raise_for_status()
-
-        ocsp_resp = load_der_ocsp_response(response.content)
-        result_lines = ["----- OCSP Responder -----"]
-        result_lines.append(f"Response Status: {ocsp_resp.response_status.name}")
-        
-        if ocsp_resp.response_status == OCSPResponseStatus.SUCCESSFUL:
-            cert_status = ocsp_resp.certificate_status
-            result_lines.append(f"Certificate Status: {cert_status.name if cert_status else 'UNKNOWN'}")
-            
-            if cert_status == OCSPCertStatus.REVOKED:
-                revocation_time = ocsp_resp.revocation_time + timedelta(hours=7)
-                result_lines.append(f"Revocation Time: {revocation_time.strftime('%Y-%m-%d %H:%M:%S')}")
-                if ocsp_resp.revocation_reason:
-                    result_lines.append(f"Revocation Reason: {ocsp_resp.revocation_reason.name}")
-
-            this_update = ocsp_resp.this_update + timedelta(hours=7)
-            result_lines.append(f"This Update: {this_update.strftime('%Y-%m-%d %H:%M:%S')}")
-            result_lines.append(f"OCSP URI: {ocsp_server_url}")
-        
-        result_lines.append("\n----- Certificate Information -----")
-        result_lines.append(f"Subject: {extract_common_name(str(cert.subject))}") 
-        result_lines.append(f"UID: {extract_uid(str(cert.subject))}")  
-        result_lines.append(f"Serial Number: {decimal_to_hex(cert.serial_number)}")  
-        result_lines.append(f"Valid from: {cert.not_valid_before.strftime('%Y-%m-%d %H:%M:%S')}")
-        result_lines.append(f"Valid to: {cert.not_valid_after.strftime('%Y-%m-%d %H:%M:%S')}")
+        # The stored chunks keep the job's chunk size, so chunk positions map back to stored chunks
+        affected = run_batch_update(conn, repository.update_sql(job["update_name"]), params, token_hid,
+                                    chunk_size=job["chunk_size"], progress_callback=progress_callback,
+                                    cancel_event=cancel_event, checkpoint_callback=checkpoint,
+                                    governor=get_governor(logger.name), snapshot_sql=repository.snapshot_sql(columns),
+                                    snapshot_callback=lambda position, rows: journal.add_rows(journal_id, rows))
+    except BatchError as e:
+        status = "cancelled" if isinstance(e, BatchCancelled) else "failed"
+        store.finish(job_id, status, str(e))
+        journal.finish(journal_id, "cancelled" if status == "cancelled" else "partial", e.affected_rows)
+        token_info_cache.invalidate(e.committed_ids)
+        if e.committed_ids:
+            log_operation(logger, log_action, e.committed_ids, e.affected_rows, time.perf_counter() - started,
+                          status="cancelled" if status == "cancelled" else "partial", error=str(e), note=note)
+        raise
+    except Exception as e:
+        store.finish(job_id, "failed", str(e))
+        raise
+    store.finish(job_id, "pending")  # "done" unless a failed-only retry left chunks that never ran
+    journal.finish(journal_id, "ok", affected)
+    token_info_cache.invalidate(token_hid)
+    log_operation(logger, log_action, token_hid, affected, time.perf_counter() - started, note=note)
+    return affected
+
+@timed("resume_batch_job")
+def resume_batch_job(conn, repository, job_id, logger, failed_only=False, progress_callback=None, cancel_event=None):
+    """Resumes a stored batch job from its uncommitted chunks, or retries its failed chunks only."""
+    return run_batch_job(conn, repository, job_id, logger, progress_callback, cancel_event, failed_only)
+
+@timed("undo_batch")
+def undo_batch(conn, repository, operation_id, logger, progress_callback=None, cancel_event=None):
+    """
+    Restores the values a journaled batch operation overwrote, with chunked set-based updates.
+    Returns the number of restored records.
+    """
+    started = time.perf_counter()
+    try:
+        operation, token_ids, restored = get_undo_journal().undo(conn, operation_id, logger.name, repository,
+                                                                progress_callback, cancel_event)
+    except BatchError as e:
+        token_info_cache.invalidate(e.committed_ids)
+        if e.committed_ids:
+            log_operation(logger, f"Undo #{operation_id}", e.committed_ids, e.affected_rows,
+                          time.perf_counter() - started, status="partial", error=str(e))
+        raise
+    token_info_cache.invalidate(token_ids)
+    log_operation(logger, f"Undo {operation}", token_ids, restored, time.perf_counter() - started,
+                  note=f"undo journal #{operation_id}")
+    return restored
 
-        result_str = "\n".join(result_lines)
-        result_text.config(state=tk.NORMAL)
-        result_text.delete(1.0, tk.END)
-        result_text.insert(tk.END, result_str)
-        result_text.config(state=tk.DISABLED)
+# --- OCSP Functions ---
 
-    except Exception as e:
-        messagebox.showerror("Error", f"An error occurred during OCSP check: {e}")
+def format_ocsp_time(value):
+    """Formats an OCSP/certificate timestamp in local time (UTC+7) as used throughout the tool."""
+    return (value + timedelta(hours=7)).strftime('%Y-%m-%d %H:%M:%S') if value else ""
 
 #-----TMS1 Functions-----
-def get_info_TMS1(conn, tokenid, get_result_text):
+@timed("get_info_tms1")
+def get_info_TMS1(conn, tokenid):
+    """Returns the formatted TMS1 info for a Token ID, or None if it was not found."""
     if not tokenid:
-        messagebox.showwarning("Warning", "Please enter a Token ID.")
-        return
-    try:
-        cursor = conn.cursor()
-        query = "SELECT isPushNotice, MST, SubjectName, NoticeInfo, IsBlock, IsUnblock FROM token WHERE TokenID = %s;"
-        cursor.execute(query, (tokenid,))
-        results = cursor.fetchall()
-        if results:
-            result_str = ""
-            for row in results:
-                isPushNotice, MST, SubjectName, NoticeInfo, IsBlock, IsUnblock = row
-                result_str += f"Token ID: {tokenid}\n"
-                result_str += f"MST: {MST}\n"
-                result_str += f"Tên công ty: {SubjectName}\n"
-                result_str += f"IsUnblock: {IsUnblock}\n"
-                result_str += f"Trạng thái thông báo: {'ON' if isPushNotice == 1 else 'OFF'}\n"
-                result_str += f"Trạng thái khóa: {'ON' if IsBlock == 1 else 'OFF'}\n"
-                result_str += f"Câu thông báo:\n{NoticeInfo}\n"
-                
-            get_result_text.config(state=tk.NORMAL)
-            get_result_text.delete(1.0, tk.END)
-            get_result_text.insert(tk.END, result_str)
-            get_result_text.config(state=tk.DISABLED)
-        else:
-            messagebox.showinfo("Thông báo", "Không tìm thấy Token ID đã nhập.")       
-        cursor.close()
-    except mysql.connector.Error as e:
-        messagebox.showerror("Database Error", str(e))
+        raise ValueError("Please enter a Token ID.")
+    results = TMS1Repository(conn).get_info(tokenid)
+    if not results:
+        return None
+    result_str = ""
+    for row in results:
+        isPushNotice, MST, SubjectName, NoticeInfo, IsBlock, IsUnblock = row
+        result_str += f"Token ID: {tokenid}\n"
+        result_str += f"MST: {MST}\n"
+        result_str += f"Tên công ty: {SubjectName}\n"
+        result_str += f"IsUnblock: {IsUnblock}\n"
+        result_str += f"Trạng thái thông báo: {'ON' if isPushNotice == 1 else 'OFF'}\n"
+        result_str += f"Trạng thái khóa: {'ON' if IsBlock == 1 else 'OFF'}\n"
+        result_str += f"Câu thông báo:\n{NoticeInfo}\n"
+    return result_str
+
+TMS1_LOOKUP_COLUMNS = TMS1Repository.lookup_columns
+
+@timed("lookup_tokens_tms1")
+def lookup_tokens_tms1(conn, token_hid, progress_callback=None, cancel_event=None):
+    """Fetches TMS1 info for many Token IDs. Returns (rows, missing_ids); rows follow TMS1_LOOKUP_COLUMNS."""
+    if not token_hid:
+        raise ValueError("Token list cannot be empty.")
+    rows = TMS1Repository(conn).lookup(token_hid, progress_callback, cancel_event)
+    return rows, find_missing_ids(token_hid, rows)
 
-def note_hotro_tms1(conn, token_hid, content_text, logger):
+@timed("note_hotro_tms1")
+def note_hotro_tms1(conn, token_hid, content_text, logger, progress_callback=None, cancel_event=None):
     if not token_hid or not content_text:
-        messagebox.showwarning("Warning", "Token list and content cannot be empty.")
-        return
-    try:
-        cursor = conn.cursor()
-        id_list = "','".join(token_hid)
-        sql = f"UPDATE token SET isPushNotice=0, NoticeInfo = %s WHERE TokenID IN ('{id_list}')"
-        cursor.execute(sql, (content_text,))
-        conn.commit()
-        logger.info(f"{token_hid} - ON note page: hotro.smartsign.com.vn\n")
-        messagebox.showinfo("Success", f"{cursor.rowcount} records updated successfully")
-    except mysql.connector.Error as e:
-        messagebox.showerror("Database Error", str(e))
+        raise ValueError("Token list and content cannot be empty.")
+    return run_token_batch(conn, TMS1Repository, "note_hotro", (content_text,), token_hid, logger,
+                           "ON note page: hotro.smartsign.com.vn", progress_callback, cancel_event)
 
-def notifications_tms1(conn, token_hid, content_text, logger):
+@timed("notifications_tms1")
+def notifications_tms1(conn, token_hid, content_text, logger, progress_callback=None, cancel_event=None):
     if not token_hid or not content_text:
-        messagebox.showwarning("Warning", "Token list and content cannot be empty.")
-        return
-    try:
-        cursor = conn.cursor()
-        id_list = "','".join(token_hid)
-        sql = f"UPDATE token SET isPushNotice=1, NoticeInfo = %s WHERE TokenID IN ('{id_list}')"
-        cursor.execute(sql, (content_text,))
-        conn.commit()
-        logger.info(f"{token_hid} - ON Notifications TMS1 \n")
-        messagebox.showinfo("Success", f"{cursor.rowcount} records updated successfully")
-    except mysql.connector.Error as e:
-        messagebox.showerror("Database Error", str(e))
+        raise ValueError("Token list and content cannot be empty.")
+    return run_token_batch(conn, TMS1Repository, "notifications_on", (content_text,), token_hid, logger,
+                           "ON Notifications TMS1", progress_callback, cancel_event)
 
-def off_notifications_tms1(conn, token_hid, logger):
+@timed("off_notifications_tms1")
+def off_notifications_tms1(conn, token_hid, logger, progress_callback=None, cancel_event=None):
     if not token_hid:
-        messagebox.showwarning("Warning", "Token list cannot be empty.")
-        return
-    try:
-        cursor = conn.cursor()
-        id_list = "','".join(token_hid)
-        sql = f"UPDATE token SET isPushNotice = NULL, NoticeInfo = NULL WHERE TokenID IN ('{id_list}')"
-        cursor.execute(sql)
-        conn.commit()
-        logger.info(f"{token_hid} - OFF Notifications TMS1 \n")
-        messagebox.showinfo("Success", f"{cursor.rowcount} records updated successfully")
-    except mysql.connector.Error as e:
-        messagebox.showerror("Database Error", str(e))
+        raise ValueError("Token list cannot be empty.")
+    return run_token_batch(conn, TMS1Repository, "notifications_off", (), token_hid, logger, "OFF Notifications TMS1",
+                           progress_callback, cancel_event)
 
-def block_tms1(conn, token_hid, note_text, logger):
+@timed("block_tms1")
+def block_tms1(conn, token_hid, note_text, logger, progress_callback=None, cancel_event=None):
     if not token_hid or not note_text:
-        messagebox.showwarning("Warning", "Token list and note cannot be empty.")
-        return
-    try:
-        cursor = conn.cursor()
-        id_list = "','".join(token_hid)
-        sql = f"UPDATE token SET IsBlock = 1, isPushNotice = 1, NoticeInfo = %s WHERE TokenID IN ('{id_list}')"
-        cursor.execute(sql, (note_text,))
-        conn.commit()
-        logger.info(f"{token_hid} - block \n")
-        messagebox.showinfo("Success", f"{cursor.rowcount} records updated successfully")
-    except mysql.connector.Error as e:
-        messagebox.showerror("Database Error", str(e))
+        raise ValueError("Token list and note cannot be empty.")
+    return run_token_batch(conn, TMS1Repository, "block", (note_text,), token_hid, logger, "block",
+                           progress_callback, cancel_event)
 
-def unblock_tms1(conn, token_hid, logger):
+@timed("unblock_tms1")
+def unblock_tms1(conn, token_hid, logger, progress_callback=None, cancel_event=None):
     if not token_hid:
-        messagebox.showwarning("Warning", "Token list cannot be empty.")
-        return
-    try:
-        cursor = conn.cursor()
-        id_list = "','".join(token_hid)
-        sql = f"UPDATE token SET IsUnblock = 1, isPushNotice = NULL, NoticeInfo = NULL WHERE TokenID IN ('{id_list}')"
-        cursor.execute(sql)
-        conn.commit()
-        logger.info(f"{token_hid} - unblock \n")
-        messagebox.showinfo("Success", f"{cursor.rowcount} records updated successfully")
-    except mysql.connector.Error as e:
-        messagebox.showerror("Database Error", str(e))
+        raise ValueError("Token list cannot be empty.")
+    return run_token_batch(conn, TMS1Repository, "unblock", (), token_hid, logger, "unblock",
+                           progress_callback, cancel_event)
 
+@timed("uninitialize_tms1")
 def uninitialize_tms1(conn, token_id, logger):
-    """Sets IsUnblock to 0 and isInitialize to NULL for a given Token ID."""
+    """Sets IsUnblock to 0 and isInitialize to NULL for a given Token ID. Returns the number of updated rows."""
     if not token_id:
-        messagebox.showwarning("Warning", "Token ID cannot be empty.")
-        return
-    try:
-        cursor = conn.cursor()
-        sql = "UPDATE token SET IsUnblock = 0, isInitialize = NULL WHERE TokenID = %s"
-        cursor.execute(sql, (token_id,))
-        
-        if cursor.rowcount == 0:
-            messagebox.showwarning("No Update", f"Token ID '{token_id}' not found or already in the desired state.")
-        else:
-            conn.commit()
-            logger.info(f"Uninitialized Token ID: {token_id}")
-            messagebox.showinfo("Success", f"Token ID '{token_id}' has been uninitialized.")
-            
-    except mysql.connector.Error as e:
-        messagebox.showerror("Database Error", str(e))
-    except Exception as e:
-        messagebox.showerror("Error", f"An unexpected error occurred: {e}")
-    finally:
-        if 'cursor' in locals() and cursor:
-            cursor.close()
+        raise ValueError("Token ID cannot be empty.")
+    started = time.perf_counter()
+    rowcount = TMS1Repository(conn).update_one("uninitialize", (), token_id)
+    if rowcount > 0:
+        conn.commit()
+        token_info_cache.invalidate([token_id])
+        log_operation(logger, "Uninitialize", [token_id], rowcount, time.perf_counter() - started)
+    return rowcount
 
 #-----TMS2 Functions-----
-def get_info_TMS2(conn, tokenid, get_result_text):
+@timed("get_info_tms2")
+def get_info_TMS2(conn, tokenid):
+    """Returns the formatted TMS2 info for a Token ID, or None if it was not found."""
     if not tokenid:
-        messagebox.showwarning("Warning", "Please enter a Token ID.")
-        return
-    try:
-        cursor = conn.cursor()
-        query = "SELECT use_specific_notification, token_block_status, token_title, token_notification, token_note FROM token_ms WHERE token_hid = %s;"
-        cursor.execute(query, (tokenid,))
-        results = cursor.fetchall()
-        if results:
-            result_str = ""
-            for row in results:
-                use_specific_notification, token_block_status, token_title, token_notification, token_note = row
-                result_str += f"Token ID: {tokenid}\n"
-                result_str += f"Trạng thái thông báo: {'ON' if use_specific_notification == 1 else 'OFF'}\n"
-                result_str += f"Trạng thái khóa: {'ON' if token_block_status == 1 else 'OFF'}\n"
-                result_str += f"Câu thông báo:\nTiêu đề: {token_title}\nNội dung: {token_notification}\n"
-                result_str += f"Note: {token_note}"
-
-            get_result_text.config(state=tk.NORMAL)
-            get_result_text.delete(1.0, tk.END)
-            get_result_text.insert(tk.END, result_str)
-            get_result_text.config(state=tk.DISABLED)
-        else:
-            messagebox.showinfo("Thông báo", "Không tìm thấy Token ID đã nhập.")       
-        cursor.close()
-    except mysql.connector.Error as e:
-        messagebox.showerror("Database Error", str(e))
+        raise ValueError("Please enter a Token ID.")
+    results = TMS2Repository(conn).get_info(tokenid)
+    if not results:
+        return None
+    result_str = ""
+    for row in results:
+        use_specific_notification, token_block_status, token_title, token_notification, token_note = row
+        result_str += f"Token ID: {tokenid}\n"
+        result_str += f"Trạng thái thông báo: {'ON' if use_specific_notification == 1 else 'OFF'}\n"
+        result_str += f"Trạng thái khóa: {'ON' if token_block_status == 1 else 'OFF'}\n"
+        result_str += f"Câu thông báo:\nTiêu đề: {token_title}\nNội dung: {token_notification}\n"
+        result_str += f"Note: {token_note}"
+    return result_str
+
+TMS2_LOOKUP_COLUMNS = TMS2Repository.lookup_columns
+
+@timed("lookup_tokens_tms2")
+def lookup_tokens_tms2(conn, token_hid, progress_callback=None, cancel_event=None):
+    """Fetches TMS2 info for many Token IDs. Returns (rows, missing_ids); rows follow TMS2_LOOKUP_COLUMNS."""
+    if not token_hid:
+        raise ValueError("Token list cannot be empty.")
+    rows = TMS2Repository(conn).lookup(token_hid, progress_callback, cancel_event)
+    return rows, find_missing_ids(token_hid, rows)
 
-def block_tms2(conn, token_hid, note_text, logger):
+@timed("block_tms2")
+def block_tms2(conn, token_hid, note_text, logger, progress_callback=None, cancel_event=None):
     if not token_hid or not note_text:
-        messagebox.showwarning("Warning", "Token list and note cannot be empty.")
-        return
-    try:
-        cursor = conn.cursor()
-        id_list = "','".join(token_hid)
-        sql = f"UPDATE token_ms SET token_block_status = 1, token_note = %s WHERE token_hid IN ('{id_list}')"
-        cursor.execute(sql, (note_text,))
-        conn.commit()
-        logger.info(f"{token_hid} - block \n")
-        messagebox.showinfo("Success", f"{cursor.rowcount} records updated successfully")
-    except mysql.connector.Error as e:
-        messagebox.showerror("Database Error", str(e))
+        raise ValueError("Token list and note cannot be empty.")
+    return run_token_batch(conn, TMS2Repository, "block", (note_text,), token_hid, logger, "block",
+                           progress_callback, cancel_event)
 
-def unblock_tms2(conn, token_hid, logger):
+@timed("unblock_tms2")
+def unblock_tms2(conn, token_hid, logger, progress_callback=None, cancel_event=None):
     if not token_hid:
-        messagebox.showwarning("Warning", "Token list cannot be empty.")
-        return
-    try:
-        cursor = conn.cursor()
-        id_list = "','".join(token_hid)
-        sql = f"UPDATE token_ms SET token_block_status = 0, token_note = NULL WHERE token_hid IN ('{id_list}')"
-        cursor.execute(sql)
-        conn.commit()
-        logger.info(f"{token_hid} - unblock \n")
-        messagebox.showinfo("Success", f"{cursor.rowcount} records updated successfully")
-    except mysql.connector.Error as e:
-        messagebox.showerror("Database Error", str(e))
+        raise ValueError("Token list cannot be empty.")
+    return run_token_batch(conn, TMS2Repository, "unblock", (), token_hid, logger, "unblock",
+                           progress_callback, cancel_event)
   
-def notifications_tms2(conn, token_hid, title_text, content_text, logger):
+@timed("notifications_tms2")
+def notifications_tms2(conn, token_hid, title_text, content_text, logger, progress_callback=None, cancel_event=None):
     if not all([token_hid, title_text, content_text]):
-        messagebox.showwarning("Warning", "Token list, title, and content cannot be empty.")
-        return
-    try:
-        cursor = conn.cursor()
-        id_list = "','".join(token_hid)
-        sql = """
-            UPDATE token_ms 
-            SET use_specific_notification = 1, 
-                token_notification_status = 1, 
-                token_valid_from = CURDATE(),
-                token_valid_to = '2025-05-19 23:59:59', 
-                token_title = %s, 
-                token_notification = %s 
-            WHERE token_hid IN ('{id_list}')
-        """
-        cursor.execute(sql, (title_text, content_text))
-        conn.commit()
-        logger.info(f"{token_hid} - ON Notifications TMS2 \n")
-        messagebox.showinfo("Success", f"{cursor.rowcount} records updated successfully")
-    except mysql.connector.Error as e:
-        messagebox.showerror("Database Error", str(e))
+        raise ValueError("Token list, title, and content cannot be empty.")
+    return run_token_batch(conn, TMS2Repository, "notifications_on", (title_text, content_text), token_hid, logger,
+                           "ON Notifications TMS2", progress_callback, cancel_event)
 
-def off_notifications_tms2(conn, token_hid, logger):
+@timed("off_notifications_tms2")
+def off_notifications_tms2(conn, token_hid, logger, progress_callback=None, cancel_event=None):
     if not token_hid:
-        messagebox.showwarning("Warning", "Token list cannot be empty.")
-        return
-    try:
-        cursor = conn.cursor()
-        id_list = "','".join(token_hid)
-        sql = """
-            UPDATE token_ms 
-            SET use_specific_notification = NULL, 
-                token_notification_status = 0, 
-                token_valid_from = NULL, 
-                token_valid_to = NULL, 
-                token_title = NULL, 
-                token_notification = NULL 
-            WHERE token_hid IN ('{id_list}')
-        """
-        cursor.execute(sql)
-        conn.commit()
-        logger.info(f"{token_hid} - OFF Notifications TMS2 \n")
-        messagebox.showinfo("Success", f"{cursor.rowcount} records updated successfully")
-    except mysql.connector.Error as e:
-        messagebox.showerror("Database Error", str(e))
\ No newline at end of file
+        raise ValueError("Token list cannot be empty.")
+    return run_token_batch(conn, TMS2Repository, "notifications_off", (), token_hid, logger, "OFF Notifications TMS2",
+                           progress_callback, cancel_event)
@@ -0,0 +1,98 @@
+import re
+import csv
+import os
+
+VALID_TOKEN_ID = re.compile(r"^[\w\-.]+$")
+ID_COLUMN_NAMES = {"tokenid", "token_id", "token_hid", "tokenhid", "id"}
+
+def normalize_token_id(value):
+    """Strips whitespace, a UTF-8 BOM and surrounding quotes from a raw Token ID."""
+    return value.strip().lstrip("﻿").strip("'\"").strip()
+
+class TokenIdList:
+    """
+    A normalized, de-duplicated Token ID list (insertion order kept) with statistics about the
+    input it was built from, so large lists can be summarised without rendering them.
+    """
+    def __init__(self, source=None):
+        self.source = source
+        self._ids = {}
+        self.total = 0
+        self.duplicates = 0
+        self.invalid = []
+
+    def add(self, raw_value):
+        token_id = normalize_token_id(raw_value)
+        if not token_id:
+            return
+        self.total += 1
+        if not VALID_TOKEN_ID.match(token_id):
+            self.invalid.append(token_id)
+        elif token_id in self._ids:
+            self.duplicates += 1
+        else:
+            self._ids[token_id] = None
+
+    @property
+    def ids(self):
+        return list(self._ids)
+
+    def __len__(self):
+        return len(self._ids)
+
+    def summary(self):
+        text = f"{len(self)} unique IDs ({self.duplicates} duplicates"
+        if self.invalid:
+            text += f", {len(self.invalid)} invalid skipped"
+        return text + ")"
+
+def parse_ids_from_text(lines, source=None):
+    """Builds a TokenIdList from lines of text (e.g. the batch ScrolledText)."""
+    id_list = TokenIdList(source)
+    for line in lines:
+        id_list.add(line)
+    return id_list
+
+def load_ids_from_file(path, column=None):
+    """
+    Streams Token IDs from a text file (one per line) or a CSV file.
+    For CSV files (comma, semicolon or tab separated) the ID column is `column` (name or index);
+    otherwise a header named like TokenID / token_hid is used, falling back to the first column.
+    """
+    id_list = TokenIdList(os.path.basename(path))
+    with open(path, "r", encoding="utf-8-sig", errors="replace", newline="") as f:
+        if not path.lower().endswith(".csv") and column is None:
+            for line in f:
+                id_list.add(line)
+            return id_list
+
+        sample = f.read(4096)
+        f.seek(0)
+        try:
+            dialect = csv.Sniffer().sniff(sample, delimiters=",;\t")
+        except csv.Error:
+            dialect = csv.excel
+        reader = csv.reader(f, dialect)
+        first_row = next(reader, None)
+        if first_row is None:
+            return id_list
+        header = [normalize_token_id(cell).lower() for cell in first_row]
+        has_header = any(name in ID_COLUMN_NAMES for name in header)
+        if isinstance(column, str):
+            if column.lower() not in header:
+                raise ValueError(f"Column '{column}' was not found in {os.path.basename(path)}.")
+            index, has_header = header.index(column.lower()), True
+        elif isinstance(column, int):
+            index = column
+            # Without a TokenID-like name, the first row is only taken for a header when its cell is
+            # not a valid Token ID (e.g. "Token ID"); guessing could drop a real ID from the batch
+            if not has_header and len(first_row) > index:
+                has_header = not VALID_TOKEN_ID.match(normalize_token_id(first_row[index]))
+        else:
+            index = next((i for i, name in enumerate(header) if name in ID_COLUMN_NAMES), 0)
+        if not has_header and len(first_row) > index:
+            id_list.add(first_row[index])
+        for row in reader:
+            if len(row) > index:
+                id_list.add(row[index])
+    return id_list
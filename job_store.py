@@ -0,0 +1,207 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+import app_config
+from batch_writer import chunked
+
+# Columns of the rows returned by JobStore.jobs(), in order
+JOB_COLUMNS = ["id", "created", "operation", "token_count", "chunks_done", "chunk_count", "affected", "status", "error"]
+
+# Job statuses that still have chunks left to run
+RESUMABLE_STATUSES = ("pending", "failed", "cancelled", "interrupted")
+
+def _process_alive(pid):
+    """Returns True if a process with this PID is running on this machine."""
+    if os.name == "nt":
+        # os.kill(pid, 0) would send CTRL_C_EVENT on Windows; ask for the exit code instead
+        import ctypes
+        kernel32 = ctypes.windll.kernel32
+        handle = kernel32.OpenProcess(0x1000, False, pid)  # PROCESS_QUERY_LIMITED_INFORMATION
+        if not handle:
+            return False
+        try:
+            exit_code = ctypes.c_ulong()
+            return bool(kernel32.GetExitCodeProcess(handle, ctypes.byref(exit_code))) and exit_code.value == 259
+        finally:
+            kernel32.CloseHandle(handle)
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True  # exists, owned by another user
+    return True
+
+class JobStore:
+    """
+    Local SQLite store of batch jobs: the operation, its parameters and the full Token ID list split
+    into the chunks the batch engine commits, each with its own checkpoint. A job that failed, was
+    cancelled or was interrupted by a restart can be resumed from the chunks not yet committed, or
+    retried for its failed chunks only. A running job records the PID of its process and a heartbeat
+    refreshed with every checkpoint; it is marked "interrupted" once that process is gone or the
+    heartbeat is older than BATCH_JOB_HEARTBEAT_TIMEOUT, so sessions sharing the store leave each
+    other's jobs alone. Finished jobs beyond BATCH_JOB_MAX_JOBS per section are dropped.
+    """
+    def __init__(self, path=None, max_jobs=None, heartbeat_timeout=None):
+        self.path = path or app_config.BATCH_JOB_FILE
+        self.max_jobs = max_jobs or app_config.BATCH_JOB_MAX_JOBS
+        self.heartbeat_timeout = heartbeat_timeout or app_config.BATCH_JOB_HEARTBEAT_TIMEOUT
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS batch_job (
+                id INTEGER PRIMARY KEY,
+                created TEXT NOT NULL,
+                updated TEXT NOT NULL,
+                section TEXT NOT NULL,
+                table_name TEXT NOT NULL,
+                update_name TEXT NOT NULL,
+                operation TEXT NOT NULL,
+                params TEXT NOT NULL,
+                note TEXT NOT NULL,
+                token_count INTEGER NOT NULL,
+                chunk_size INTEGER NOT NULL,
+                status TEXT NOT NULL,
+                error TEXT,
+                owner_pid INTEGER,
+                heartbeat REAL
+            );
+            CREATE TABLE IF NOT EXISTS batch_chunk (
+                job_id INTEGER NOT NULL,
+                chunk_index INTEGER NOT NULL,
+                token_ids TEXT NOT NULL,
+                status TEXT NOT NULL,
+                affected INTEGER NOT NULL DEFAULT 0,
+                error TEXT,
+                updated TEXT,
+                PRIMARY KEY (job_id, chunk_index)
+            );
+            CREATE INDEX IF NOT EXISTS idx_batch_job_section ON batch_job (section, table_name);
+        """)
+        columns = [row[1] for row in self._db.execute("PRAGMA table_info(batch_job)")]
+        for column, column_type in (("owner_pid", "INTEGER"), ("heartbeat", "REAL")):
+            if column not in columns:  # stores created before jobs had owners
+                self._db.execute(f"ALTER TABLE batch_job ADD COLUMN {column} {column_type}")
+        with self._lock:
+            self._interrupt_orphans()
+
+    def _interrupt_orphans(self):
+        """Marks "running" jobs whose process is gone or whose heartbeat is stale as "interrupted"."""
+        stale_before = time.time() - self.heartbeat_timeout
+        orphans = [job_id for job_id, owner_pid, heartbeat in self._db.execute(
+                       "SELECT id, owner_pid, heartbeat FROM batch_job WHERE status = 'running'")
+                   if owner_pid is None or heartbeat is None or heartbeat < stale_before
+                   or (owner_pid != os.getpid() and not _process_alive(owner_pid))]
+        self._db.executemany("UPDATE batch_job SET status = 'interrupted', owner_pid = NULL WHERE id = ?",
+                             ((job_id,) for job_id in orphans))
+        self._db.commit()
+
+    def create(self, section, repository, update_name, operation, params, token_ids, note=""):
+        """Stores a new job with its Token IDs split into BATCH_CHUNK_SIZE chunks. Returns the job ID."""
+        chunk_size = app_config.BATCH_CHUNK_SIZE
+        now = time.strftime("%Y-%m-%d %H:%M:%S")
+        with self._lock:
+            cursor = self._db.execute(
+                "INSERT INTO batch_job (created, updated, section, table_name, update_name, operation, params, note, "
+                "token_count, chunk_size, status) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 'pending')",
+                (now, now, section, repository.table, update_name, operation,
+                 json.dumps(list(params), ensure_ascii=False), note, len(token_ids), chunk_size))
+            job_id = cursor.lastrowid
+            chunks = enumerate(chunked(list(token_ids), chunk_size))
+            self._db.executemany(
+                "INSERT INTO batch_chunk (job_id, chunk_index, token_ids, status) VALUES (?, ?, ?, 'pending')",
+                ((job_id, index, json.dumps(chunk)) for index, chunk in chunks))
+            self._prune(section)
+            self._db.commit()
+        return job_id
+
+    def job(self, job_id):
+        """Returns a job as a dict (params decoded), or None if it no longer exists."""
+        with self._lock:
+            self._interrupt_orphans()
+            cursor = self._db.execute("SELECT * FROM batch_job WHERE id = ?", (job_id,))
+            row = cursor.fetchone()
+            if row is None:
+                return None
+            job = dict(zip([column[0] for column in cursor.description], row))
+        job["params"] = json.loads(job["params"])
+        return job
+
+    def chunks_to_run(self, job_id, failed_only=False):
+        """Returns [(chunk_index, token_ids)] of the chunks not committed yet (or only the failed ones), in order."""
+        statuses = ("failed",) if failed_only else ("pending", "failed")
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT chunk_index, token_ids FROM batch_chunk WHERE job_id = ? "
+                f"AND status IN ({', '.join('?' * len(statuses))}) ORDER BY chunk_index",
+                (job_id, *statuses)).fetchall()
+        return [(index, json.loads(token_ids)) for index, token_ids in rows]
+
+    def start(self, job_id):
+        """Marks a job as "running" in this process. Raises ValueError if another live run owns it."""
+        with self._lock:
+            self._interrupt_orphans()
+            cursor = self._db.execute(
+                "UPDATE batch_job SET status = 'running', error = NULL, updated = ?, owner_pid = ?, heartbeat = ? "
+                "WHERE id = ? AND status != 'running'",
+                (time.strftime("%Y-%m-%d %H:%M:%S"), os.getpid(), time.time(), job_id))
+            self._db.commit()
+            if not cursor.rowcount:
+                raise ValueError(f"Batch job #{job_id} is still running in another session.")
+
+    def checkpoint(self, job_id, chunk_index, affected, error=None):
+        """Records a chunk as committed ("done") or, with an error message, as "failed", and refreshes the heartbeat."""
+        with self._lock:
+            self._db.execute(
+                "UPDATE batch_chunk SET status = ?, affected = ?, error = ?, updated = ? "
+                "WHERE job_id = ? AND chunk_index = ?",
+                ("failed" if error else "done", affected, error, time.strftime("%Y-%m-%d %H:%M:%S"), job_id,
+                 chunk_index))
+            self._db.execute("UPDATE batch_job SET heartbeat = ? WHERE id = ?", (time.time(), job_id))
+            self._db.commit()
+
+    def finish(self, job_id, status, error=None):
+        """Ends a run: the job becomes "done" once every chunk is committed, otherwise takes status."""
+        with self._lock:
+            remaining = self._db.execute(
+                "SELECT COUNT(*) FROM batch_chunk WHERE job_id = ? AND status != 'done'", (job_id,)).fetchone()[0]
+        self._set_status(job_id, "done" if not remaining else status, None if not remaining else error)
+
+    def _set_status(self, job_id, status, error):
+        with self._lock:
+            self._db.execute("UPDATE batch_job SET status = ?, error = ?, updated = ?, owner_pid = NULL WHERE id = ?",
+                             (status, error, time.strftime("%Y-%m-%d %H:%M:%S"), job_id))
+            self._db.commit()
+
+    def _prune(self, section):
+        stale = [row[0] for row in self._db.execute(
+            "SELECT id FROM batch_job WHERE section = ? AND status = 'done' ORDER BY id DESC LIMIT -1 OFFSET ?",
+            (section, self.max_jobs))]
+        for job_id in stale:
+            self._db.execute("DELETE FROM batch_chunk WHERE job_id = ?", (job_id,))
+            self._db.execute("DELETE FROM batch_job WHERE id = ?", (job_id,))
+
+    def jobs(self, section, table_name, limit=100):
+        """Returns the newest jobs of a section and table as JOB_COLUMNS rows."""
+        with self._lock:
+            self._interrupt_orphans()
+            return self._db.execute(
+                "SELECT j.id, j.created, j.operation, j.token_count, "
+                "SUM(c.status = 'done'), COUNT(c.chunk_index), SUM(c.affected), j.status, j.error "
+                "FROM batch_job j JOIN batch_chunk c ON c.job_id = j.id "
+                "WHERE j.section = ? AND j.table_name = ? GROUP BY j.id ORDER BY j.id DESC LIMIT ?",
+                (section, table_name, limit)).fetchall()
+
+_default_store = None
+_default_store_lock = threading.Lock()
+
+def get_job_store():
+    """Returns the process-wide batch job store, opening it on first use."""
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None:
+            _default_store = JobStore()
+        return _default_store
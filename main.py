@@ -1,7 +1,11 @@
-import tkinter as tk
-from tkinter import messagebox
-from database import get_database_config, connect_to_database
-from ui_manager import MainApplication
+from startup_timing import startup_timer
+
+# Only Tk is needed for the login window; the database, crypto and UI modules are imported
+# once the user connects.
+with startup_timer.importing("tkinter"):
+    import tkinter as tk
+    from tkinter import messagebox
+from executor import BackgroundExecutor
 
 def show_connect_screen():
     """
@@ -38,6 +42,9 @@ def show_connect_screen():
     right_pane = tk.Frame(main_frame, bg='#ecf0f1', padx=40, pady=30)
     right_pane.pack(side=tk.RIGHT, fill=tk.BOTH, expand=True)
 
+    # Unlocking the config and connecting run in the background so the window stays responsive
+    executor = BackgroundExecutor(root)
+
     def attempt_connect(event=None):
         section_name = section_entry.get()
         password = password_entry.get()
@@ -49,19 +56,54 @@ def show_connect_screen():
             messagebox.showwarning("Input Error", "Please enter the Password.")
             return
 
-        try:
-            db_config = get_database_config(section_name, password)
-            conn = connect_to_database(db_config)
-
-            if conn and conn.is_connected():
-                root.destroy()
-                main_app_root = tk.Tk()
-                app = MainApplication(main_app_root, conn, section_name)
-                main_app_root.mainloop()
+        startup_timer.mark("connect_clicked")
+
+        def connect(task):
+            with startup_timer.importing("database"):
+                from database import ConfigVault, ConnectionManager
+            vault = ConfigVault.unlock(password)
+            db_manager = None
+            try:
+                endpoints = vault.get_endpoints(section_name)
+                db_manager = ConnectionManager()
+                db_manager.connect_section(section_name, endpoints, task.cancel_event, task.report_progress)
+            except Exception:
+                if db_manager:
+                    db_manager.close()
+                vault.wipe()
+                raise
+            return vault, db_manager
+
+        def on_success(result):
+            vault, db_manager = result
+            startup_timer.mark("connected")
+            with startup_timer.importing("ui_manager"):
+                from ui_manager import MainApplication
+            executor.shutdown()
+            root.destroy()
+            main_app_root = tk.Tk()
+            app = MainApplication(main_app_root, db_manager, section_name, vault)
+            main_app_root.after_idle(lambda: (startup_timer.mark("main_window"), startup_timer.write()))
+            main_app_root.mainloop()
+
+        def on_error(error):
+            import mysql.connector
+            connect_button.config(state=tk.NORMAL)
+            status_label.config(text="")
+            if isinstance(error, mysql.connector.Error):
+                messagebox.showerror("Connection Failed", f"Could not connect to the database. Check config and network.\n{error}")
             else:
-                messagebox.showerror("Connection Failed", "Could not connect to the database. Check config and network.")
-        except Exception as e:
-            messagebox.showerror("Login Error", str(e))
+                messagebox.showerror("Login Error", str(error))
+
+        if executor.submit("login", connect, on_success=on_success, on_error=on_error,
+                           on_progress=lambda message: status_label.config(text=message)) is None:
+            return
+        connect_button.config(state=tk.DISABLED)
+        status_label.config(text="Unlocking configuration...")
+
+    def on_close():
+        executor.shutdown()
+        root.destroy()
 
     # Form Title
     tk.Label(right_pane, text="Secure Login", font=("Roboto", 20, "bold"), bg='#ecf0f1').pack(pady=(0, 30))
@@ -85,9 +127,16 @@ def show_connect_screen():
                                bg='#3498db', fg='white', command=attempt_connect,
                                relief=tk.FLAT, padx=20, pady=8, activebackground='#2980b9', activeforeground='white')
     connect_button.pack()
+    status_label = tk.Label(right_pane, text="", font=("Roboto", 9), bg='#ecf0f1', fg='#7f8c8d', wraplength=300)
+    status_label.pack(pady=(10, 0))
 
     section_entry.focus_set()
+    root.protocol("WM_DELETE_WINDOW", on_close)
+    root.after_idle(lambda: startup_timer.mark("login_window"))
     root.mainloop()
 
 if __name__ == "__main__":
+    # The certificate inventory scans in worker processes; needed for the PyInstaller build
+    import multiprocessing
+    multiprocessing.freeze_support()
     show_connect_screen()
\ No newline at end of file
@@ -0,0 +1,165 @@
+import os
+import json
+import time
+import threading
+import contextvars
+import functools
+from collections import deque
+import app_config
+
+# Operation currently being timed in this thread/context; byte and retry counts are added to it
+_current = contextvars.ContextVar("cts_metrics_operation", default=None)
+
+def _percentile(ordered, fraction):
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))] if ordered else None
+
+def _result_rows(result):
+    """Rows affected/returned as reported by an operation's return value."""
+    if isinstance(result, bool) or result is None:
+        return 0
+    if isinstance(result, int):
+        return result
+    if isinstance(result, tuple) and result and isinstance(result[0], list):
+        return len(result[0])  # (rows, missing_ids) of the lookups
+    return 1
+
+class _Sample:
+    """Counters of one running operation; bytes and retries may be added from worker threads."""
+    def __init__(self):
+        self.bytes_sent = 0
+        self.retries = 0
+        self._lock = threading.Lock()
+
+    def add(self, bytes_sent=0, retries=0):
+        with self._lock:
+            self.bytes_sent += bytes_sent
+            self.retries += retries
+
+class OperationMetrics:
+    """
+    Session metrics of the DB and OCSP operations: per operation the call/error counts, total
+    duration, rows, bytes sent and retries, plus the last METRICS_SAMPLES durations for p50/p95.
+    Thread-safe; written as a Prometheus textfile and a JSON file by write_files().
+    """
+    def __init__(self, max_samples=None):
+        self.max_samples = max_samples or app_config.METRICS_SAMPLES
+        self._operations = {}  # name -> totals dict
+        self._durations = deque(maxlen=self.max_samples)  # whole session, all operations
+        self.last = None  # dict of the most recent operation
+        self._lock = threading.Lock()
+
+    def record(self, operation, duration, rows=0, bytes_sent=0, retries=0, error=None):
+        with self._lock:
+            totals = self._operations.get(operation)
+            if totals is None:
+                totals = self._operations[operation] = {
+                    "count": 0, "errors": 0, "duration_sum": 0.0, "rows": 0, "bytes_sent": 0, "retries": 0,
+                    "durations": deque(maxlen=self.max_samples)}
+            totals["count"] += 1
+            totals["errors"] += 1 if error else 0
+            totals["duration_sum"] += duration
+            totals["rows"] += rows
+            totals["bytes_sent"] += bytes_sent
+            totals["retries"] += retries
+            totals["durations"].append(duration)
+            self._durations.append(duration)
+            self.last = {"operation": operation, "duration": duration, "rows": rows, "bytes_sent": bytes_sent,
+                         "retries": retries, "error": str(error) if error else None, "time": time.time()}
+
+    def session_percentiles(self):
+        """Returns (count, p50, p95) over the recent durations of all operations, in seconds."""
+        with self._lock:
+            ordered = sorted(self._durations)
+        return len(ordered), _percentile(ordered, 0.5), _percentile(ordered, 0.95)
+
+    def snapshot(self):
+        """Returns {operation: totals with p50/p95} for all recorded operations."""
+        with self._lock:
+            operations = {name: dict(totals, durations=sorted(totals["durations"]))
+                          for name, totals in self._operations.items()}
+        for totals in operations.values():
+            ordered = totals.pop("durations")
+            totals["p50"] = _percentile(ordered, 0.5)
+            totals["p95"] = _percentile(ordered, 0.95)
+        return operations
+
+    def write_files(self, directory=None):
+        """Writes metrics.prom (Prometheus textfile collector format) and metrics.json to directory."""
+        directory = directory or app_config.METRICS_DIR
+        os.makedirs(directory, exist_ok=True)
+        operations = self.snapshot()
+        lines = []
+        families = [
+            ("cts_operation_duration_seconds", "summary", "Duration of CTS operations."),
+            ("cts_operation_rows_total", "counter", "Rows affected or returned by CTS operations."),
+            ("cts_operation_bytes_sent_total", "counter", "Estimated bytes sent by CTS operations."),
+            ("cts_operation_retries_total", "counter", "Retries made by CTS operations."),
+            ("cts_operation_errors_total", "counter", "Failed CTS operations."),
+        ]
+        for name, metric_type, help_text in families:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {metric_type}")
+            for operation, totals in sorted(operations.items()):
+                label = f'operation="{operation}"'
+                if metric_type == "summary":
+                    for quantile, key in (("0.5", "p50"), ("0.95", "p95")):
+                        lines.append(f'{name}{{{label},quantile="{quantile}"}} {totals[key]:.6f}')
+                    lines.append(f"{name}_sum{{{label}}} {totals['duration_sum']:.6f}")
+                    lines.append(f"{name}_count{{{label}}} {totals['count']}")
+                else:
+                    key = {"cts_operation_rows_total": "rows", "cts_operation_bytes_sent_total": "bytes_sent",
+                           "cts_operation_retries_total": "retries", "cts_operation_errors_total": "errors"}[name]
+                    lines.append(f"{name}{{{label}}} {totals[key]}")
+        # Write to a temporary file and rename so a collector never reads a half-written file
+        for file_name, content in (("metrics.prom", "\n".join(lines) + "\n"),
+                                   ("metrics.json", json.dumps({"time": time.time(), "operations": operations},
+                                                               indent=2))):
+            path = os.path.join(directory, file_name)
+            with open(path + ".tmp", "w", encoding="utf-8") as f:
+                f.write(content)
+            os.replace(path + ".tmp", path)
+
+operation_metrics = OperationMetrics()
+
+def add_bytes(count):
+    """Adds sent bytes to the operation being timed, if any."""
+    sample = _current.get()
+    if sample is not None:
+        sample.add(bytes_sent=count)
+
+def add_retry():
+    """Counts a retry for the operation being timed, if any."""
+    sample = _current.get()
+    if sample is not None:
+        sample.add(retries=1)
+
+def timed(operation):
+    """
+    Decorator recording duration, rows (from the return value), bytes sent, retries and errors of
+    every call in operation_metrics. Nested timed calls only count towards the outermost operation,
+    and calls rejected with ValueError (invalid input) are not recorded.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _current.get() is not None:
+                return func(*args, **kwargs)
+            sample = _Sample()
+            token = _current.set(sample)
+            started = time.perf_counter()
+            try:
+                result = func(*args, **kwargs)
+            except ValueError:
+                raise  # rejected input, nothing was sent
+            except Exception as e:
+                # A failed batch still reports the rows its committed chunks changed
+                operation_metrics.record(operation, time.perf_counter() - started, getattr(e, "affected_rows", 0),
+                                         sample.bytes_sent, sample.retries, error=e)
+                raise
+            finally:
+                _current.reset(token)
+            operation_metrics.record(operation, time.perf_counter() - started, _result_rows(result),
+                                     sample.bytes_sent, sample.retries)
+            return result
+        return wrapper
+    return decorator
@@ -0,0 +1,163 @@
+import os
+import csv
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import requests
+from requests.adapters import HTTPAdapter
+from cryptography import x509
+from cryptography.x509.ocsp import OCSPCertStatus, OCSPResponseStatus
+import app_config
+from ocsp_cache import get_default_cache
+from ocsp_client import load_certificate, get_ocsp_server, query_ocsp
+from functions import format_ocsp_time, extract_common_name, extract_uid, decimal_to_hex
+
+RESULT_COLUMNS = ["file", "subject", "uid", "serial", "response_status", "cert_status",
+                  "revocation_time", "revocation_reason", "this_update", "ocsp_url", "source", "error"]
+
+def collect_certificate_files(paths):
+    """Expands a list of files and folders into the certificate files they contain (folders are walked recursively)."""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for dirpath, _, filenames in os.walk(path):
+                files.extend(os.path.join(dirpath, name) for name in sorted(filenames)
+                             if name.lower().endswith(app_config.CERT_EXTENSIONS))
+        elif path:
+            files.append(path)
+    return files
+
+def load_certificates_from_file(path):
+    """Loads every certificate in a file; PEM bundles may hold several."""
+    with open(path, "rb") as f:
+        data = f.read()
+    if b"-----BEGIN" in data:
+        return x509.load_pem_x509_certificates(data)
+    return [load_certificate(data)]
+
+def is_ca_certificate(cert):
+    try:
+        return cert.extensions.get_extension_for_class(x509.BasicConstraints).value.ca
+    except x509.ExtensionNotFound:
+        return False
+
+def build_issuer_index(issuer_paths):
+    """Maps issuer subject names to issuer certificates, loaded from the given files/folders."""
+    issuers = {}
+    for path in collect_certificate_files(issuer_paths):
+        for cert in load_certificates_from_file(path):
+            issuers[cert.subject] = cert
+    return issuers
+
+def _new_result(path):
+    result = dict.fromkeys(RESULT_COLUMNS, "")
+    result["file"] = path
+    return result
+
+def _fill_from_response(result, ocsp_resp):
+    result["response_status"] = ocsp_resp.response_status.name
+    if ocsp_resp.response_status == OCSPResponseStatus.SUCCESSFUL:
+        cert_status = ocsp_resp.certificate_status
+        result["cert_status"] = cert_status.name if cert_status else "UNKNOWN"
+        if cert_status == OCSPCertStatus.REVOKED:
+            result["revocation_time"] = format_ocsp_time(ocsp_resp.revocation_time)
+            if ocsp_resp.revocation_reason:
+                result["revocation_reason"] = ocsp_resp.revocation_reason.name
+        result["this_update"] = format_ocsp_time(ocsp_resp.this_update)
+
+def _new_session(max_workers):
+    """A keep-alive session whose connection pool is large enough for every worker thread."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_workers)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+def bulk_check(cert_paths, issuer_paths, max_workers=None, result_callback=None, cancel_event=None, force_refresh=False):
+    """
+    Checks the OCSP status of every certificate found in cert_paths (files or folders).
+
+    Each certificate is matched to its issuer by name among issuer_paths and any CA certificates
+    found in cert_paths. Requests are grouped by responder URL, each responder gets its own
+    keep-alive requests.Session, and at most max_workers requests run at once. Fresh responses in
+    the OCSP cache are reused unless force_refresh is set.
+    `result_callback(done, total, result)` is called for every finished certificate.
+    Returns the list of result dicts (keys: RESULT_COLUMNS).
+    """
+    max_workers = max_workers or app_config.OCSP_BULK_WORKERS
+    files = collect_certificate_files(cert_paths)
+    if not files:
+        raise ValueError("No certificate files were found in the selection.")
+    issuers = build_issuer_index(issuer_paths)
+
+    results = []
+    pending = []  # (result, cert)
+    for path in files:
+        try:
+            for cert in load_certificates_from_file(path):
+                if is_ca_certificate(cert):
+                    issuers.setdefault(cert.subject, cert)
+                    continue
+                pending.append((_new_result(path), cert))
+        except Exception as e:
+            result = _new_result(path)
+            result["error"] = f"Cannot load certificate: {e}"
+            results.append(result)
+
+    by_responder = {}
+    for result, cert in pending:
+        result["subject"] = extract_common_name(str(cert.subject))
+        result["uid"] = extract_uid(str(cert.subject))
+        result["serial"] = decimal_to_hex(cert.serial_number)
+        issuer = issuers.get(cert.issuer)
+        try:
+            if issuer is None:
+                raise ValueError(f"Issuer not found: {cert.issuer.rfc4514_string()}")
+            result["ocsp_url"] = get_ocsp_server(cert)
+        except ValueError as e:
+            result["error"] = str(e)
+            results.append(result)
+            continue
+        by_responder.setdefault(result["ocsp_url"], []).append((result, cert, issuer))
+
+    total = len(results) + sum(len(group) for group in by_responder.values())
+    done = 0
+    for result in results:
+        done += 1
+        if result_callback:
+            result_callback(done, total, result)
+
+    sessions = {url: _new_session(max_workers) for url in by_responder}
+    cache = get_default_cache()
+
+    def check_one(result, cert, issuer):
+        if cancel_event is not None and cancel_event.is_set():
+            result["error"] = "Cancelled"
+            return result
+        try:
+            ocsp_resp, _, from_cache = query_ocsp(cert, issuer, sessions[result["ocsp_url"]], result["ocsp_url"],
+                                                  cache=cache, force_refresh=force_refresh)
+            _fill_from_response(result, ocsp_resp)
+            result["source"] = "cache" if from_cache else "responder"
+        except Exception as e:
+            result["error"] = str(e)
+        return result
+
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            futures = [pool.submit(check_one, *item) for group in by_responder.values() for item in group]
+            for future in as_completed(futures):
+                result = future.result()
+                results.append(result)
+                done += 1
+                if result_callback:
+                    result_callback(done, total, result)
+    finally:
+        for session in sessions.values():
+            session.close()
+    return results
+
+def export_results_csv(results, path):
+    """Writes bulk OCSP results to a CSV file (UTF-8 with BOM so Excel shows Vietnamese names correctly)."""
+    with open(path, "w", newline="", encoding="utf-8-sig") as f:
+        writer = csv.DictWriter(f, fieldnames=RESULT_COLUMNS)
+        writer.writeheader()
+        writer.writerows(results)
@@ -0,0 +1,93 @@
+import os
+import time
+import sqlite3
+import threading
+from datetime import timezone
+from cryptography.x509.ocsp import load_der_ocsp_response, OCSPCertStatus
+import app_config
+
+class OCSPResponseCache:
+    """
+    On-disk cache of OCSP responses keyed by (issuer name hash, issuer key hash, serial number).
+    A response is served until its nextUpdate, capped at max_age seconds after it was fetched.
+    Responses without a nextUpdate (newer status information may be available at any time) and
+    UNKNOWN certificate statuses are not cached.
+    The least recently used entries are evicted once max_entries is exceeded.
+    """
+    def __init__(self, path=None, max_age=None, max_entries=None):
+        self.path = path or app_config.OCSP_CACHE_FILE
+        self.max_age = max_age or app_config.OCSP_CACHE_MAX_AGE
+        self.max_entries = max_entries or app_config.OCSP_CACHE_MAX_ENTRIES
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS ocsp_response (
+                issuer_name_hash BLOB NOT NULL,
+                issuer_key_hash BLOB NOT NULL,
+                serial_number TEXT NOT NULL,
+                response_der BLOB NOT NULL,
+                expires_at REAL NOT NULL,
+                last_access REAL NOT NULL,
+                PRIMARY KEY (issuer_name_hash, issuer_key_hash, serial_number)
+            )""")
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_ocsp_last_access ON ocsp_response (last_access)")
+        self._db.commit()
+
+    @staticmethod
+    def key_for(ocsp_request):
+        return (ocsp_request.issuer_name_hash, ocsp_request.issuer_key_hash, format(ocsp_request.serial_number, 'X'))
+
+    def get(self, key):
+        """Returns the cached OCSP response for key if it is still fresh, otherwise None."""
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT response_der, expires_at FROM ocsp_response "
+                "WHERE issuer_name_hash = ? AND issuer_key_hash = ? AND serial_number = ?", key).fetchone()
+            if row is None:
+                return None
+            if row[1] <= now:
+                self._db.execute("DELETE FROM ocsp_response WHERE issuer_name_hash = ? AND issuer_key_hash = ? AND serial_number = ?", key)
+                self._db.commit()
+                return None
+            self._db.execute("UPDATE ocsp_response SET last_access = ? "
+                             "WHERE issuer_name_hash = ? AND issuer_key_hash = ? AND serial_number = ?", (now,) + key)
+            self._db.commit()
+        return load_der_ocsp_response(row[0])
+
+    def put(self, key, ocsp_resp, response_der):
+        """
+        Stores a successful OCSP response until its nextUpdate (or max_age, whichever comes first).
+        Responses without a nextUpdate or with an UNKNOWN certificate status are not stored.
+        """
+        if ocsp_resp.next_update is None or ocsp_resp.certificate_status == OCSPCertStatus.UNKNOWN:
+            return
+        now = time.time()
+        expires_at = min(now + self.max_age, ocsp_resp.next_update.replace(tzinfo=timezone.utc).timestamp())
+        if expires_at <= now:
+            return
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO ocsp_response VALUES (?, ?, ?, ?, ?, ?)",
+                             key + (response_der, expires_at, now))
+            self._db.execute("""
+                DELETE FROM ocsp_response WHERE rowid IN (
+                    SELECT rowid FROM ocsp_response ORDER BY last_access DESC LIMIT -1 OFFSET ?
+                )""", (self.max_entries,))
+            self._db.commit()
+
+    def clear(self):
+        with self._lock:
+            self._db.execute("DELETE FROM ocsp_response")
+            self._db.commit()
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+def get_default_cache():
+    """Returns the process-wide OCSP cache, opening it on first use."""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = OCSPResponseCache()
+        return _default_cache
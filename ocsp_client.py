@@ -0,0 +1,101 @@
+import requests
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.x509 import load_pem_x509_certificate, load_der_x509_certificate, ExtensionOID, AuthorityInformationAccessOID
+from cryptography.x509.ocsp import OCSPRequestBuilder, OCSPCertStatus, OCSPResponseStatus, load_der_ocsp_response
+from ocsp_cache import get_default_cache
+from functions import format_ocsp_time, extract_common_name, extract_uid, decimal_to_hex
+from metrics import timed, add_bytes
+
+# OCSP client functions. Kept out of functions.py so the requests/x509 stack is only imported
+# when an OCSP feature is used.
+
+def load_certificate(data):
+    """Loads a certificate from PEM or DER bytes."""
+    if b"-----BEGIN" in data:
+        return load_pem_x509_certificate(data)
+    return load_der_x509_certificate(data)
+
+def get_ocsp_server(cert):
+    """Returns the OCSP responder URL from the certificate's AIA extension."""
+    try:
+        aia = cert.extensions.get_extension_for_oid(ExtensionOID.AUTHORITY_INFORMATION_ACCESS).value
+        ocsps = [ia for ia in aia if ia.access_method == AuthorityInformationAccessOID.OCSP]
+        if not ocsps:
+            raise ValueError('No OCSP server entry in AIA')
+        return ocsps[0].access_location.value
+    except Exception as e:
+        raise ValueError(f"Failed to extract OCSP URL: {e}")
+
+@timed("ocsp_query")
+def query_ocsp(cert, issuer, session=None, ocsp_server_url=None, cache=None, force_refresh=False):
+    """
+    Sends an OCSP request for cert to its responder and returns (ocsp_response, responder_url, from_cache).
+    A requests.Session can be passed to reuse keep-alive connections across calls. When an
+    OCSPResponseCache is given, a fresh cached response is returned instead unless force_refresh is set,
+    and successful responses are stored in it.
+    """
+    builder = OCSPRequestBuilder().add_certificate(cert, issuer, hashes.SHA1()) # Using SHA1 as per original code
+    req = builder.build()
+    ocsp_server_url = ocsp_server_url or get_ocsp_server(cert)
+
+    cache_key = cache.key_for(req) if cache is not None else None
+    if cache_key is not None and not force_refresh:
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return cached, ocsp_server_url, True
+
+    request_der = req.public_bytes(serialization.Encoding.DER)
+    add_bytes(len(request_der))
+    response = (session or requests).post(
+        ocsp_server_url,
+        data=request_der,
+        headers={'Content-Type': 'application/ocsp-request'},
+        timeout=10
+    )
+    response.raise_for_status()
+    ocsp_resp = load_der_ocsp_response(response.content)
+    if cache_key is not None and ocsp_resp.response_status == OCSPResponseStatus.SUCCESSFUL:
+        cache.put(cache_key, ocsp_resp, response.content)
+    return ocsp_resp, ocsp_server_url, False
+
+def check_certificate_status(cert_path, issuer_path, force_refresh=False):
+    """
+    Performs an OCSP check for the given certificate and returns the formatted result.
+    Responses are served from the OCSP cache while fresh unless force_refresh is set.
+    """
+    if not cert_path or not issuer_path:
+        raise ValueError("Please select both a certificate and an issuer file.")
+    with open(cert_path, "rb") as cert_file, open(issuer_path, "rb") as issuer_file:
+        pem_cert = cert_file.read()
+        pem_issuer = issuer_file.read()
+
+    cert = load_certificate(pem_cert)
+    issuer = load_certificate(pem_issuer)
+
+    ocsp_resp, ocsp_server_url, from_cache = query_ocsp(cert, issuer, cache=get_default_cache(), force_refresh=force_refresh)
+    result_lines = ["----- OCSP Responder -----"]
+    result_lines.append(f"Response Status: {ocsp_resp.response_status.name}")
+    
+    if ocsp_resp.response_status == OCSPResponseStatus.SUCCESSFUL:
+        cert_status = ocsp_resp.certificate_status
+        result_lines.append(f"Certificate Status: {cert_status.name if cert_status else 'UNKNOWN'}")
+        
+        if cert_status == OCSPCertStatus.REVOKED:
+            result_lines.append(f"Revocation Time: {format_ocsp_time(ocsp_resp.revocation_time)}")
+            if ocsp_resp.revocation_reason:
+                result_lines.append(f"Revocation Reason: {ocsp_resp.revocation_reason.name}")
+
+        result_lines.append(f"This Update: {format_ocsp_time(ocsp_resp.this_update)}")
+        if ocsp_resp.next_update:
+            result_lines.append(f"Next Update: {format_ocsp_time(ocsp_resp.next_update)}")
+        result_lines.append(f"OCSP URI: {ocsp_server_url}")
+        result_lines.append(f"Source: {'cache' if from_cache else 'responder'}")
+    
+    result_lines.append("\n----- Certificate Information -----")
+    result_lines.append(f"Subject: {extract_common_name(str(cert.subject))}") 
+    result_lines.append(f"UID: {extract_uid(str(cert.subject))}")  
+    result_lines.append(f"Serial Number: {decimal_to_hex(cert.serial_number)}")  
+    result_lines.append(f"Valid from: {cert.not_valid_before.strftime('%Y-%m-%d %H:%M:%S')}")
+    result_lines.append(f"Valid to: {cert.not_valid_after.strftime('%Y-%m-%d %H:%M:%S')}")
+
+    return "\n".join(result_lines)
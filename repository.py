@@ -0,0 +1,84 @@
+from batch_writer import run_batch_select
+from statements import ID_PLACEHOLDERS, execute
+
+class TokenRepository:
+    """
+    Data access for one TMS token table. Every statement is a server-side prepared statement kept
+    in the connection's statement cache, and ID lists are always bound as parameters.
+    Subclasses define the table, its ID column, the selected columns and the named updates.
+    """
+    table = None
+    id_column = None
+    info_columns = []
+    lookup_columns = []
+    updates = {}  # update name -> SET clause
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    @classmethod
+    def update_sql(cls, name):
+        """Returns the batch UPDATE template (with the `{id_placeholders}` IN list) for a named update."""
+        return f"UPDATE {cls.table} SET {cls.updates[name]} WHERE {cls.id_column} IN ({ID_PLACEHOLDERS})"
+
+    @classmethod
+    def updated_columns(cls, name):
+        """Returns the columns a named update sets, e.g. ["IsBlock", "isPushNotice", "NoticeInfo"] for "block"."""
+        return [assignment.split("=")[0].strip() for assignment in cls.updates[name].split(",")]
+
+    @classmethod
+    def restore_sql(cls, columns):
+        """Returns a batch UPDATE template setting the given columns from parameters (used to undo an update)."""
+        assignments = ", ".join(f"{column} = %s" for column in columns)
+        return f"UPDATE {cls.table} SET {assignments} WHERE {cls.id_column} IN ({ID_PLACEHOLDERS})"
+
+    @classmethod
+    def snapshot_sql(cls, columns):
+        """Returns a SELECT template reading and locking (id, *columns) of an IN list, run before each chunk's update."""
+        return (f"SELECT {cls.id_column}, {', '.join(columns)} FROM {cls.table} "
+                f"WHERE {cls.id_column} IN ({ID_PLACEHOLDERS}) FOR UPDATE")
+
+    def get_info(self, token_id):
+        """Returns the info_columns rows of one Token ID."""
+        sql = f"SELECT {', '.join(self.info_columns)} FROM {self.table} WHERE {self.id_column} = %s"
+        return execute(self.conn, sql, (token_id,)).fetchall()
+
+    def lookup(self, token_ids, progress_callback=None, cancel_event=None):
+        """Returns the lookup_columns rows of many Token IDs, read in chunks."""
+        sql = f"SELECT {', '.join(self.lookup_columns)} FROM {self.table} WHERE {self.id_column} IN ({ID_PLACEHOLDERS})"
+        return run_batch_select(self.conn, sql, (), token_ids, progress_callback=progress_callback,
+                                cancel_event=cancel_event)
+
+    def update_one(self, name, params, token_id):
+        """Runs a named update for a single Token ID without committing. Returns the affected row count."""
+        sql = f"UPDATE {self.table} SET {self.updates[name]} WHERE {self.id_column} = %s"
+        return execute(self.conn, sql, tuple(params) + (token_id,)).rowcount
+
+class TMS1Repository(TokenRepository):
+    table = "token"
+    id_column = "TokenID"
+    info_columns = ["isPushNotice", "MST", "SubjectName", "NoticeInfo", "IsBlock", "IsUnblock"]
+    lookup_columns = ["TokenID", "MST", "SubjectName", "isPushNotice", "IsBlock", "IsUnblock", "NoticeInfo"]
+    updates = {
+        "note_hotro": "isPushNotice=0, NoticeInfo = %s",
+        "notifications_on": "isPushNotice=1, NoticeInfo = %s",
+        "notifications_off": "isPushNotice = NULL, NoticeInfo = NULL",
+        "block": "IsBlock = 1, isPushNotice = 1, NoticeInfo = %s",
+        "unblock": "IsUnblock = 1, isPushNotice = NULL, NoticeInfo = NULL",
+        "uninitialize": "IsUnblock = 0, isInitialize = NULL",
+    }
+
+class TMS2Repository(TokenRepository):
+    table = "token_ms"
+    id_column = "token_hid"
+    info_columns = ["use_specific_notification", "token_block_status", "token_title", "token_notification", "token_note"]
+    lookup_columns = ["token_hid", "use_specific_notification", "token_block_status", "token_title",
+                      "token_notification", "token_note"]
+    updates = {
+        "block": "token_block_status = 1, token_note = %s",
+        "unblock": "token_block_status = 0, token_note = NULL",
+        "notifications_on": ("use_specific_notification = 1, token_notification_status = 1, token_valid_from = CURDATE(), "
+                             "token_valid_to = '2025-05-19 23:59:59', token_title = %s, token_notification = %s"),
+        "notifications_off": ("use_specific_notification = NULL, token_notification_status = 0, token_valid_from = NULL, "
+                              "token_valid_to = NULL, token_title = NULL, token_notification = NULL"),
+    }
@@ -0,0 +1,71 @@
+import os
+import sys
+import json
+import time
+import logging
+from contextlib import contextmanager
+import app_config
+
+REPORT_ENV = "CTS_STARTUP_REPORT"
+
+# Diagnostics only; stdout carries the CLI's JSON output
+logger = logging.getLogger("cts.startup")
+
+class StartupTimer:
+    """
+    Records how long application startup takes: the time spent in each group of imports (and which
+    top-level packages they pulled in) and named milestones such as the login and main windows.
+    """
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.imports = []
+        self.marks = []
+
+    def elapsed(self):
+        return round(time.perf_counter() - self.started, 4)
+
+    @contextmanager
+    def importing(self, label):
+        """Times the imports done inside the with-block."""
+        before = set(sys.modules)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            new_modules = {name.split(".")[0] for name in set(sys.modules) - before}
+            # Only list third-party packages and our own modules; the stdlib ones are noise here
+            packages = sorted(name for name in new_modules
+                              if name not in sys.stdlib_module_names and not name.startswith("_"))
+            self.imports.append({"label": label, "seconds": round(time.perf_counter() - start, 4), "packages": packages})
+
+    def mark(self, name):
+        self.marks.append({"name": name, "at": self.elapsed()})
+
+    def report(self):
+        previous = 0.0
+        marks = []
+        for mark in self.marks:
+            marks.append(dict(mark, since_previous=round(mark["at"] - previous, 4)))
+            previous = mark["at"]
+        return {"imports": self.imports, "marks": marks}
+
+    def write(self, path=None):
+        """Saves the report as JSON (and prints it to stderr if CTS_STARTUP_REPORT is set). Never raises."""
+        report = self.report()
+        path = path or app_config.STARTUP_REPORT_FILE
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2)
+        except OSError as e:
+            logger.warning("Could not write the startup report: %s", e)
+        if os.environ.get(REPORT_ENV):
+            for entry in report["imports"]:
+                print(f"import {entry['label']:<12} {entry['seconds'] * 1000:8.1f} ms  {', '.join(entry['packages'])}",
+                      file=sys.stderr)
+            for mark in report["marks"]:
+                print(f"{mark['name']:<19} {mark['at'] * 1000:8.1f} ms  (+{mark['since_previous'] * 1000:.1f} ms)",
+                      file=sys.stderr)
+        return report
+
+startup_timer = StartupTimer()
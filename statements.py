@@ -0,0 +1,84 @@
+import weakref
+import threading
+from collections import OrderedDict
+import app_config
+from metrics import add_bytes
+
+ID_PLACEHOLDERS = "{id_placeholders}"
+
+_caches = weakref.WeakKeyDictionary()  # server connection -> StatementCache
+_caches_lock = threading.Lock()
+
+def bucket_size(count):
+    """Rounds an ID list length up to the next ID_BUCKET_SIZES entry (lists above the largest keep their length)."""
+    for size in app_config.ID_BUCKET_SIZES:
+        if count <= size:
+            return size
+    return count
+
+def pad_ids(token_ids):
+    """
+    Pads an ID list to its bucket size by repeating the last ID, so an IN list only ever has a few
+    distinct shapes. Repeated values do not change which rows an IN condition matches.
+    """
+    token_ids = list(token_ids)
+    return token_ids + token_ids[-1:] * (bucket_size(len(token_ids)) - len(token_ids))
+
+def build_id_sql(sql_template, count):
+    """Fills the ID placeholder marker of a template with one parameter per ID."""
+    return sql_template.replace(ID_PLACEHOLDERS, ", ".join(["%s"] * count))
+
+class StatementCache:
+    """
+    Server-side prepared statements of one connection, one cursor per statement (least recently
+    used ones are closed past STATEMENT_CACHE_SIZE). Prepared statements die with the server
+    session, so the cache empties itself when the connection was reopened.
+    """
+    def __init__(self, connection_id):
+        self.connection_id = connection_id
+        self._statements = OrderedDict()  # sql -> (sql, cursor)
+
+    def cursor_for(self, conn, sql):
+        entry = self._statements.get(sql)
+        if entry is None:
+            # The prepared cursor only re-uses its statement when it is given the very same string
+            # object again, so the first instance of each SQL string is kept and passed back.
+            entry = (sql, conn.cursor(prepared=True))
+            self._statements[sql] = entry
+            if len(self._statements) > app_config.STATEMENT_CACHE_SIZE:
+                _, (_, old_cursor) = self._statements.popitem(last=False)
+                old_cursor.close()
+        else:
+            self._statements.move_to_end(sql)
+        return entry
+
+    def __contains__(self, sql):
+        return sql in self._statements
+
+    def clear(self):
+        self._statements.clear()
+
+def statement_cache(conn):
+    """Returns the statement cache of the server connection behind conn (pooled wrappers share it)."""
+    raw = getattr(conn, "_cnx", None) or conn
+    connection_id = getattr(raw, "connection_id", None)
+    with _caches_lock:
+        cache = _caches.get(raw)
+        if cache is None or cache.connection_id != connection_id:
+            cache = StatementCache(connection_id)
+            _caches[raw] = cache
+    return cache
+
+def execute(conn, sql, params=()):
+    """Executes sql as a cached prepared statement and returns its (reused) cursor; do not close it."""
+    cache = statement_cache(conn)
+    # Estimated payload for the metrics: the SQL text is only sent when the statement is prepared
+    add_bytes((0 if sql in cache else len(sql.encode())) + sum(len(str(param).encode()) for param in params))
+    sql, cursor = cache.cursor_for(conn, sql)
+    cursor.execute(sql, tuple(params))
+    return cursor
+
+def execute_ids(conn, sql_template, params, token_ids):
+    """Executes a template with an `{id_placeholders}` IN list for token_ids, padded to a bucket size."""
+    padded = pad_ids(token_ids)
+    return execute(conn, build_id_sql(sql_template, len(padded)), tuple(params) + tuple(padded))
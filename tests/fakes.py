@@ -0,0 +1,69 @@
+import mysql.connector
+
+
+class FakeCursor:
+    """Cursor of a FakeConnection: records statements and answers SELECTs from the connection's table."""
+    def __init__(self, conn):
+        self.conn = conn
+        self.rowcount = 0
+        self.column_names = ()
+        self._rows = []
+
+    def execute(self, sql, params=()):
+        self.conn.executed.append((sql, tuple(params)))
+        if sql.startswith("UPDATE"):
+            self.conn.updates += 1
+            if self.conn.updates in self.conn.fail_updates:
+                raise mysql.connector.Error(self.conn.fail_message, errno=self.conn.fail_errno)
+        ids = list(dict.fromkeys(params[self.conn.leading_params(sql):]))
+        self.rowcount = len(ids)
+        if sql.startswith("SELECT"):
+            self._rows = [(token_id, *self.conn.table[token_id]) for token_id in ids if token_id in self.conn.table]
+        else:
+            self.column_names, self._rows = self.conn.responses.get(sql, ((), []))
+
+    def fetchall(self):
+        rows, self._rows = self._rows, []
+        return rows
+
+    def fetchmany(self, size=None):
+        rows, self._rows = self._rows[:size], self._rows[size:]
+        return rows
+
+    def close(self):
+        self.conn.closed_cursors += 1
+
+
+class FakeConnection:
+    """
+    Stands in for a MySQL connection: every UPDATE counts its distinct IDs as affected rows, the
+    updates numbered in fail_updates (1-based) raise, and SHOW statements answer from responses.
+    """
+    def __init__(self, table=None, fail_updates=(), fail_errno=None, fail_message="Lost connection", responses=None):
+        self.table = table or {}  # token_id -> tuple of column values returned by SELECTs
+        self.fail_updates = set(fail_updates)
+        self.fail_errno = fail_errno
+        self.fail_message = fail_message
+        self.responses = responses or {}  # statement -> (column_names, rows)
+        self.executed = []
+        self.updates = 0
+        self.commits = 0
+        self.rollbacks = 0
+        self.closed_cursors = 0
+
+    @staticmethod
+    def leading_params(sql):
+        """Number of parameters before the IN list (the SET values of an UPDATE)."""
+        return sql.split(" IN (")[0].count("%s")
+
+    def cursor(self, **kwargs):
+        return FakeCursor(self)
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        self.rollbacks += 1
+
+    def statements(self, prefix):
+        return [(sql, params) for sql, params in self.executed if sql.startswith(prefix)]
@@ -0,0 +1,77 @@
+import os
+import gzip
+import json
+import pytest
+from audit_index import AuditIndex, parse_text_line
+
+
+def _record(operation, *token_ids):
+    return json.dumps({"time": "2026-01-05T10:00:00", "operation": operation, "status": "ok",
+                       "token_ids": list(token_ids)}) + "\n"
+
+
+@pytest.fixture
+def log_dir(tmp_path):
+    os.makedirs(tmp_path / "log" / "2026" / "01")
+    return tmp_path / "log"
+
+
+@pytest.fixture
+def index(tmp_path, log_dir):
+    return AuditIndex(str(tmp_path / "index.sqlite3"), str(log_dir))
+
+
+def _append(path, text):
+    with open(path, "a", encoding="utf-8", newline="") as f:
+        f.write(text)
+
+
+def test_update_reads_only_appended_records(index, log_dir):
+    path = log_dir / "2026" / "01" / "TMS1.jsonl"
+    _append(path, _record("block", "A1", "A2"))
+    assert index.update() == 1
+    assert index.update() == 0
+
+    # A record still being written is left for the next update
+    partial = _record("unblock", "A1")
+    _append(path, _record("block", "A3") + partial[:10])
+    assert index.update() == 1
+    _append(path, partial[10:])
+    assert index.update() == 1
+    assert sorted(row[3] for row in index.search("A1")) == ["block", "unblock"]
+    assert index.search("A*")[0][8] == os.path.join("2026", "01", "TMS1.jsonl")
+
+
+def test_truncated_file_is_reindexed(index, log_dir):
+    path = log_dir / "2026" / "01" / "TMS1.jsonl"
+    _append(path, _record("block", "A1") + _record("block", "A2"))
+    index.update()
+    path.write_text(_record("unblock", "B1"), encoding="utf-8")
+    assert index.update() == 1
+    assert index.search("A1") == []
+    assert len(index.search("B1")) == 1
+
+
+def test_compressed_month_continues_from_the_plain_offset(index, log_dir):
+    path = log_dir / "2026" / "01" / "TMS1.jsonl"
+    _append(path, _record("block", "A1"))
+    index.update()
+    # The month is closed with one more record, then compressed
+    _append(path, _record("block", "A2"))
+    with open(path, "rb") as plain, gzip.open(str(path) + ".gz", "wb") as compressed:
+        compressed.write(plain.read())
+
+    # While the plain file is left over from the compression, only the .gz is read
+    assert index.update() == 1
+    os.remove(path)
+    assert index.update() == 0
+    gz_key = os.path.join("2026", "01", "TMS1.jsonl.gz")
+    assert [row[8] for row in index.search("A*")] == [gz_key, gz_key]
+    assert index.rebuild() == 2
+
+
+def test_legacy_text_lines():
+    event = parse_text_line("2025-03-01 11:22:01,780 - INFO - ['A1', 'A2'] - Block (partial)\n", "TMS1")
+    assert (event["operation"], event["status"], event["token_ids"]) == ("Block", "partial", ["A1", "A2"])
+    assert parse_text_line("2025-03-01 11:22:01,780 - INFO - Uninitialized Token ID: A9", "TMS1")["token_ids"] == ["A9"]
+    assert parse_text_line("not a log line", "TMS1") is None
@@ -0,0 +1,85 @@
+import threading
+import pytest
+from fakes import FakeConnection
+from batch_writer import chunked, run_batch_update, run_batch_select, BatchError, BatchCancelled
+from statements import ID_PLACEHOLDERS
+
+UPDATE_SQL = f"UPDATE token SET IsBlock = %s WHERE TokenID IN ({ID_PLACEHOLDERS})"
+SELECT_SQL = f"SELECT TokenID, IsBlock FROM token WHERE TokenID IN ({ID_PLACEHOLDERS})"
+IDS = [f"T{i}" for i in range(250)]
+
+
+def test_chunked_splits_in_order():
+    assert chunked(list(range(7)), 3) == [[0, 1, 2], [3, 4, 5], [6]]
+    assert chunked([], 3) == []
+
+
+def test_chunked_rejects_empty_chunks():
+    with pytest.raises(ValueError):
+        chunked([1, 2], 0)
+
+
+def test_update_commits_every_chunk():
+    conn = FakeConnection()
+    progress = []
+    affected = run_batch_update(conn, UPDATE_SQL, (1,), IDS, chunk_size=100,
+                                progress_callback=lambda *args: progress.append(args))
+    assert affected == 250
+    assert conn.commits == 3
+    assert progress == [(1, 3, 100), (2, 3, 200), (3, 3, 250)]
+    # The SET value comes first, then the (padded) chunk
+    assert conn.statements("UPDATE")[2][1][:2] == (1, "T200")
+
+
+def test_partial_failure_reports_committed_chunks():
+    conn = FakeConnection(fail_updates={2})
+    checkpoints = []
+    with pytest.raises(BatchError) as raised:
+        run_batch_update(conn, UPDATE_SQL, (1,), IDS, chunk_size=100,
+                         checkpoint_callback=lambda *args: checkpoints.append(args))
+    error = raised.value
+    assert not isinstance(error, BatchCancelled)
+    assert error.affected_rows == 100
+    assert error.committed_ids == IDS[:100]
+    assert "1/3 chunks (100 records) were committed" in str(error)
+    assert checkpoints == [(0, 100, None), (1, 0, "Lost connection")]
+    assert conn.commits == 1 and conn.rollbacks == 1
+    assert len(conn.statements("UPDATE")) == 2  # the third chunk never ran
+
+
+def test_partial_failure_across_connections():
+    connections = [FakeConnection(), FakeConnection(fail_updates={1})]
+    with pytest.raises(BatchError) as raised:
+        run_batch_update(connections, UPDATE_SQL, (1,), IDS, chunk_size=100)
+    # The healthy connection may or may not reach its second chunk before the failure stops it
+    committed = raised.value.committed_ids
+    assert committed in (IDS[:100], IDS[:100] + IDS[200:])
+    assert raised.value.affected_rows == len(committed)
+
+
+def test_cancel_between_chunks():
+    cancel_event = threading.Event()
+    with pytest.raises(BatchCancelled) as raised:
+        run_batch_update(FakeConnection(), UPDATE_SQL, (1,), IDS, chunk_size=100, cancel_event=cancel_event,
+                         progress_callback=lambda *args: cancel_event.set())
+    assert raised.value.committed_ids == IDS[:100]
+
+
+def test_snapshot_of_committed_chunks_only():
+    conn = FakeConnection(table={token_id: (0,) for token_id in IDS}, fail_updates={3})
+    snapshots = {}
+    with pytest.raises(BatchError):
+        run_batch_update(conn, UPDATE_SQL, (1,), IDS, chunk_size=100, snapshot_sql=SELECT_SQL + " FOR UPDATE",
+                         snapshot_callback=lambda index, rows: snapshots.update({index: rows}))
+    assert sorted(snapshots) == [0, 1]
+    assert snapshots[1][0] == ("T100", 0)
+    assert len(snapshots[1]) == 100
+    # Each chunk is read right before its own update, inside the same transaction
+    kinds = [sql.split()[0] for sql, _ in conn.executed]
+    assert kinds == ["SELECT", "UPDATE"] * 3
+
+
+def test_select_reads_every_chunk():
+    conn = FakeConnection(table={token_id: (1,) for token_id in IDS[::2]})
+    rows = run_batch_select(conn, SELECT_SQL, (), IDS, chunk_size=100, fetch_size=7)
+    assert rows == [(token_id, 1) for token_id in IDS[::2]]
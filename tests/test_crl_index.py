@@ -0,0 +1,88 @@
+from datetime import datetime, timedelta, timezone
+import pytest
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.asymmetric import ec
+from cryptography.hazmat.primitives.serialization import Encoding
+from cryptography.x509.oid import NameOID
+from crl_index import CRLStore, UNKNOWN, check_serials, _entry_records
+
+ISSUER = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "Test CA")])
+KEY = ec.generate_private_key(ec.SECP256R1())
+REVOKED_AT = datetime(2026, 1, 2, 3, 4, 5)
+
+
+def _write_crl(path, number, revoked, base_number=None):
+    """Writes a CRL revoking {serial: reason or None}; a delta CRL when base_number is given."""
+    builder = (x509.CertificateRevocationListBuilder().issuer_name(ISSUER)
+               .last_update(REVOKED_AT).next_update(REVOKED_AT + timedelta(days=7)))
+    if number is not None:
+        builder = builder.add_extension(x509.CRLNumber(number), critical=False)
+    if base_number is not None:
+        builder = builder.add_extension(x509.DeltaCRLIndicator(base_number), critical=True)
+    for serial, reason in revoked.items():
+        entry = x509.RevokedCertificateBuilder().serial_number(serial).revocation_date(REVOKED_AT)
+        if reason is not None:
+            entry = entry.add_extension(x509.CRLReason(reason), critical=False)
+        builder = builder.add_revoked_certificate(entry.build())
+    path.write_bytes(builder.sign(KEY, hashes.SHA256()).public_bytes(Encoding.DER))
+    return str(path)
+
+
+@pytest.fixture
+def store(tmp_path):
+    return CRLStore(str(tmp_path / "crl"))
+
+
+def test_lookup_finds_revoked_serials(tmp_path, store):
+    revoked = {5: x509.ReasonFlags.key_compromise, 0xABCDEF: None, 2 ** 150: x509.ReasonFlags.superseded}
+    index, message = store.import_crl(_write_crl(tmp_path / "full.crl", 1, revoked))
+    assert message.startswith("Index built from full CRL: Test CA - CRL #1 - 3 entries")
+    found = index.lookup([5, 6, 0xABCDEF, 2 ** 150, 0, -1, 2 ** 200])
+    assert found[5] == (int(REVOKED_AT.replace(tzinfo=timezone.utc).timestamp()), "key_compromise")
+    assert found[0xABCDEF][1] == "" and found[2 ** 150][1] == "superseded"
+    assert found[6] is found[0] is None
+    # Serials the index cannot hold are never reported as not revoked
+    assert found[-1] == found[2 ** 200] == UNKNOWN
+    assert [other.count for other in store.list_indexes()] == [3]
+
+
+def test_check_serials_reports_each_input(tmp_path, store):
+    index, _ = store.import_crl(_write_crl(tmp_path / "full.crl", 1, {0x1F: None}))
+    results = check_serials(index, ["0x1f", "20", "zz", ""])
+    assert [(result["serial"], result["status"]) for result in results] == [
+        ("1F", "REVOKED"), ("20", "NOT REVOKED"), ("", "INVALID")]
+    assert [result["status"] for result in check_serials(index, ["31"], "decimal")] == ["REVOKED"]
+    assert check_serials(index, ["1" + "0" * 41])[0]["status"] == "UNKNOWN"
+
+
+def test_entries_that_do_not_fit_are_counted():
+    class Entry:
+        extensions = []
+        revocation_date_utc = REVOKED_AT.replace(tzinfo=timezone.utc)
+
+        def __init__(self, serial_number):
+            self.serial_number = serial_number
+
+    records, skipped = _entry_records([Entry(5), Entry(-5), Entry(2 ** 170)])
+    assert [key[-1] for key, _ in records] == [5]
+    assert skipped == 2
+
+
+def test_delta_crl_is_merged(tmp_path, store):
+    store.import_crl(_write_crl(tmp_path / "full.crl", 1, {5: None, 7: None}))
+    delta = {7: x509.ReasonFlags.remove_from_crl, 9: None}
+    index, message = store.import_crl(_write_crl(tmp_path / "delta.crl", 2, delta, base_number=1))
+    assert message.startswith("Index merged delta CRL")
+    assert index.count == 2
+    assert [serial for serial, hit in index.lookup([5, 7, 9]).items() if hit] == [5, 9]
+
+
+def test_older_or_unordered_crls_are_rejected(tmp_path, store):
+    store.import_crl(_write_crl(tmp_path / "full2.crl", 2, {5: None}))
+    index, message = store.import_crl(_write_crl(tmp_path / "full1.crl", 1, {6: None}))
+    assert "skipped" in message and index.lookup([6])[6] is None
+    with pytest.raises(ValueError):
+        store.import_crl(_write_crl(tmp_path / "delta.crl", 4, {6: None}, base_number=3))
+    with pytest.raises(ValueError):
+        store.import_crl(_write_crl(tmp_path / "unnumbered.crl", None, {6: None}, base_number=2))
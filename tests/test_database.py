@@ -0,0 +1,55 @@
+import threading
+import mysql.connector
+from database import ConnectionManager
+
+
+class PooledConnection:
+    def __init__(self, fail_rollback=False):
+        self.calls = []
+        self.fail_rollback = fail_rollback
+
+    def ping(self, **kwargs):
+        self.calls.append("ping")
+
+    def rollback(self):
+        self.calls.append("rollback")
+        if self.fail_rollback:
+            raise mysql.connector.Error("Lost connection")
+
+    def close(self):
+        self.calls.append("close")
+
+
+class FakePool:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def get_connection(self):
+        return self.conn
+
+
+def _manager(conn):
+    manager = ConnectionManager(pool_size=1, keepalive_interval=3600)
+    manager._pools["TMS1"] = FakePool(conn)
+    manager._slots["TMS1"] = threading.BoundedSemaphore(1)
+    return manager
+
+
+def test_release_ends_the_borrowers_transaction():
+    conn = PooledConnection()
+    manager = _manager(conn)
+    with manager.connection("TMS1"):
+        pass
+    assert conn.calls == ["ping", "rollback", "close"]
+    assert manager._slots["TMS1"].acquire(blocking=False)
+    manager._stop_event.set()
+
+
+def test_release_returns_the_connection_when_rollback_fails():
+    conn = PooledConnection(fail_rollback=True)
+    manager = _manager(conn)
+    with manager.connection("TMS1"):
+        pass
+    assert conn.calls[-1] == "close"
+    assert manager._slots["TMS1"].acquire(blocking=False)
+    manager._stop_event.set()
@@ -0,0 +1,57 @@
+import pytest
+from id_list import normalize_token_id, parse_ids_from_text, load_ids_from_file
+
+
+def _write(tmp_path, name, text):
+    path = tmp_path / name
+    path.write_text(text, encoding="utf-8")
+    return str(path)
+
+
+def test_normalize_strips_bom_quotes_and_whitespace():
+    assert normalize_token_id(' ﻿"ABC-1" \n') == "ABC-1"
+
+
+def test_text_lines_are_deduplicated_and_validated():
+    id_list = parse_ids_from_text(["A1", " A1 ", "", "B 2", "C3"])
+    assert id_list.ids == ["A1", "C3"]
+    assert (id_list.total, id_list.duplicates, id_list.invalid) == (4, 1, ["B 2"])
+    assert id_list.summary() == "2 unique IDs (1 duplicates, 1 invalid skipped)"
+
+
+def test_plain_file_reads_one_id_per_line(tmp_path):
+    path = _write(tmp_path, "ids.txt", "﻿A1\nA2\r\nA1\n")
+    id_list = load_ids_from_file(path)
+    assert (id_list.ids, id_list.source) == (["A1", "A2"], "ids.txt")
+
+
+def test_csv_uses_the_token_id_header(tmp_path):
+    path = _write(tmp_path, "ids.csv", "name;TokenID\nfirst;A1\nsecond;A2\n")
+    assert load_ids_from_file(path).ids == ["A1", "A2"]
+
+
+def test_csv_without_header_uses_the_first_column(tmp_path):
+    path = _write(tmp_path, "ids.csv", "A1,x\nA2,y\n")
+    assert load_ids_from_file(path).ids == ["A1", "A2"]
+
+
+def test_csv_named_column(tmp_path):
+    path = _write(tmp_path, "ids.csv", "serial,Token\n1,A1\n2,A2\n")
+    assert load_ids_from_file(path, column="token").ids == ["A1", "A2"]
+    with pytest.raises(ValueError):
+        load_ids_from_file(path, column="missing")
+
+
+def test_indexed_column_skips_a_header_row(tmp_path):
+    path = _write(tmp_path, "ids.csv", "Serial,Token ID\n1,A1\n2,A2\n")
+    assert load_ids_from_file(path, column=1).ids == ["A1", "A2"]
+
+
+def test_indexed_column_keeps_a_first_data_row(tmp_path):
+    path = _write(tmp_path, "ids.csv", "1,A1\n2,A2\n")
+    assert load_ids_from_file(path, column=1).ids == ["A1", "A2"]
+
+
+def test_indexed_column_keeps_a_numeric_first_row(tmp_path):
+    path = _write(tmp_path, "ids.csv", "1,100200\n2,100201\n3,100202\n")
+    assert load_ids_from_file(path, column=1).ids == ["100200", "100201", "100202"]
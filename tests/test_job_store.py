@@ -0,0 +1,124 @@
+import os
+import sqlite3
+import time
+import logging
+import pytest
+import app_config
+import functions
+import job_store
+import undo_journal
+from fakes import FakeConnection
+from batch_writer import BatchError
+from job_store import JobStore
+from repository import TMS1Repository
+from undo_journal import UndoJournal
+
+IDS = [f"T{i}" for i in range(5)]
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(app_config, "BATCH_CHUNK_SIZE", 2)
+    store = JobStore(str(tmp_path / "jobs.sqlite3"))
+    monkeypatch.setattr(job_store, "_default_store", store)
+    monkeypatch.setattr(undo_journal, "_default_journal", UndoJournal(str(tmp_path / "undo.sqlite3")))
+    return store
+
+
+def _run_chunks(store, job_id):
+    return [index for index, _ in store.chunks_to_run(job_id)]
+
+
+def test_create_splits_into_chunks(store):
+    job_id = store.create("TMS1", TMS1Repository, "block", "Block", ("note",), IDS, "note")
+    assert store.chunks_to_run(job_id) == [(0, ["T0", "T1"]), (1, ["T2", "T3"]), (2, ["T4"])]
+    job = store.job(job_id)
+    assert (job["status"], job["params"], job["chunk_size"]) == ("pending", ["note"], 2)
+
+
+def test_checkpoints_select_the_chunks_to_resume(store):
+    job_id = store.create("TMS1", TMS1Repository, "block", "Block", ("note",), IDS)
+    store.start(job_id)
+    store.checkpoint(job_id, 0, 2)
+    store.checkpoint(job_id, 1, 0, "Deadlock found")
+    store.finish(job_id, "failed", "Deadlock found")
+    assert store.job(job_id)["status"] == "failed"
+    assert _run_chunks(store, job_id) == [1, 2]
+    assert [index for index, _ in store.chunks_to_run(job_id, failed_only=True)] == [1]
+
+
+def test_finish_marks_complete_jobs_done(store):
+    job_id = store.create("TMS1", TMS1Repository, "block", "Block", ("note",), IDS)
+    store.start(job_id)
+    for index in range(3):
+        store.checkpoint(job_id, index, 1)
+    store.finish(job_id, "pending")
+    assert store.job(job_id)["status"] == "done"
+
+
+def test_start_refuses_a_running_job(store):
+    job_id = store.create("TMS1", TMS1Repository, "block", "Block", ("note",), IDS)
+    store.start(job_id)
+    with pytest.raises(ValueError):
+        store.start(job_id)
+
+
+def test_reopening_interrupts_only_orphaned_jobs(store):
+    live, dead, stale = (store.create("TMS1", TMS1Repository, "block", "Block", ("note",), IDS) for _ in range(3))
+    for job_id in (live, dead, stale):
+        store.start(job_id)
+    store._db.execute("UPDATE batch_job SET owner_pid = ? WHERE id = ?", (2 ** 22 + 1, dead))
+    store._db.execute("UPDATE batch_job SET heartbeat = ? WHERE id = ?", (time.time() - 10 ** 6, stale))
+    store._db.commit()
+    reopened = JobStore(store.path)
+    statuses = {job_id: reopened.job(job_id)["status"] for job_id in (live, dead, stale)}
+    assert statuses == {live: "running", dead: "interrupted", stale: "interrupted"}
+    assert os.getpid() == reopened.job(live)["owner_pid"]
+
+
+def test_failed_run_resumes_and_retries(store):
+    logger = logging.getLogger("TMS1")
+    with pytest.raises(BatchError) as raised:
+        functions.block_tms1([FakeConnection(fail_updates={2})], IDS, "note", logger)
+    assert raised.value.committed_ids == ["T0", "T1"]
+    job_id = store.jobs("TMS1", "token")[0][0]
+    assert store.job(job_id)["status"] == "failed"
+
+    # Retrying the failed chunk leaves the never-run chunk pending
+    assert functions.resume_batch_job(FakeConnection(), TMS1Repository, job_id, logger, failed_only=True) == 2
+    assert store.job(job_id)["status"] == "pending"
+    assert _run_chunks(store, job_id) == [2]
+
+    conn = FakeConnection()
+    assert functions.resume_batch_job(conn, TMS1Repository, job_id, logger) == 1
+    assert [params[-1] for _, params in conn.statements("UPDATE")] == ["T4"]
+    assert store.job(job_id)["status"] == "done"
+    with pytest.raises(ValueError):
+        functions.resume_batch_job(FakeConnection(), TMS1Repository, job_id, logger)
+
+
+def test_resume_checks_the_section(store):
+    job_id = store.create("TMS1", TMS1Repository, "block", "Block", ("note",), IDS)
+    with pytest.raises(ValueError):
+        functions.resume_batch_job(FakeConnection(), TMS1Repository, job_id, logging.getLogger("TMS2"))
+
+
+def test_failing_checkpoint_still_reports_committed_chunks(store, monkeypatch):
+    checkpoint = store.checkpoint
+
+    def failing_checkpoint(job_id, chunk_index, affected, error=None):
+        if chunk_index == 1:
+            raise sqlite3.OperationalError("database is locked")
+        checkpoint(job_id, chunk_index, affected, error)
+    monkeypatch.setattr(store, "checkpoint", failing_checkpoint)
+    invalidated = []
+    monkeypatch.setattr(functions.token_info_cache, "invalidate", invalidated.extend)
+
+    with pytest.raises(BatchError) as raised:
+        functions.block_tms1([FakeConnection()], IDS, "note", logging.getLogger("TMS1"))
+    # The second chunk committed before its checkpoint failed
+    assert raised.value.committed_ids == ["T0", "T1", "T2", "T3"]
+    assert "database is locked" in str(raised.value)
+    assert invalidated == ["T0", "T1", "T2", "T3"]
+    assert undo_journal._default_journal.operations("TMS1", "token")[0][5] == "partial"
+    assert store.job(store.jobs("TMS1", "token")[0][0])["status"] == "failed"
@@ -0,0 +1,40 @@
+from datetime import datetime, timedelta, timezone
+from cryptography.x509.ocsp import OCSPCertStatus
+from ocsp_cache import OCSPResponseCache
+
+KEY = (b"name-hash", b"key-hash", "1F")
+
+
+class Response:
+    def __init__(self, next_update, certificate_status=OCSPCertStatus.GOOD):
+        self.next_update = next_update
+        self.certificate_status = certificate_status
+
+
+def _expiry(cache):
+    row = cache._db.execute("SELECT expires_at FROM ocsp_response").fetchone()
+    return row and row[0]
+
+
+def _in(hours):
+    return (datetime.now(timezone.utc) + timedelta(hours=hours)).replace(tzinfo=None)
+
+
+def test_response_is_kept_until_next_update(tmp_path):
+    cache = OCSPResponseCache(str(tmp_path / "ocsp.sqlite3"), max_age=24 * 3600)
+    cache.put(KEY, Response(_in(2)), b"der")
+    assert abs(_expiry(cache) - _in(2).replace(tzinfo=timezone.utc).timestamp()) < 5
+
+
+def test_max_age_caps_a_distant_next_update(tmp_path):
+    cache = OCSPResponseCache(str(tmp_path / "ocsp.sqlite3"), max_age=3600)
+    cache.put(KEY, Response(_in(48)), b"der")
+    assert abs(_expiry(cache) - _in(1).replace(tzinfo=timezone.utc).timestamp()) < 5
+
+
+def test_responses_without_next_update_or_known_status_are_not_cached(tmp_path):
+    cache = OCSPResponseCache(str(tmp_path / "ocsp.sqlite3"))
+    cache.put(KEY, Response(None), b"der")
+    cache.put(KEY, Response(_in(2), OCSPCertStatus.UNKNOWN), b"der")
+    cache.put(KEY, Response(_in(-1)), b"der")
+    assert _expiry(cache) is None
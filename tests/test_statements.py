@@ -0,0 +1,47 @@
+import app_config
+from fakes import FakeConnection
+from statements import ID_PLACEHOLDERS, bucket_size, pad_ids, build_id_sql, execute_ids, statement_cache
+
+SQL = f"UPDATE token SET IsBlock = %s WHERE TokenID IN ({ID_PLACEHOLDERS})"
+
+
+def test_bucket_size_rounds_up(monkeypatch):
+    monkeypatch.setattr(app_config, "ID_BUCKET_SIZES", (1, 10, 50))
+    assert [bucket_size(count) for count in (1, 2, 10, 11, 50, 51)] == [1, 10, 10, 50, 50, 51]
+
+
+def test_pad_ids_repeats_the_last_id(monkeypatch):
+    monkeypatch.setattr(app_config, "ID_BUCKET_SIZES", (1, 10, 50))
+    padded = pad_ids(["a", "b", "c"])
+    assert len(padded) == 10
+    assert padded[:3] == ["a", "b", "c"]
+    assert set(padded[3:]) == {"c"}
+    assert pad_ids(["a"]) == ["a"]
+    assert pad_ids([]) == []
+
+
+def test_build_id_sql():
+    assert build_id_sql(SQL, 3).endswith("IN (%s, %s, %s)")
+
+
+def test_execute_ids_reuses_one_statement_per_bucket(monkeypatch):
+    monkeypatch.setattr(app_config, "ID_BUCKET_SIZES", (1, 10, 50))
+    conn = FakeConnection()
+    execute_ids(conn, SQL, (1,), ["a", "b", "c"])
+    execute_ids(conn, SQL, (1,), [str(i) for i in range(7)])
+    execute_ids(conn, SQL, (1,), [str(i) for i in range(11)])
+    (sql_3, params_3), (sql_7, _), (sql_11, _) = conn.statements("UPDATE")
+    assert sql_3 is sql_7  # the cached string object is passed back to the prepared cursor
+    assert sql_3.count("%s") == 11 and sql_11.count("%s") == 51
+    assert params_3 == (1, "a", "b", "c") + ("c",) * 7
+
+
+def test_statement_cache_closes_least_recently_used(monkeypatch):
+    monkeypatch.setattr(app_config, "STATEMENT_CACHE_SIZE", 2)
+    conn = FakeConnection()
+    cache = statement_cache(conn)
+    for sql in ("SELECT 1", "SELECT 2", "SELECT 1", "SELECT 3"):
+        cache.cursor_for(conn, sql)
+    assert "SELECT 1" in cache and "SELECT 3" in cache
+    assert "SELECT 2" not in cache
+    assert conn.closed_cursors == 1
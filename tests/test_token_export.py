@@ -0,0 +1,81 @@
+import threading
+import pytest
+import app_config
+from token_export import build_export_query, export_tokens
+
+ROWS = [(f"T{i}", 1) for i in range(25)]
+
+
+class StreamingConnection:
+    """Serves ROWS through an unbuffered cursor and tracks whether a result is left unread."""
+    def __init__(self):
+        self.unread_result = False
+        self.consumed = False
+
+    def cursor(self, buffered=True):
+        return StreamingCursor(self)
+
+    def consume_results(self):
+        self.unread_result = False
+        self.consumed = True
+
+
+class StreamingCursor:
+    def __init__(self, conn):
+        self.conn = conn
+        self.rows = []
+
+    def execute(self, sql):
+        self.rows = [(len(ROWS),)] if sql.startswith("SELECT COUNT") else list(ROWS)
+        self.conn.unread_result = not sql.startswith("SELECT COUNT")
+
+    def fetchone(self):
+        return self.rows.pop(0)
+
+    def fetchmany(self, size):
+        batch, self.rows = self.rows[:size], self.rows[size:]
+        if not batch:
+            self.conn.unread_result = False
+        return batch
+
+    def close(self):
+        pass
+
+
+@pytest.fixture(autouse=True)
+def fetch_size(monkeypatch):
+    monkeypatch.setattr(app_config, "FETCH_SIZE", 10)
+
+
+def test_export_streams_every_row(tmp_path):
+    conn = StreamingConnection()
+    path = tmp_path / "tokens.csv"
+    assert export_tokens(conn, "tms1", ["TokenID", "IsBlock"], [], str(path)) == 25
+    assert path.read_text(encoding="utf-8").splitlines()[:2] == ["TokenID,IsBlock", "T0,1"]
+    assert not conn.consumed
+
+
+def test_failed_export_drains_the_result(tmp_path):
+    conn = StreamingConnection()
+
+    def fail(written, total, _):
+        raise OSError("No space left on device")
+    with pytest.raises(OSError):
+        export_tokens(conn, "tms1", ["TokenID", "IsBlock"], [], str(tmp_path / "tokens.csv"), progress_callback=fail)
+    assert conn.consumed and not conn.unread_result
+
+
+def test_cancelled_export_drains_the_result(tmp_path):
+    conn = StreamingConnection()
+    cancel_event = threading.Event()
+    written = export_tokens(conn, "tms1", ["TokenID", "IsBlock"], [], str(tmp_path / "tokens.jsonl"), "jsonl",
+                            progress_callback=lambda *args: cancel_event.set(), cancel_event=cancel_event)
+    assert written == 10
+    assert conn.consumed and not conn.unread_result
+
+
+def test_export_query_only_takes_known_columns_and_filters():
+    assert build_export_query("tms1", ["TokenID"], ["Only blocked tokens"])[0] == \
+        "SELECT TokenID FROM token WHERE IsBlock = 1"
+    with pytest.raises(ValueError):
+        build_export_query("tms1", ["TokenID; DROP TABLE token"], [])
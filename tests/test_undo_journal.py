@@ -0,0 +1,85 @@
+import json
+from datetime import datetime
+from decimal import Decimal
+import pytest
+from fakes import FakeConnection
+from repository import TMS1Repository
+from undo_journal import UndoJournal
+
+
+@pytest.fixture
+def journal(tmp_path):
+    return UndoJournal(str(tmp_path / "undo.sqlite3"))
+
+
+def _entry(journal, rows_per_chunk):
+    operation_id = journal.begin("TMS1", TMS1Repository, TMS1Repository.updated_columns("block"), "Block", 5, "note")
+    for rows in rows_per_chunk:
+        journal.add_rows(operation_id, rows)
+    journal.finish(operation_id, "ok", 5)
+    return operation_id
+
+
+def test_identical_prior_values_are_stored_once(journal):
+    unblocked, blocked = (0, None, None), (1, 1, "old note")
+    operation_id = _entry(journal, [[("T1", *unblocked), ("T2", *blocked)],
+                                    [("T3", *unblocked), ("T4", *unblocked), ("T5", *blocked)]])
+    values = journal._db.execute("SELECT value_id, prior FROM undo_value WHERE operation_id = ? ORDER BY value_id",
+                                 (operation_id,)).fetchall()
+    assert [json.loads(prior) for _, prior in values] == [list(unblocked), list(blocked)]
+    assert journal._db.execute("SELECT COUNT(*) FROM undo_row WHERE operation_id = ?", (operation_id,)).fetchone()[0] == 5
+
+
+def test_values_of_other_types_are_journaled(journal):
+    operation_id = _entry(journal, [[("T1", Decimal("1.5"), datetime(2026, 1, 2, 3, 4, 5), b"note")]])
+    prior = journal._db.execute("SELECT prior FROM undo_value WHERE operation_id = ?", (operation_id,)).fetchone()[0]
+    assert json.loads(prior) == ["1.5", "2026-01-02 03:04:05", "note"]
+
+
+def test_undo_restores_each_group_with_one_update(journal):
+    operation_id = _entry(journal, [[("T1", 0, None, None), ("T2", 1, 1, "old")], [("T3", 0, None, None)]])
+    conn = FakeConnection()
+    operation, token_ids, restored = journal.undo(conn, operation_id, "TMS1", TMS1Repository)
+    assert (operation, sorted(token_ids), restored) == ("Block", ["T1", "T2", "T3"], 3)
+    updates = conn.statements("UPDATE")
+    assert len(updates) == 2
+    assert updates[0][0].startswith("UPDATE token SET IsBlock = %s, isPushNotice = %s, NoticeInfo = %s")
+    assert updates[0][1][:5] == (0, None, None, "T1", "T3")
+    assert updates[1][1][:4] == (1, 1, "old", "T2")
+    statuses = {row[0]: row[5] for row in journal.operations("TMS1", "token")}
+    assert statuses[operation_id] == "undone"
+
+
+def test_undo_is_journaled_and_can_be_undone(journal):
+    operation_id = _entry(journal, [[("T1", 0, None, None), ("T2", 0, None, None)]])
+    # A later operation blocked T2 after the journaled one
+    conn = FakeConnection(table={"T1": (1, 1, "first"), "T2": (1, 1, "later block")})
+    journal.undo(conn, operation_id, "TMS1", TMS1Repository)
+    undo_id, _, operation, token_count, affected, status, _ = journal.operations("TMS1", "token")[0]
+    assert (operation, token_count, affected, status) == (f"Undo Block (#{operation_id})", 2, 2, "ok")
+    # The values the undo overwrote were read in its own transaction, right before the restore
+    assert [sql.split()[0] for sql, _ in conn.executed] == ["SELECT", "UPDATE"]
+
+    redo = FakeConnection()
+    _, token_ids, restored = journal.undo(redo, undo_id, "TMS1", TMS1Repository)
+    assert sorted(token_ids) == ["T1", "T2"] and restored == 2
+    assert sorted(params[:4] for _, params in redo.statements("UPDATE")) == [(1, 1, "first", "T1"),
+                                                                             (1, 1, "later block", "T2")]
+
+
+def test_undo_rejects_repeated_or_foreign_entries(journal):
+    operation_id = _entry(journal, [[("T1", 0, None, None)]])
+    with pytest.raises(ValueError):
+        journal.undo(FakeConnection(), operation_id, "TMS2", TMS1Repository)
+    journal.undo(FakeConnection(), operation_id, "TMS1", TMS1Repository)
+    with pytest.raises(ValueError):
+        journal.undo(FakeConnection(), operation_id, "TMS1", TMS1Repository)
+
+
+def test_old_entries_are_pruned(tmp_path):
+    journal = UndoJournal(str(tmp_path / "undo.sqlite3"), max_operations=2)
+    first = _entry(journal, [[("T1", 0, None, None)]])
+    for _ in range(2):
+        _entry(journal, [[("T1", 0, None, None)]])
+    assert [row[0] for row in journal.operations("TMS1", "token")] == [first + 2, first + 1]
+    assert journal._db.execute("SELECT COUNT(*) FROM undo_row WHERE operation_id = ?", (first,)).fetchone()[0] == 0
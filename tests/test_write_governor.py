@@ -0,0 +1,106 @@
+import threading
+import pytest
+import mysql.connector
+import write_governor
+from fakes import FakeConnection
+from write_governor import TokenBucket, WriteGovernor, parse_settings
+
+THREADS_RUNNING = "SHOW GLOBAL STATUS LIKE 'Threads_running'"
+
+
+class FakeClock:
+    """Replaces the time module of write_governor: sleeping only advances the clock."""
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(round(seconds, 6))
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(write_governor, "time", clock)
+    return clock
+
+
+def test_bucket_serves_a_full_burst_without_waiting(clock):
+    bucket = TokenBucket(rate=100, capacity=50)
+    assert bucket.acquire(50)
+    assert clock.sleeps == []
+
+
+def test_bucket_waits_for_refill(clock):
+    bucket = TokenBucket(rate=100, capacity=50)
+    bucket.acquire(50)
+    assert bucket.acquire(20)
+    assert clock.sleeps == [0.2]
+    clock.now += 0.1  # 10 rows refilled
+    assert bucket.acquire(10)
+    assert clock.sleeps == [0.2]
+
+
+def test_bucket_oversized_request_leaves_debt(clock):
+    bucket = TokenBucket(rate=100, capacity=50)
+    assert bucket.acquire(150)  # the bucket is full, so it goes through and owes 100 rows
+    assert bucket.acquire(50)
+    assert clock.sleeps == [1.5]
+
+
+def test_bucket_wait_can_be_cancelled():
+    bucket = TokenBucket(rate=0.001, capacity=1)
+    bucket.acquire(1)
+    cancel_event = threading.Event()
+    cancel_event.set()
+    assert not bucket.acquire(1, cancel_event)
+
+
+def test_governor_backs_off_while_overloaded(clock):
+    governor = WriteGovernor({"max_threads_running": 10, "max_replication_lag": None, "backoff": 1,
+                              "backoff_max": 3, "rows_per_second": None})
+    conn = FakeConnection(responses={THREADS_RUNNING: (("Variable_name", "Value"), [("Threads_running", "40")])})
+    original_sleep = clock.sleep
+
+    def sleep(seconds):
+        original_sleep(seconds)
+        if len(clock.sleeps) == 4:
+            conn.responses[THREADS_RUNNING] = (("Variable_name", "Value"), [("Threads_running", "3")])
+    clock.sleep = sleep
+
+    assert governor.throttle(conn, 100)
+    assert clock.sleeps == [1, 2, 3, 3]
+    assert governor.waiting_reason() == "Threads_running 40 > 10"
+    clock.now += 10
+    assert governor.waiting_reason() is None
+
+
+def test_governor_reads_replication_lag(clock):
+    governor = WriteGovernor({"max_threads_running": None, "max_replication_lag": 5})
+    conn = FakeConnection(responses={"SHOW REPLICA STATUS": (("Seconds_Behind_Source",), [(12,)])})
+    assert governor._check_load(conn) == "replication lag 12s > 5s"
+    conn.responses["SHOW REPLICA STATUS"] = (("Seconds_Behind_Source",), [(1,)])
+    assert governor._check_load(conn) == "replication lag 12s > 5s"  # cached until load_check_interval passed
+    assert governor._check_load(conn, force=True) is None
+
+
+def test_governor_retries_only_lock_errors(clock):
+    governor = WriteGovernor({"lock_retries": 2, "backoff": 1})
+    deadlock = mysql.connector.Error("Deadlock found", errno=1213)
+    assert governor.should_retry(deadlock, 0)
+    assert governor.should_retry(deadlock, 1)
+    assert not governor.should_retry(deadlock, 2)
+    assert not governor.should_retry(mysql.connector.Error("Lost connection", errno=2013), 0)
+    assert clock.sleeps == [1, 2]
+
+
+def test_parse_settings():
+    settings = parse_settings({"write_rows_per_second": " 500 ", "write_max_replication_lag": "off",
+                               "write_lock_retries": "5", "host": "db"})
+    assert settings == {"rows_per_second": 500.0, "max_replication_lag": None, "lock_retries": 5}
+    with pytest.raises(ValueError):
+        parse_settings({"write_burst_rows": "many"})
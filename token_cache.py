@@ -0,0 +1,66 @@
+import time
+import threading
+from collections import OrderedDict
+import app_config
+
+class TokenInfoCache:
+    """
+    Bounded LRU cache of Get Info results keyed by (section, schema, token_id), each entry valid
+    for `ttl` seconds. Batch operations invalidate the IDs they touch in every section, and a fetch
+    that overlapped an invalidation is not stored, so a cached result is never older than the last write.
+    """
+    def __init__(self, max_entries=None, ttl=None):
+        self.max_entries = max_entries or app_config.TOKEN_INFO_CACHE_MAX_ENTRIES
+        self.ttl = ttl or app_config.TOKEN_INFO_CACHE_TTL
+        self._entries = OrderedDict()  # key -> (value, fetched_at)
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Returns (value, fetched_at) for a fresh entry, otherwise None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if time.time() - entry[1] > self.ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def get_or_fetch(self, key, fetch, refresh=False):
+        """
+        Read-through lookup: returns (value, fetched_at, from_cache). `fetch()` is called on a miss,
+        when the entry expired or when refresh is set; None results are not cached.
+        """
+        if not refresh:
+            entry = self.get(key)
+            if entry is not None:
+                return entry[0], entry[1], True
+        with self._lock:
+            generation = self._generation
+        value = fetch()
+        fetched_at = time.time()
+        if value is not None:
+            with self._lock:
+                if generation == self._generation:
+                    self._entries[key] = (value, fetched_at)
+                    self._entries.move_to_end(key)
+                    while len(self._entries) > self.max_entries:
+                        self._entries.popitem(last=False)
+        return value, fetched_at, False
+
+    def invalidate(self, token_ids):
+        """Drops the entries of the given Token IDs in every section."""
+        token_ids = set(token_ids)
+        with self._lock:
+            self._generation += 1
+            for key in [key for key in self._entries if key[-1] in token_ids]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+token_info_cache = TokenInfoCache()
@@ -0,0 +1,108 @@
+import csv
+import gzip
+import json
+from datetime import date, datetime
+from decimal import Decimal
+import mysql.connector
+import app_config
+
+# Exportable columns and predefined filters for each TMS schema.
+EXPORT_SCHEMAS = {
+    "tms1": {
+        "table": "token",
+        "columns": ["TokenID", "MST", "SubjectName", "isPushNotice", "NoticeInfo", "IsBlock", "IsUnblock", "isInitialize"],
+        "filters": {
+            "Only blocked tokens": "IsBlock = 1",
+            "Only tokens with notifications on": "isPushNotice = 1",
+        },
+    },
+    "tms2": {
+        "table": "token_ms",
+        "columns": ["token_hid", "use_specific_notification", "token_notification_status", "token_block_status",
+                    "token_title", "token_notification", "token_note", "token_valid_from", "token_valid_to"],
+        "filters": {
+            "Only blocked tokens": "token_block_status = 1",
+            "Only tokens with notifications on": "use_specific_notification = 1",
+        },
+    },
+}
+
+EXPORT_FORMATS = ["csv", "jsonl"]
+
+def guess_schema(section_name):
+    """Guesses the TMS schema of a config section from its name (TMS2, TMS2_CMC, localtms2 -> tms2)."""
+    return "tms2" if "tms2" in section_name.lower() else "tms1"
+
+def _json_value(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, (bytes, bytearray)):
+        return value.decode("utf-8", errors="replace")
+    return value
+
+def build_export_query(schema, columns, filter_names):
+    """Builds the SELECT for an export from whitelisted column and filter names."""
+    spec = EXPORT_SCHEMAS[schema]
+    unknown = [column for column in columns if column not in spec["columns"]]
+    if unknown or not columns:
+        raise ValueError(f"Invalid export columns: {unknown or 'none selected'}")
+    conditions = [spec["filters"][name] for name in filter_names]
+    where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+    return f"SELECT {', '.join(columns)} FROM {spec['table']}{where}", f"SELECT COUNT(*) FROM {spec['table']}{where}"
+
+def export_tokens(conn, schema, columns, filter_names, path, file_format="csv", compress=False,
+                  progress_callback=None, cancel_event=None):
+    """
+    Streams the selected columns of the schema's token table to a CSV or JSONL file.
+
+    Rows are read with an unbuffered cursor in fetchmany(FETCH_SIZE) batches and written straight
+    to the file (gzip-compressed if requested), so memory use does not grow with the table size.
+    `progress_callback(rows_written, total_rows, None)` is called after every batch.
+    Returns the number of exported rows; a cancelled export leaves a partial file and returns early.
+    """
+    if file_format not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format: {file_format}")
+    query, count_query = build_export_query(schema, columns, filter_names)
+
+    cursor = conn.cursor()
+    try:
+        cursor.execute(count_query)
+        total = cursor.fetchone()[0]
+    finally:
+        cursor.close()
+
+    opener = gzip.open if compress else open
+    written = 0
+    cursor = conn.cursor(buffered=False)
+    try:
+        cursor.execute(query)
+        with opener(path, "wt", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f) if file_format == "csv" else None
+            if writer:
+                writer.writerow(columns)
+            while True:
+                if cancel_event is not None and cancel_event.is_set():
+                    break
+                rows = cursor.fetchmany(app_config.FETCH_SIZE)
+                if not rows:
+                    break
+                if writer:
+                    writer.writerows(rows)
+                else:
+                    f.writelines(json.dumps(dict(zip(columns, map(_json_value, row))), ensure_ascii=False) + "\n"
+                                 for row in rows)
+                written += len(rows)
+                if progress_callback:
+                    progress_callback(written, total, None)
+    finally:
+        # Drain the rest of a streamed result left by a cancel or an error (e.g. a failed write), or
+        # the next borrower of the pooled connection fails with "Unread result found"
+        try:
+            if conn.unread_result:
+                conn.consume_results()
+        except mysql.connector.Error:
+            pass  # the connection is broken; it is validated again when borrowed
+        cursor.close()
+    return written
@@ -1,8 +1,15 @@
+import logging
 import tkinter as tk
-from tkinter import ttk
+from tkinter import ttk, messagebox
+import mysql.connector
 import app_config
-from views import WelcomeView, OCSPView, TMS1View, TMS2View
+from views import WelcomeView, OCSPView, OCSPBulkView, CRLView, TMS1View, TMS2View, ExportView, AuditSearchView, CertInventoryView
 from functions import setup_logging
+from executor import BackgroundExecutor
+from metrics import operation_metrics
+from write_governor import get_governor
+
+logger = logging.getLogger("cts.ui")
 
 # --- Theme Colors and Fonts ---
 COLOR_SIDEBAR_BG = '#2c3e50'
@@ -19,11 +26,13 @@ class MainApplication:
     """
     The main application class that creates and manages the UI.
     """
-    def __init__(self, root, db_connection, section_name):
+    def __init__(self, root, db_manager, section_name, vault=None):
         self.root = root
-        self.conn = db_connection
+        self.db = db_manager
+        self.vault = vault
         self.section_name = section_name
         self.logger = setup_logging(section_name)
+        self.executor = BackgroundExecutor(self.root)
         self.sidebar_buttons = {}
 
         self.root.title("CTS Tool v4 Client")
@@ -53,9 +62,13 @@ class MainApplication:
         # Status Bar
         status_bar_frame = tk.Frame(self.root, bg=COLOR_SIDEBAR_BG)
         status_bar_frame.grid(row=1, column=0, columnspan=2, sticky='ew')
-        self.status_label = tk.Label(status_bar_frame, text=f"Connected to: {self.section_name}", 
+        self.status_label = tk.Label(status_bar_frame, text=self._connection_text(), 
                                      anchor='w', bg=COLOR_SIDEBAR_BG, fg='white', font=("Roboto", 9))
         self.status_label.pack(side=tk.LEFT, padx=10, pady=2)
+        self.metrics_label = tk.Label(status_bar_frame, text="", anchor='e', bg=COLOR_SIDEBAR_BG, fg='#bdc3c7',
+                                      font=("Roboto", 9))
+        self.metrics_label.pack(side=tk.RIGHT, padx=10, pady=2)
+        self._last_metrics = None
 
         self.views = {}
         self._create_sidebar_buttons()
@@ -64,6 +77,52 @@ class MainApplication:
         # Show the welcome view initially
         self.show_view("welcome")
 
+        self.root.protocol("WM_DELETE_WINDOW", self._on_close)
+        self._refresh_metrics()
+        self.root.after(app_config.METRICS_WRITE_INTERVAL * 1000, self._write_metrics)
+
+    def _on_close(self):
+        """Stops background work and closes pooled connections before the window is destroyed."""
+        self.executor.shutdown()
+        self._write_metrics(reschedule=False)
+        self.db.close()
+        if self.vault:
+            self.vault.wipe()
+        self.root.destroy()
+
+    def _connection_text(self):
+        """Status bar text naming the endpoint (host) the current system was reached on."""
+        return f"Connected to: {self.db.endpoints.get(self.section_name, self.section_name)}"
+
+    def _refresh_metrics(self):
+        """
+        Shows the last operation and the session p50/p95 in the status bar, or why batch writes are
+        backing off (polled, so workers never touch Tk).
+        """
+        last = operation_metrics.last
+        throttled = get_governor(self.section_name).waiting_reason()
+        if throttled:
+            self._last_metrics = None
+            self.metrics_label.config(text=f"Batch writes paused: {throttled}")
+        elif last is not None and last is not self._last_metrics:
+            self._last_metrics = last
+            count, p50, p95 = operation_metrics.session_percentiles()
+            outcome = "failed" if last["error"] else f"{last['rows']} rows"
+            self.metrics_label.config(
+                text=f"Last: {last['operation']} {last['duration'] * 1000:.0f} ms, {outcome}   |   "
+                     f"Session ({count} ops): p50 {p50 * 1000:.0f} ms, p95 {p95 * 1000:.0f} ms")
+        self.root.after(1000, self._refresh_metrics)
+
+    def _write_metrics(self, reschedule=True):
+        """Writes the metrics files for monitoring; a failed write is retried at the next interval."""
+        if operation_metrics.last is not None:
+            try:
+                operation_metrics.write_files()
+            except OSError as e:
+                logger.warning("Could not write metrics: %s", e)
+        if reschedule:
+            self.root.after(app_config.METRICS_WRITE_INTERVAL * 1000, self._write_metrics)
+
     def _create_sidebar_buttons(self):
         """Creates the navigation buttons in the sidebar."""
         tk.Label(self.sidebar_frame, text="FEATURES", font=FONT_TITLE, bg=COLOR_SIDEBAR_BG, fg='#95a5a6').pack(pady=(20, 10))
@@ -71,8 +130,13 @@ class MainApplication:
         buttons_config = [
             ("Welcome", "welcome"),
             ("Check OCSP", "ocsp"),
+            ("Bulk OCSP", "ocsp_bulk"),
+            ("CRL Lookup", "crl"),
+            ("Cert Inventory", "inventory"),
             ("TMS1 Tools", "tms1"),
-            ("TMS2 Tools", "tms2")
+            ("TMS2 Tools", "tms2"),
+            ("Export Tokens", "export"),
+            ("Audit History", "audit")
         ]
 
         for text, view_name in buttons_config:
@@ -92,15 +156,92 @@ class MainApplication:
             button.pack(fill='x', padx=10, pady=4)
             self.sidebar_buttons[view_name] = button
 
+        if self.vault:
+            self.switch_button = tk.Button(self.sidebar_frame, text="Switch System", font=FONT_BUTTON,
+                                           bg=COLOR_BUTTON_NORMAL_BG, fg=COLOR_BUTTON_NORMAL_FG,
+                                           activebackground=COLOR_BUTTON_HOVER_BG, activeforeground=COLOR_BUTTON_NORMAL_FG,
+                                           relief=tk.FLAT, anchor='w', padx=20, command=self._show_switch_dialog)
+            self.switch_button.pack(side='bottom', fill='x', padx=10, pady=20)
+
     def _create_views(self):
-        """Initializes all the different view frames."""
-        self.views = {
-            "welcome": WelcomeView(self.content_frame, self.section_name, bg=COLOR_CONTENT_BG),
-            "ocsp": OCSPView(self.content_frame, bg=COLOR_CONTENT_BG),
-            "tms1": TMS1View(self.content_frame, self.conn, self.logger, bg=COLOR_CONTENT_BG),
-            "tms2": TMS2View(self.content_frame, self.conn, self.logger, bg=COLOR_CONTENT_BG)
+        """Registers a factory per view; each view is only built the first time it is shown."""
+        self.views = {}
+        self.view_factories = {
+            "welcome": lambda: WelcomeView(self.content_frame, self.section_name, bg=COLOR_CONTENT_BG),
+            "ocsp": lambda: OCSPView(self.content_frame, self.executor, bg=COLOR_CONTENT_BG),
+            "ocsp_bulk": lambda: OCSPBulkView(self.content_frame, self.executor, bg=COLOR_CONTENT_BG),
+            "crl": lambda: CRLView(self.content_frame, self.executor, bg=COLOR_CONTENT_BG),
+            "inventory": lambda: CertInventoryView(self.content_frame, self.executor, bg=COLOR_CONTENT_BG),
+            "tms1": lambda: TMS1View(self.content_frame, self.db, self.section_name, self.logger, self.executor, "tms1", vault=self.vault, bg=COLOR_CONTENT_BG),
+            "tms2": lambda: TMS2View(self.content_frame, self.db, self.section_name, self.logger, self.executor, "tms2", vault=self.vault, bg=COLOR_CONTENT_BG),
+            "export": lambda: ExportView(self.content_frame, self.db, self.section_name, self.executor, bg=COLOR_CONTENT_BG),
+            "audit": lambda: AuditSearchView(self.content_frame, self.executor, bg=COLOR_CONTENT_BG)
         }
 
+    def _get_view(self, view_name):
+        if view_name not in self.views and view_name in self.view_factories:
+            self.views[view_name] = self.view_factories[view_name]()
+        return self.views.get(view_name)
+
+    def _show_switch_dialog(self):
+        """Asks for another section of the already decrypted config and connects to it."""
+        if self.executor.has_running():
+            messagebox.showwarning("Busy", "Wait for the running operations to finish before switching systems.")
+            return
+        sections = [name for name in self.vault.sections() if name != self.section_name]
+        if not sections:
+            messagebox.showinfo("Switch System", "No other systems are configured.")
+            return
+
+        dialog = tk.Toplevel(self.root)
+        dialog.title("Switch System")
+        dialog.configure(bg=COLOR_CONTENT_BG, padx=20, pady=20)
+        dialog.resizable(False, False)
+        dialog.transient(self.root)
+        dialog.grab_set()
+        ttk.Label(dialog, text=f"Currently connected to: {self.section_name}").pack(anchor='w')
+        section_var = tk.StringVar(value=sections[0])
+        ttk.Combobox(dialog, textvariable=section_var, values=sections, state='readonly', width=30).pack(pady=10)
+
+        def confirm():
+            dialog.destroy()
+            self._switch_section(section_var.get())
+
+        tk.Button(dialog, text="Connect", command=confirm, font=FONT_BUTTON, bg=COLOR_BUTTON_ACTIVE_BG,
+                  fg=COLOR_BUTTON_ACTIVE_FG, relief=tk.FLAT, padx=15).pack()
+
+    def _switch_section(self, section_name):
+        """Connects to a section in the background, then rebuilds the views for it."""
+        def connect(task):
+            if not self.db.has_section(section_name):
+                self.db.connect_section(section_name, self.vault.get_endpoints(section_name), task.cancel_event,
+                                        task.report_progress)
+            return section_name
+
+        def on_error(error):
+            self.switch_button.config(state=tk.NORMAL)
+            self.status_label.config(text=self._connection_text())
+            if isinstance(error, mysql.connector.Error):
+                messagebox.showerror("Connection Failed", f"Could not connect to {section_name}. Check config and network.\n{error}")
+            else:
+                messagebox.showerror("Error", str(error))
+
+        if self.executor.submit("switch", connect, on_success=self._on_section_switched, on_error=on_error,
+                                on_progress=lambda message: self.status_label.config(text=message)) is None:
+            return
+        self.switch_button.config(state=tk.DISABLED)
+        self.status_label.config(text=f"Connecting to: {section_name}...")
+
+    def _on_section_switched(self, section_name):
+        self.switch_button.config(state=tk.NORMAL)
+        self.section_name = section_name
+        self.logger = setup_logging(section_name)
+        for view in self.views.values():
+            view.destroy()
+        self._create_views()
+        self.status_label.config(text=self._connection_text())
+        self.show_view("welcome")
+
     def show_view(self, view_name):
         """Hides all other views and shows the requested one."""
         for name, view in self.views.items():
@@ -112,6 +253,6 @@ class MainApplication:
             else:
                 btn.config(bg=COLOR_BUTTON_NORMAL_BG, fg=COLOR_BUTTON_NORMAL_FG)
 
-        view_to_show = self.views.get(view_name)
+        view_to_show = self._get_view(view_name)
         if view_to_show:
             view_to_show.pack(fill='both', expand=True, padx=10, pady=10)
\ No newline at end of file
@@ -0,0 +1,193 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+from datetime import date, datetime
+from decimal import Decimal
+import app_config
+from batch_writer import run_batch_update, BatchError, BatchCancelled
+from write_governor import get_governor
+
+# Columns of the rows returned by UndoJournal.operations(), in order
+OPERATION_COLUMNS = ["id", "time", "operation", "token_count", "affected", "status", "note"]
+
+def _json_value(value):
+    if isinstance(value, (datetime, date)):
+        return value.strftime("%Y-%m-%d %H:%M:%S")
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, (bytes, bytearray)):
+        return bytes(value).decode("utf-8", errors="replace")
+    raise TypeError(f"Cannot journal a value of type {type(value).__name__}")
+
+class UndoJournal:
+    """
+    Local SQLite journal of the column values batch updates overwrote, one entry per operation.
+    The values of each chunk are read with SELECT ... FOR UPDATE in the transaction that updates
+    it, so changes other sessions make while a long batch runs are never captured stale.
+    Rows sharing the same prior values store them once, so a batch that blocked 5,000 unblocked
+    tokens costs one value row plus the Token IDs, and undo() restores every group of identical
+    values with chunked set-based UPDATEs. The newest UNDO_JOURNAL_MAX_OPERATIONS entries of a
+    section are kept.
+    """
+    def __init__(self, path=None, max_operations=None):
+        self.path = path or app_config.UNDO_JOURNAL_FILE
+        self.max_operations = max_operations or app_config.UNDO_JOURNAL_MAX_OPERATIONS
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._values = {}  # entry ID -> {prior values (JSON): value_id} of entries still being recorded
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS undo_operation (
+                id INTEGER PRIMARY KEY,
+                time TEXT NOT NULL,
+                section TEXT NOT NULL,
+                table_name TEXT NOT NULL,
+                operation TEXT NOT NULL,
+                columns TEXT NOT NULL,
+                token_count INTEGER NOT NULL,
+                affected INTEGER,
+                status TEXT NOT NULL,
+                note TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS undo_value (
+                operation_id INTEGER NOT NULL,
+                value_id INTEGER NOT NULL,
+                prior TEXT NOT NULL,
+                PRIMARY KEY (operation_id, value_id)
+            );
+            CREATE TABLE IF NOT EXISTS undo_row (
+                operation_id INTEGER NOT NULL,
+                token_id TEXT NOT NULL,
+                value_id INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_undo_row_operation ON undo_row (operation_id, value_id);
+            CREATE INDEX IF NOT EXISTS idx_undo_operation_section ON undo_operation (section, table_name);
+        """)
+        self._db.commit()
+
+    def begin(self, section, repository, columns, operation, token_count, note=""):
+        """
+        Starts a pending entry for an update of columns on token_count IDs. Returns the entry ID, to
+        which add_rows() adds the prior values of every committed chunk and finish() the outcome.
+        """
+        with self._lock:
+            cursor = self._db.execute(
+                "INSERT INTO undo_operation (time, section, table_name, operation, columns, token_count, status, note) "
+                "VALUES (?, ?, ?, ?, ?, ?, 'pending', ?)",
+                (time.strftime("%Y-%m-%d %H:%M:%S"), section, repository.table, operation, json.dumps(columns),
+                 token_count, note))
+            operation_id = cursor.lastrowid
+            self._values[operation_id] = {}
+            self._prune(section)
+            self._db.commit()
+        return operation_id
+
+    def add_rows(self, operation_id, rows):
+        """Stores (token_id, *columns) rows read (and locked) right before their chunk was updated."""
+        with self._lock:
+            values = self._values.setdefault(operation_id, {})  # prior values (JSON) -> value_id
+            new_values, token_rows = [], []
+            for row in rows:
+                prior = json.dumps(list(row[1:]), default=_json_value, ensure_ascii=False)
+                if prior not in values:
+                    values[prior] = len(values)
+                    new_values.append((operation_id, values[prior], prior))
+                token_rows.append((operation_id, str(row[0]), values[prior]))
+            self._db.executemany("INSERT INTO undo_value VALUES (?, ?, ?)", new_values)
+            self._db.executemany("INSERT INTO undo_row VALUES (?, ?, ?)", token_rows)
+            self._db.commit()
+
+    def finish(self, operation_id, status, affected):
+        """Marks an entry as applied ("ok"), "partial" or "cancelled" once its batch update returned."""
+        with self._lock:
+            self._values.pop(operation_id, None)
+            self._db.execute("UPDATE undo_operation SET status = ?, affected = ? WHERE id = ?",
+                             (status, affected, operation_id))
+            self._db.commit()
+
+    def _prune(self, section):
+        stale = [row[0] for row in self._db.execute(
+            "SELECT id FROM undo_operation WHERE section = ? ORDER BY id DESC LIMIT -1 OFFSET ?",
+            (section, self.max_operations))]
+        for operation_id in stale:
+            self._db.execute("DELETE FROM undo_row WHERE operation_id = ?", (operation_id,))
+            self._db.execute("DELETE FROM undo_value WHERE operation_id = ?", (operation_id,))
+            self._db.execute("DELETE FROM undo_operation WHERE id = ?", (operation_id,))
+
+    def operations(self, section, table_name, limit=100):
+        """Returns the newest journal entries of a section and table as OPERATION_COLUMNS rows."""
+        with self._lock:
+            return self._db.execute(
+                f"SELECT {', '.join(OPERATION_COLUMNS)} FROM undo_operation WHERE section = ? AND table_name = ? "
+                "ORDER BY id DESC LIMIT ?", (section, table_name, limit)).fetchall()
+
+    def undo(self, conn, operation_id, section, repository, progress_callback=None, cancel_event=None):
+        """
+        Restores the journaled values of an entry. Returns (operation, token_ids, restored_rows).
+        Entries left "pending" by an interrupted batch can be undone too: only its committed chunks
+        were journaled. The undo is journaled as a new entry itself, so values that later operations
+        wrote and the undo overwrote can be restored in turn. Raises ValueError if the entry does not
+        belong to this section/table or was already undone, and BatchError (with the rows restored
+        so far) if a chunk fails.
+        """
+        with self._lock:
+            entry = self._db.execute(
+                "SELECT operation, columns, status, section, table_name FROM undo_operation WHERE id = ?",
+                (operation_id,)).fetchone()
+            if entry is None:
+                raise ValueError(f"Undo entry #{operation_id} no longer exists.")
+            operation, columns, status, entry_section, table_name = entry
+            if (entry_section, table_name) != (section, repository.table):
+                raise ValueError(f"Undo entry #{operation_id} belongs to {entry_section} ({table_name}).")
+            if status == "undone":
+                raise ValueError(f"Undo entry #{operation_id} was already undone.")
+            groups = [(json.loads(prior), [row[0] for row in self._db.execute(
+                          "SELECT token_id FROM undo_row WHERE operation_id = ? AND value_id = ?",
+                          (operation_id, value_id))])
+                      for value_id, prior in self._db.execute(
+                          "SELECT value_id, prior FROM undo_value WHERE operation_id = ? ORDER BY value_id",
+                          (operation_id,)).fetchall()]
+
+        columns = json.loads(columns)
+        sql, snapshot_sql = repository.restore_sql(columns), repository.snapshot_sql(columns)
+        token_ids = [token_id for _, ids in groups for token_id in ids]
+        undo_id = self.begin(section, repository, columns, f"Undo {operation} (#{operation_id})", len(token_ids))
+        total_chunks = sum(-(-len(ids) // app_config.BATCH_CHUNK_SIZE) for _, ids in groups)
+        state = {"chunks": 0, "restored": 0, "ids": []}
+
+        def report(done, total, affected):
+            if progress_callback:
+                progress_callback(state["chunks"] + done, total_chunks, state["restored"] + affected)
+
+        for prior, ids in groups:
+            try:
+                restored = run_batch_update(conn, sql, prior, ids, progress_callback=report, cancel_event=cancel_event,
+                                            governor=get_governor(section), snapshot_sql=snapshot_sql,
+                                            snapshot_callback=lambda position, rows: self.add_rows(undo_id, rows))
+            except BatchError as e:
+                # Report what earlier groups restored as well
+                e.affected_rows += state["restored"]
+                e.committed_ids = state["ids"] + e.committed_ids
+                self.finish(undo_id, "cancelled" if isinstance(e, BatchCancelled) else "partial", e.affected_rows)
+                raise
+            state["chunks"] += -(-len(ids) // app_config.BATCH_CHUNK_SIZE)
+            state["restored"] += restored
+            state["ids"].extend(ids)
+        self.finish(undo_id, "ok", state["restored"])
+        with self._lock:
+            self._db.execute("UPDATE undo_operation SET status = 'undone' WHERE id = ?", (operation_id,))
+            self._db.commit()
+        return operation, token_ids, state["restored"]
+
+_default_journal = None
+_default_journal_lock = threading.Lock()
+
+def get_undo_journal():
+    """Returns the process-wide undo journal, opening it on first use."""
+    global _default_journal
+    with _default_journal_lock:
+        if _default_journal is None:
+            _default_journal = UndoJournal()
+        return _default_journal
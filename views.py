@@ -1,9 +1,26 @@
+import time
+from datetime import datetime, timedelta, timezone
 import tkinter as tk
-from tkinter import ttk, scrolledtext, filedialog
-from functions import (check_certificate_status, get_info_TMS1, note_hotro_tms1,
+from tkinter import ttk, scrolledtext, filedialog, messagebox
+import mysql.connector
+import app_config
+from batch_writer import BatchError, BatchCancelled
+from functions import (get_info_TMS1, note_hotro_tms1,
                        notifications_tms1, off_notifications_tms1, block_tms1, unblock_tms1, uninitialize_tms1,
                        get_info_TMS2, notifications_tms2, off_notifications_tms2,
-                       block_tms2, unblock_tms2, get_text_single, get_text_data)
+                       block_tms2, unblock_tms2,
+                       lookup_tokens_tms1, lookup_tokens_tms2, TMS1_LOOKUP_COLUMNS, TMS2_LOOKUP_COLUMNS, undo_batch,
+                       resume_batch_job)
+from repository import TMS1Repository, TMS2Repository
+from undo_journal import get_undo_journal
+from job_store import get_job_store, RESUMABLE_STATUSES
+from widgets import VirtualGrid
+from id_list import load_ids_from_file, parse_ids_from_text
+from token_export import EXPORT_SCHEMAS, EXPORT_FORMATS, export_tokens, guess_schema
+from token_cache import token_info_cache
+from fanout import compatible_sections, run_batch_on_sections, format_section_results
+# The OCSP/CRL modules (requests, cryptography.x509) are imported by the views that use them,
+# so they are only loaded once one of those features is opened.
 
 # --- Theme Definition ---
 COLOR_CONTENT_BG = '#ecf0f1'
@@ -34,6 +51,94 @@ class ThemedView(tk.Frame):
         style.configure('TLabelframe', background=COLOR_CONTENT_BG, borderwidth=1, relief=tk.SOLID)
         style.configure('TLabelframe.Label', background=COLOR_CONTENT_BG, foreground=COLOR_TEXT, font=FONT_BOLD)
 
+        # Background task state, used by views that run operations through the executor
+        self.executor = None
+        self.task_key = None
+        self._task_description = ""
+        self._action_buttons = []
+
+    def _create_styled_button(self, parent, text, command, primary=False):
+        """Creates a flat action button (disabled while a background task runs)."""
+        bg = COLOR_PRIMARY if primary else COLOR_SECONDARY
+        btn = tk.Button(parent, text=text, command=command, font=FONT_BOLD, bg=bg, fg=COLOR_WHITE, relief=tk.FLAT, padx=10, pady=5)
+        self._action_buttons.append(btn)
+        return btn
+
+    def _create_task_bar(self, parent):
+        """Creates the status label, progress bar and cancel button shown while a background task runs."""
+        bar = tk.Frame(parent, bg=COLOR_CONTENT_BG)
+        self.task_status_label = ttk.Label(bar, text="Ready")
+        self.task_status_label.pack(side='left')
+        self.cancel_button = tk.Button(bar, text="Cancel", command=self._cancel_task, font=FONT_BOLD, bg=COLOR_SECONDARY,
+                                       fg=COLOR_WHITE, relief=tk.FLAT, padx=10, state=tk.DISABLED)
+        self.cancel_button.pack(side='right')
+        self.task_progress = ttk.Progressbar(bar, length=200)
+        self.task_progress.pack(side='right', padx=10)
+        return bar
+
+    def _run_task(self, description, func, on_success, cancellable=False, error_prefix="", on_progress=None):
+        """Runs func(task) in the background while the view shows a running state."""
+        task = self.executor.submit(self.task_key, func,
+                                    on_success=lambda result: self._finish_task(on_success, result),
+                                    on_error=lambda e: self._finish_task(self._show_error, e, error_prefix),
+                                    on_progress=on_progress or self._on_task_progress)
+        if task is None:
+            messagebox.showwarning("Busy", "Another operation is still running. Please wait for it to finish.")
+            return
+        self._task_description = description
+        for button in self._action_buttons:
+            button.config(state=tk.DISABLED)
+        self.task_status_label.config(text=f"Running: {description}...")
+        self.task_progress.config(mode='indeterminate', value=0)
+        self.task_progress.start(10)
+        if cancellable:
+            self.cancel_button.config(state=tk.NORMAL)
+
+    def _on_task_progress(self, done, total, affected, unit="chunks"):
+        self.task_progress.stop()
+        self.task_progress.config(mode='determinate', maximum=max(total, 1), value=done)
+        detail = f", {affected} records" if affected is not None else ""
+        self.task_status_label.config(text=f"Running: {self._task_description} - {done}/{total} {unit}{detail}")
+
+    def _finish_task(self, callback, *args):
+        self.task_progress.stop()
+        self.task_progress.config(mode='determinate', value=0)
+        self.task_status_label.config(text="Ready")
+        self.cancel_button.config(state=tk.DISABLED)
+        for button in self._action_buttons:
+            button.config(state=tk.NORMAL)
+        callback(*args)
+
+    def _cancel_task(self):
+        self.executor.cancel(self.task_key)
+        self.cancel_button.config(state=tk.DISABLED)
+        self.task_status_label.config(text=f"Cancelling: {self._task_description}...")
+
+    def _show_error(self, error, prefix=""):
+        if isinstance(error, ValueError):
+            messagebox.showwarning("Warning", str(error))
+        elif isinstance(error, BatchCancelled):
+            messagebox.showinfo("Cancelled", str(error))
+        elif isinstance(error, (BatchError, mysql.connector.Error)):
+            messagebox.showerror("Database Error", str(error))
+        else:
+            messagebox.showerror("Error", f"{prefix}{error}")
+
+def get_text_data(text_widget):
+    """Gets multiline text from a Text widget and returns it as a list of strings."""
+    return text_widget.get("1.0", tk.END).strip().split('\n')
+
+def get_text_single(text_widget):
+    """Gets all text from a Text widget and returns it as a single stripped string."""
+    return text_widget.get("1.0", tk.END).strip()
+
+def set_result_text(text_widget, content):
+    """Replaces the content of a read-only Text widget."""
+    text_widget.config(state=tk.NORMAL)
+    text_widget.delete(1.0, tk.END)
+    text_widget.insert(tk.END, content)
+    text_widget.config(state=tk.DISABLED)
+
 class WelcomeView(ThemedView):
     """A simple welcome view shown on startup."""
     def __init__(self, parent, section_name, *args, **kwargs):
@@ -48,10 +153,13 @@ class WelcomeView(ThemedView):
 
 class OCSPView(ThemedView):
     """View for checking OCSP status."""
-    def __init__(self, parent, *args, **kwargs):
+    def __init__(self, parent, executor, *args, **kwargs):
         super().__init__(parent, *args, **kwargs)
+        self.executor = executor
+        self.task_key = "ocsp"
         self.cert_path = tk.StringVar()
         self.issuer_path = tk.StringVar()
+        self.force_refresh = tk.BooleanVar(value=False)
 
         # Main container with padding
         main_container = tk.Frame(self, bg=COLOR_CONTENT_BG, padx=20, pady=20)
@@ -75,7 +183,9 @@ class OCSPView(ThemedView):
         input_frame.grid_columnconfigure(0, weight=1)
 
         # Check Button
-        self._create_styled_button(main_container, "Check OCSP Status", self._check_status, primary=True).pack(pady=20)
+        self._create_styled_button(main_container, "Check OCSP Status", self._check_status, primary=True).pack(pady=(20, 5))
+        ttk.Checkbutton(main_container, text="Force refresh (bypass OCSP cache)", variable=self.force_refresh).pack()
+        self._create_task_bar(main_container).pack(fill='x', pady=(0, 10))
 
         # Result Frame
         result_frame = ttk.Labelframe(main_container, text="Result")
@@ -83,11 +193,6 @@ class OCSPView(ThemedView):
         self.result_text = scrolledtext.ScrolledText(result_frame, state=tk.DISABLED, font=FONT_MONO, relief=tk.FLAT, bg=COLOR_WHITE, padx=5, pady=5)
         self.result_text.pack(fill='both', expand=True, padx=10, pady=10)
 
-    def _create_styled_button(self, parent, text, command, primary=False):
-        bg = COLOR_PRIMARY if primary else COLOR_SECONDARY
-        fg = COLOR_WHITE
-        return tk.Button(parent, text=text, command=command, font=FONT_BOLD, bg=bg, fg=fg, relief=tk.FLAT, padx=10, pady=5)
-
     def _select_cert_file(self):
         path = filedialog.askopenfilename(title="Select Certificate File", filetypes=[("Certificate files", "*.cer;*.pem"), ("All files", "*.*")])
         if path: self.cert_path.set(path)
@@ -97,16 +202,341 @@ class OCSPView(ThemedView):
         if path: self.issuer_path.set(path)
 
     def _check_status(self):
-        check_certificate_status(self.cert_path.get(), self.issuer_path.get(), self.result_text)
+        from ocsp_client import check_certificate_status
+        cert_path, issuer_path, force_refresh = self.cert_path.get(), self.issuer_path.get(), self.force_refresh.get()
+        self._run_task("OCSP check", lambda task: check_certificate_status(cert_path, issuer_path, force_refresh),
+                       lambda result: set_result_text(self.result_text, result),
+                       error_prefix="An error occurred during OCSP check: ")
+
+class OCSPBulkView(ThemedView):
+    """View for checking the OCSP status of a whole folder (or list) of certificates."""
+    COLUMNS = [("file", "File", 200), ("subject", "Subject", 200), ("uid", "UID", 120), ("serial", "Serial Number", 160),
+               ("cert_status", "Status", 80), ("revocation_time", "Revocation Time", 130),
+               ("this_update", "This Update", 130), ("source", "Source", 80), ("error", "Error", 250)]
+
+    def __init__(self, parent, executor, *args, **kwargs):
+        super().__init__(parent, *args, **kwargs)
+        self.executor = executor
+        self.task_key = "ocsp_bulk"
+        self.cert_sources = []
+        self.issuer_sources = []
+        self.cert_source_text = tk.StringVar()
+        self.issuer_source_text = tk.StringVar()
+        self.force_refresh = tk.BooleanVar(value=False)
+        self.results = []
+        self._sort_reverse = {}
+
+        main_container = tk.Frame(self, bg=COLOR_CONTENT_BG, padx=20, pady=20)
+        main_container.pack(fill='both', expand=True)
+
+        input_frame = ttk.Labelframe(main_container, text="Input")
+        input_frame.pack(fill='x', expand=False)
+
+        ttk.Label(input_frame, text="Certificates (folder or files):").grid(row=0, column=0, sticky='w', pady=(10, 5), padx=10)
+        ttk.Entry(input_frame, textvariable=self.cert_source_text, font=FONT_NORMAL, state='readonly').grid(row=1, column=0, sticky='ew', padx=10)
+        self._create_styled_button(input_frame, "Folder...", lambda: self._select_folder(self.cert_sources, self.cert_source_text)).grid(row=1, column=1, padx=5, pady=5)
+        self._create_styled_button(input_frame, "Files...", lambda: self._select_files(self.cert_sources, self.cert_source_text)).grid(row=1, column=2, padx=(0, 10), pady=5)
+
+        ttk.Label(input_frame, text="Issuers (folder or files, CA certificates in the selection above are used too):").grid(row=2, column=0, sticky='w', pady=(10, 5), padx=10)
+        ttk.Entry(input_frame, textvariable=self.issuer_source_text, font=FONT_NORMAL, state='readonly').grid(row=3, column=0, sticky='ew', padx=10, pady=(0, 10))
+        self._create_styled_button(input_frame, "Folder...", lambda: self._select_folder(self.issuer_sources, self.issuer_source_text)).grid(row=3, column=1, padx=5, pady=(0, 10))
+        self._create_styled_button(input_frame, "Files...", lambda: self._select_files(self.issuer_sources, self.issuer_source_text)).grid(row=3, column=2, padx=(0, 10), pady=(0, 10))
+        input_frame.grid_columnconfigure(0, weight=1)
+
+        button_frame = tk.Frame(main_container, bg=COLOR_CONTENT_BG)
+        button_frame.pack(fill='x', pady=(15, 5))
+        self._create_styled_button(button_frame, "Check All", self._check_all, primary=True).pack(side='left')
+        self._create_styled_button(button_frame, "Export CSV", self._export_csv).pack(side='left', padx=10)
+        ttk.Checkbutton(button_frame, text="Force refresh (bypass OCSP cache)", variable=self.force_refresh).pack(side='left', padx=10)
+        self._create_task_bar(main_container).pack(fill='x', pady=(0, 10))
+
+        result_frame = ttk.Labelframe(main_container, text="Results")
+        result_frame.pack(fill='both', expand=True)
+        self.tree = ttk.Treeview(result_frame, columns=[c[0] for c in self.COLUMNS], show='headings')
+        for key, heading, width in self.COLUMNS:
+            self.tree.heading(key, text=heading, command=lambda k=key: self._sort_by(k))
+            self.tree.column(key, width=width, stretch=False)
+        y_scroll = ttk.Scrollbar(result_frame, orient=tk.VERTICAL, command=self.tree.yview)
+        x_scroll = ttk.Scrollbar(result_frame, orient=tk.HORIZONTAL, command=self.tree.xview)
+        self.tree.configure(yscrollcommand=y_scroll.set, xscrollcommand=x_scroll.set)
+        y_scroll.pack(side='right', fill='y')
+        x_scroll.pack(side='bottom', fill='x')
+        self.tree.pack(fill='both', expand=True, padx=(10, 0), pady=(10, 0))
+
+    def _select_folder(self, sources, text_var):
+        path = filedialog.askdirectory(title="Select Folder")
+        if path:
+            sources[:] = [path]
+            text_var.set(path)
+
+    def _select_files(self, sources, text_var):
+        paths = filedialog.askopenfilenames(title="Select Certificate Files", filetypes=[("Certificate files", "*.cer;*.crt;*.pem;*.der"), ("All files", "*.*")])
+        if paths:
+            sources[:] = list(paths)
+            text_var.set(f"{len(paths)} file(s) selected" if len(paths) > 1 else paths[0])
+
+    def _check_all(self):
+        from ocsp_bulk import bulk_check
+        if not self.cert_sources:
+            messagebox.showwarning("Warning", "Please select a certificate folder or files.")
+            return
+        self.results = []
+        self.tree.delete(*self.tree.get_children())
+        cert_sources, issuer_sources = list(self.cert_sources), list(self.issuer_sources)
+        force_refresh = self.force_refresh.get()
+        self._run_task("Bulk OCSP check",
+                       lambda task: bulk_check(cert_sources, issuer_sources, result_callback=task.report_progress,
+                                               cancel_event=task.cancel_event, force_refresh=force_refresh),
+                       self._on_check_done, cancellable=True, on_progress=self._on_result)
+
+    def _on_result(self, done, total, result):
+        self.results.append(result)
+        self.tree.insert('', tk.END, values=[result[key] for key, _, _ in self.COLUMNS])
+        self._on_task_progress(done, total, None, unit="certificates")
+
+    def _on_check_done(self, results):
+        statuses = {}
+        for result in results:
+            status = result["cert_status"] or ("ERROR" if result["error"] else result["response_status"])
+            statuses[status] = statuses.get(status, 0) + 1
+        summary = ", ".join(f"{status}: {count}" for status, count in sorted(statuses.items()))
+        messagebox.showinfo("Bulk OCSP", f"Checked {len(results)} certificate(s).\n{summary}")
+
+    def _sort_by(self, column):
+        reverse = self._sort_reverse.get(column, False)
+        rows = [(self.tree.set(item, column), item) for item in self.tree.get_children('')]
+        rows.sort(key=lambda row: row[0].lower(), reverse=reverse)
+        for index, (_, item) in enumerate(rows):
+            self.tree.move(item, '', index)
+        self._sort_reverse[column] = not reverse
+
+    def _export_csv(self):
+        if not self.results:
+            messagebox.showwarning("Warning", "There are no results to export.")
+            return
+        path = filedialog.asksaveasfilename(title="Export Results", defaultextension=".csv", filetypes=[("CSV files", "*.csv")])
+        if path:
+            from ocsp_bulk import export_results_csv
+            export_results_csv(self.results, path)
+            messagebox.showinfo("Export", f"Exported {len(self.results)} result(s) to {path}")
+
+class CRLView(ThemedView):
+    """View for offline revocation lookups of many serial numbers against locally indexed CRLs."""
+    COLUMNS = [("input", "Input", 260), ("serial", "Serial Number (hex)", 260), ("status", "Status", 110),
+               ("revocation_time", "Revocation Time", 140), ("reason", "Reason", 140)]
+
+    def __init__(self, parent, executor, *args, **kwargs):
+        super().__init__(parent, *args, **kwargs)
+        self.executor = executor
+        self.task_key = "crl"
+        from crl_index import CRLStore
+        self.store = CRLStore()
+        self.indexes = []
+        self.serial_format = tk.StringVar(value="hex")
+
+        main_container = tk.Frame(self, bg=COLOR_CONTENT_BG, padx=20, pady=20)
+        main_container.pack(fill='both', expand=True)
+
+        crl_frame = ttk.Labelframe(main_container, text="CRL Index")
+        crl_frame.pack(fill='x')
+        self.index_combo = ttk.Combobox(crl_frame, state='readonly', font=FONT_NORMAL)
+        self.index_combo.pack(side='left', fill='x', expand=True, padx=10, pady=10)
+        self._create_styled_button(crl_frame, "Load CRL / Delta CRL...", self._load_crl).pack(side='left', padx=(0, 10), pady=10)
+
+        input_frame = ttk.Labelframe(main_container, text="Serial Numbers (one per line)")
+        input_frame.pack(fill='x', pady=(10, 0))
+        self.serial_text = scrolledtext.ScrolledText(input_frame, height=6, relief=tk.FLAT, font=FONT_MONO, bg=COLOR_WHITE, padx=5, pady=5)
+        self.serial_text.pack(fill='x', padx=10, pady=(10, 5))
+        options = tk.Frame(input_frame, bg=COLOR_CONTENT_BG)
+        options.pack(fill='x', padx=10, pady=(0, 10))
+        ttk.Radiobutton(options, text="Hex", value="hex", variable=self.serial_format).pack(side='left')
+        ttk.Radiobutton(options, text="Decimal", value="decimal", variable=self.serial_format).pack(side='left', padx=10)
+        self._create_styled_button(options, "Check Serials", self._check_serials, primary=True).pack(side='right')
+
+        self._create_task_bar(main_container).pack(fill='x', pady=5)
+
+        result_frame = ttk.Labelframe(main_container, text="Result")
+        result_frame.pack(fill='both', expand=True)
+        self.tree = ttk.Treeview(result_frame, columns=[c[0] for c in self.COLUMNS], show='headings')
+        for key, heading, width in self.COLUMNS:
+            self.tree.heading(key, text=heading)
+            self.tree.column(key, width=width, stretch=False)
+        y_scroll = ttk.Scrollbar(result_frame, orient=tk.VERTICAL, command=self.tree.yview)
+        self.tree.configure(yscrollcommand=y_scroll.set)
+        y_scroll.pack(side='right', fill='y')
+        self.tree.pack(fill='both', expand=True, padx=(10, 0), pady=10)
+
+        self._refresh_indexes()
+
+    def _refresh_indexes(self, select_directory=None):
+        self.indexes = self.store.list_indexes()
+        self.index_combo['values'] = [index.describe() for index in self.indexes]
+        directories = [index.directory for index in self.indexes]
+        if select_directory in directories:
+            self.index_combo.current(directories.index(select_directory))
+        elif self.indexes and self.index_combo.current() < 0:
+            self.index_combo.current(0)
+
+    def _load_crl(self):
+        path = filedialog.askopenfilename(title="Select CRL File", filetypes=[("CRL files", "*.crl;*.pem;*.der"), ("All files", "*.*")])
+        if not path:
+            return
+
+        def on_success(result):
+            index, message = result
+            self._refresh_indexes(index.directory)
+            messagebox.showinfo("CRL", message)
+
+        self._run_task("Indexing CRL", lambda task: self.store.import_crl(path), on_success)
+
+    def _check_serials(self):
+        from crl_index import check_serials
+        if self.index_combo.current() < 0:
+            messagebox.showwarning("Warning", "Please load a CRL first.")
+            return
+        index = self.indexes[self.index_combo.current()]
+        lines, serial_format = get_text_data(self.serial_text), self.serial_format.get()
+
+        def on_success(results):
+            self.tree.delete(*self.tree.get_children())
+            for result in results:
+                self.tree.insert('', tk.END, values=[result[key] for key, _, _ in self.COLUMNS])
+            revoked = sum(1 for result in results if result["status"] == "REVOKED")
+            unknown = sum(1 for result in results if result["status"] == "UNKNOWN")
+            unknown_text = f", {unknown} unknown (not indexable)" if unknown else ""
+            self.task_status_label.config(
+                text=f"{len(results)} serial(s) checked, {revoked} revoked{unknown_text} - {index.describe()}")
+
+        self._run_task("CRL lookup", lambda task: check_serials(index, lines, serial_format), on_success)
+
+class ExportView(ThemedView):
+    """View for streaming a snapshot of the token table to a CSV/JSONL file."""
+    def __init__(self, parent, db_manager, section_name, executor, *args, **kwargs):
+        super().__init__(parent, *args, **kwargs)
+        self.db = db_manager
+        self.section_name = section_name
+        self.executor = executor
+        self.task_key = "export"
+        self.schema = tk.StringVar(value=guess_schema(section_name))
+        self.file_format = tk.StringVar(value="csv")
+        self.compress = tk.BooleanVar(value=False)
+        self.column_vars = {}
+        self.filter_vars = {}
+
+        main_container = tk.Frame(self, bg=COLOR_CONTENT_BG, padx=20, pady=20)
+        main_container.pack(fill='both', expand=True)
+
+        schema_frame = ttk.Labelframe(main_container, text="Table")
+        schema_frame.pack(fill='x')
+        for schema, spec in EXPORT_SCHEMAS.items():
+            ttk.Radiobutton(schema_frame, text=f"{schema.upper()} ({spec['table']})", value=schema, variable=self.schema,
+                            command=self._build_options).pack(side='left', padx=10, pady=10)
+
+        self.columns_frame = ttk.Labelframe(main_container, text="Columns")
+        self.columns_frame.pack(fill='x', pady=(10, 0))
+        self.filters_frame = ttk.Labelframe(main_container, text="Filters")
+        self.filters_frame.pack(fill='x', pady=(10, 0))
+
+        output_frame = ttk.Labelframe(main_container, text="Output")
+        output_frame.pack(fill='x', pady=(10, 0))
+        for file_format in EXPORT_FORMATS:
+            ttk.Radiobutton(output_frame, text=file_format.upper(), value=file_format, variable=self.file_format).pack(side='left', padx=10, pady=10)
+        ttk.Checkbutton(output_frame, text="gzip compress", variable=self.compress).pack(side='left', padx=10)
+
+        export_button = tk.Button(main_container, text="Export...", command=self._export, font=FONT_BOLD, bg=COLOR_PRIMARY,
+                                  fg=COLOR_WHITE, relief=tk.FLAT, padx=10, pady=5)
+        export_button.pack(pady=(15, 5))
+        self._action_buttons.append(export_button)
+        self._create_task_bar(main_container).pack(fill='x', pady=5)
+
+        self._build_options()
+
+    def _build_options(self):
+        """Rebuilds the column and filter checkboxes for the selected table."""
+        spec = EXPORT_SCHEMAS[self.schema.get()]
+        for frame in (self.columns_frame, self.filters_frame):
+            for child in frame.winfo_children():
+                child.destroy()
+        self.column_vars = {column: tk.BooleanVar(value=True) for column in spec["columns"]}
+        for index, (column, var) in enumerate(self.column_vars.items()):
+            ttk.Checkbutton(self.columns_frame, text=column, variable=var).grid(row=index // 4, column=index % 4, sticky='w', padx=10, pady=3)
+        self.filter_vars = {name: tk.BooleanVar(value=False) for name in spec["filters"]}
+        for name, var in self.filter_vars.items():
+            ttk.Checkbutton(self.filters_frame, text=name, variable=var).pack(anchor='w', padx=10, pady=3)
+
+    def _export(self):
+        schema, file_format, compress = self.schema.get(), self.file_format.get(), self.compress.get()
+        columns = [column for column, var in self.column_vars.items() if var.get()]
+        filter_names = [name for name, var in self.filter_vars.items() if var.get()]
+        if not columns:
+            messagebox.showwarning("Warning", "Please select at least one column.")
+            return
+        extension = f".{file_format}" + (".gz" if compress else "")
+        path = filedialog.asksaveasfilename(title="Export Tokens", defaultextension=extension,
+                                            initialfile=f"{self.section_name}_{EXPORT_SCHEMAS[schema]['table']}{extension}")
+        if not path:
+            return
+
+        def run(task):
+            with self.db.connection(self.section_name) as conn:
+                return export_tokens(conn, schema, columns, filter_names, path, file_format, compress,
+                                     progress_callback=task.report_progress, cancel_event=task.cancel_event)
+
+        self._run_task("Export", run, lambda written: messagebox.showinfo("Export", f"Exported {written} rows to {path}"),
+                       cancellable=True, on_progress=lambda done, total, _: self._on_task_progress(done, total, None, unit="rows"))
+
+class TokenLookupWindow(tk.Toplevel):
+    """Shows the result of a multi-token lookup in a virtualized, sortable and filterable grid."""
+    def __init__(self, parent, title, columns, rows, missing_ids):
+        super().__init__(parent)
+        self.title(title)
+        self.geometry("1000x600")
+        self.configure(bg=COLOR_CONTENT_BG, padx=10, pady=10)
+
+        top = tk.Frame(self, bg=COLOR_CONTENT_BG)
+        top.pack(fill='x')
+        ttk.Label(top, text="Filter:").pack(side='left')
+        self.filter_var = tk.StringVar()
+        self.filter_var.trace_add('write', lambda *_: self._apply_filter())
+        ttk.Entry(top, textvariable=self.filter_var, font=FONT_NORMAL, width=40).pack(side='left', padx=5)
+        self.count_label = ttk.Label(top)
+        self.count_label.pack(side='right')
+
+        pane = ttk.PanedWindow(self, orient=tk.HORIZONTAL)
+        pane.pack(fill='both', expand=True, pady=(10, 0))
+        self.grid_view = VirtualGrid(pane, [(column, 140) for column in columns], bg=COLOR_CONTENT_BG)
+        pane.add(self.grid_view, weight=4)
+
+        missing_frame = ttk.Labelframe(pane, text=f"Not found ({len(missing_ids)})")
+        pane.add(missing_frame, weight=1)
+        missing_text = scrolledtext.ScrolledText(missing_frame, width=20, relief=tk.FLAT, font=FONT_MONO, bg=COLOR_WHITE)
+        missing_text.pack(fill='both', expand=True, padx=5, pady=5)
+        set_result_text(missing_text, "\n".join(missing_ids))
+
+        self.total_rows = len(rows)
+        self.missing_count = len(missing_ids)
+        self.grid_view.set_rows(rows)
+        self._apply_filter()
+
+    def _apply_filter(self):
+        self.grid_view.set_filter(self.filter_var.get())
+        self.count_label.config(text=f"Showing {self.grid_view.row_count} of {self.total_rows} rows, {self.missing_count} not found")
 
 class TMSView(ThemedView):
     """Base class for TMS1 and TMS2 views to share common styling."""
-    def __init__(self, parent, db_connection, logger, *args, **kwargs):
+    def __init__(self, parent, db_manager, section_name, logger, executor, task_key, *args, vault=None, **kwargs):
         super().__init__(parent, *args, **kwargs)
-        self.conn = db_connection
+        self.db = db_manager
+        self.vault = vault
+        self.section_name = section_name
+        self.target_sections = [section_name]
         self.logger = logger
+        self.executor = executor
+        self.task_key = task_key
         self.configure(padx=10, pady=5)
 
+        self._create_task_bar(self).pack(side='bottom', fill='x', pady=(5, 0))
+
         main_pane = ttk.PanedWindow(self, orient=tk.HORIZONTAL)
         main_pane.pack(fill=tk.BOTH, expand=True)
         
@@ -118,10 +548,14 @@ class TMSView(ThemedView):
 
         self._create_info_widgets()
         self._create_batch_widgets()
+        if self.vault:
+            self._create_target_widgets()
+        self._create_undo_widgets()
 
     def _create_styled_button(self, parent, text, command):
         btn = tk.Button(parent, text=text.upper(), command=command, font=("Roboto", 9, "bold"), 
                         bg=COLOR_BUTTON_ACTION, fg=COLOR_BUTTON_ACTION_FG, relief=tk.FLAT, padx=10, pady=8)
+        self._action_buttons.append(btn)
         return btn
 
     def _create_info_widgets(self):
@@ -133,7 +567,10 @@ class TMSView(ThemedView):
         info_button_frame.pack(fill='x', pady=5)
         
         self._create_styled_button(info_button_frame, "Get Info", self._get_info).pack(side='left', expand=True, fill='x', padx=(0, 5))
+        self._create_styled_button(info_button_frame, "Refresh", lambda: self._get_info(refresh=True)).pack(side='left', expand=True, fill='x', padx=(0, 5))
         self._create_styled_button(info_button_frame, "Uninitialize", self._uninitialize).pack(side='left', expand=True, fill='x')
+        self.info_source_label = ttk.Label(self.info_frame, text="", foreground=COLOR_SECONDARY)
+        self.info_source_label.pack(anchor='w')
 
         self.info_result_text = scrolledtext.ScrolledText(self.info_frame, state=tk.DISABLED, relief=tk.FLAT, font=FONT_NORMAL, bg=COLOR_WHITE, padx=5, pady=5)
         self.info_result_text.pack(fill='both', expand=True, pady=(10, 0))
@@ -141,18 +578,318 @@ class TMSView(ThemedView):
     def _create_batch_widgets(self):
         raise NotImplementedError
 
-    def _get_info(self):
+    def _create_id_list_widgets(self):
+        """Token ID list input: typed/pasted into the text box, or loaded from a file without rendering it."""
+        self.file_ids = None
+        header = tk.Frame(self.batch_frame, bg=COLOR_CONTENT_BG)
+        header.pack(fill='x')
+        ttk.Label(header, text="Token ID List (one per line):").pack(side='left')
+        self.clear_file_button = tk.Button(header, text="Clear", command=self._clear_id_file, font=("Roboto", 8, "bold"),
+                                           bg=COLOR_SECONDARY, fg=COLOR_WHITE, relief=tk.FLAT, padx=6, state=tk.DISABLED)
+        self.clear_file_button.pack(side='right')
+        load_button = tk.Button(header, text="Load from file...", command=self._load_id_file, font=("Roboto", 8, "bold"),
+                                bg=COLOR_SECONDARY, fg=COLOR_WHITE, relief=tk.FLAT, padx=6)
+        load_button.pack(side='right', padx=5)
+        self._action_buttons.append(load_button)
+        self.id_list_text = scrolledtext.ScrolledText(self.batch_frame, height=10, relief=tk.FLAT, font=FONT_NORMAL, bg=COLOR_WHITE, padx=5, pady=5)
+        self.id_list_text.pack(fill='both', expand=True, pady=5)
+        self.id_source_label = ttk.Label(self.batch_frame, text="", foreground=COLOR_PRIMARY)
+        self.id_source_label.pack(anchor='w')
+
+    def _create_target_widgets(self):
+        """Shows which systems a batch operation is applied to, with a button to pick more."""
+        row = tk.Frame(self.batch_frame, bg=COLOR_CONTENT_BG)
+        row.pack(fill='x', pady=(5, 0))
+        self.targets_label = ttk.Label(row, text=f"Apply to: {self.section_name}")
+        self.targets_label.pack(side='left')
+        choose_button = tk.Button(row, text="Systems...", command=self._choose_targets, font=("Roboto", 8, "bold"),
+                                  bg=COLOR_SECONDARY, fg=COLOR_WHITE, relief=tk.FLAT, padx=6)
+        choose_button.pack(side='right')
+        self._action_buttons.append(choose_button)
+
+    def _create_undo_widgets(self):
+        row = tk.Frame(self.batch_frame, bg=COLOR_CONTENT_BG)
+        row.pack(fill='x', pady=(5, 0))
+        ttk.Label(row, text="Batch history", foreground=COLOR_SECONDARY).pack(side='left')
+        for text, command in (("Undo a batch...", self._show_undo_dialog), ("Batch jobs...", self._show_jobs_dialog)):
+            button = tk.Button(row, text=text, command=command, font=("Roboto", 8, "bold"), bg=COLOR_SECONDARY,
+                               fg=COLOR_WHITE, relief=tk.FLAT, padx=6)
+            button.pack(side='right', padx=(5, 0))
+            self._action_buttons.append(button)
+
+    def _show_jobs_dialog(self):
+        """Lists the stored batch jobs of this system; unfinished ones can be resumed or have their failed chunks retried."""
+        jobs = get_job_store().jobs(self.section_name, self.repository.table)
+        if not jobs:
+            messagebox.showinfo("Batch Jobs", f"No batch jobs for {self.section_name}.")
+            return
+
+        dialog = tk.Toplevel(self)
+        dialog.title(f"Batch Jobs - {self.section_name}")
+        dialog.configure(bg=COLOR_CONTENT_BG, padx=15, pady=15)
+        dialog.transient(self.winfo_toplevel())
+        dialog.grab_set()
+        columns = [("id", "#", 50), ("created", "Created", 140), ("operation", "Operation", 200),
+                   ("token_count", "IDs", 70), ("chunks", "Chunks", 80), ("affected", "Affected", 70),
+                   ("status", "Status", 90), ("error", "Error", 250)]
+        tree = ttk.Treeview(dialog, columns=[c[0] for c in columns], show='headings', height=12, selectmode='browse')
+        for key, heading, width in columns:
+            tree.heading(key, text=heading)
+            tree.column(key, width=width, stretch=False)
+        for job_id, created, operation, token_count, chunks_done, chunk_count, affected, status, error in jobs:
+            tree.insert('', tk.END, iid=str(job_id), values=[job_id, created, operation, token_count,
+                                                               f"{chunks_done}/{chunk_count}", affected, status,
+                                                               (error or "").splitlines()[0] if error else ""])
+        tree.pack(fill='both', expand=True)
+
+        def resume_selected(failed_only):
+            selection = tree.selection()
+            if not selection:
+                messagebox.showwarning("Batch Jobs", "Select a job to resume.", parent=dialog)
+                return
+            values = tree.item(selection[0], 'values')
+            if values[6] not in RESUMABLE_STATUSES:
+                messagebox.showwarning("Batch Jobs", f"Job #{values[0]} is {values[6]}.", parent=dialog)
+                return
+            part = "its failed chunks" if failed_only else "the chunks not committed yet"
+            if not messagebox.askyesno("Confirm Resume", f"Run {part} of '{values[2]}' (job #{values[0]}, "
+                                       f"{values[4]} chunks done)?", parent=dialog):
+                return
+            dialog.destroy()
+            job_id = int(selection[0])
+
+            def run(task):
+                with self.db.connections(self.section_name, app_config.BATCH_CONNECTIONS) as conns:
+                    return resume_batch_job(conns, self.repository, job_id, self.logger, failed_only,
+                                            progress_callback=task.report_progress, cancel_event=task.cancel_event)
+
+            self._run_task(f"Resume job #{job_id}", run,
+                           lambda affected: messagebox.showinfo("Success", f"{affected} records updated successfully"),
+                           cancellable=True)
+
+        buttons = tk.Frame(dialog, bg=COLOR_CONTENT_BG)
+        buttons.pack(pady=(10, 0))
+        for text, failed_only in (("Resume", False), ("Retry Failed Chunks", True)):
+            tk.Button(buttons, text=text, command=lambda failed_only=failed_only: resume_selected(failed_only),
+                      font=FONT_BOLD, bg=COLOR_BUTTON_ACTION, fg=COLOR_BUTTON_ACTION_FG, relief=tk.FLAT,
+                      padx=15).pack(side='left', padx=5)
+
+    def _show_undo_dialog(self):
+        """Lists the journaled batch operations of this system and restores the selected one."""
+        operations = get_undo_journal().operations(self.section_name, self.repository.table)
+        if not operations:
+            messagebox.showinfo("Undo", f"No journaled batch operations for {self.section_name}.")
+            return
+
+        dialog = tk.Toplevel(self)
+        dialog.title(f"Undo Batch Operation - {self.section_name}")
+        dialog.configure(bg=COLOR_CONTENT_BG, padx=15, pady=15)
+        dialog.transient(self.winfo_toplevel())
+        dialog.grab_set()
+        columns = [("id", "#", 50), ("time", "Time", 140), ("operation", "Operation", 200), ("token_count", "IDs", 70),
+                   ("affected", "Affected", 70), ("status", "Status", 80), ("note", "Note", 250)]
+        tree = ttk.Treeview(dialog, columns=[c[0] for c in columns], show='headings', height=12, selectmode='browse')
+        for key, heading, width in columns:
+            tree.heading(key, text=heading)
+            tree.column(key, width=width, stretch=False)
+        for row in operations:
+            tree.insert('', tk.END, iid=str(row[0]), values=["" if value is None else value for value in row])
+        tree.pack(fill='both', expand=True)
+
+        def undo_selected():
+            selection = tree.selection()
+            if not selection:
+                messagebox.showwarning("Undo", "Select an operation to undo.", parent=dialog)
+                return
+            values = tree.item(selection[0], 'values')
+            if not messagebox.askyesno("Confirm Undo", f"Restore the values overwritten by '{values[2]}' on {values[3]} "
+                                       f"Token IDs ({values[1]})?", parent=dialog):
+                return
+            dialog.destroy()
+            operation_id = int(selection[0])
+            self._run_db_task("Undo", lambda task, conn: undo_batch(conn, self.repository, operation_id, self.logger,
+                                                                    progress_callback=task.report_progress,
+                                                                    cancel_event=task.cancel_event),
+                              lambda restored: messagebox.showinfo("Success", f"{restored} records restored"),
+                              cancellable=True)
+
+        tk.Button(dialog, text="Undo Selected", command=undo_selected, font=FONT_BOLD, bg=COLOR_BUTTON_ACTION,
+                  fg=COLOR_BUTTON_ACTION_FG, relief=tk.FLAT, padx=15).pack(pady=(10, 0))
+
+    def _choose_targets(self):
+        """Lets the user tick the sections (e.g. TMS1 and TMS1_CMC) that batch operations run on."""
+        sections = compatible_sections(self.vault.sections(), self.schema)
+        if self.section_name not in sections:
+            sections.insert(0, self.section_name)
+
+        dialog = tk.Toplevel(self)
+        dialog.title("Apply Batch Operations To")
+        dialog.configure(bg=COLOR_CONTENT_BG, padx=20, pady=15)
+        dialog.transient(self.winfo_toplevel())
+        dialog.grab_set()
+        selected = {}
+        for section in sections:
+            selected[section] = tk.BooleanVar(value=section in self.target_sections)
+            ttk.Checkbutton(dialog, text=section, variable=selected[section]).pack(anchor='w')
+
+        def confirm():
+            targets = [section for section in sections if selected[section].get()]
+            if not targets:
+                messagebox.showwarning("Input Error", "Select at least one system.", parent=dialog)
+                return
+            self.target_sections = targets
+            self.targets_label.config(text=f"Apply to: {', '.join(targets)}")
+            dialog.destroy()
+
+        tk.Button(dialog, text="OK", command=confirm, font=FONT_BOLD, bg=COLOR_BUTTON_ACTION,
+                  fg=COLOR_BUTTON_ACTION_FG, relief=tk.FLAT, padx=15).pack(pady=(10, 0))
+
+    def _get_batch_ids(self):
+        """
+        Returns the normalized, de-duplicated Token IDs from the loaded file or the text box, or None
+        if the text box holds invalid IDs and the user chose not to run without them.
+        """
+        if self.file_ids is not None:
+            return self.file_ids.ids
+        id_list = parse_ids_from_text(get_text_data(self.id_list_text))
+        if id_list.invalid and not messagebox.askyesno(
+                "Invalid IDs", f"{len(id_list.invalid)} invalid ID(s) will be skipped, e.g.:\n"
+                + "\n".join(id_list.invalid[:10]) + f"\n\nContinue with the {len(id_list)} valid ID(s)?"):
+            return None
+        return id_list.ids
+
+    def _load_id_file(self):
+        path = filedialog.askopenfilename(title="Select Token ID List", filetypes=[("Text / CSV files", "*.txt;*.csv"), ("All files", "*.*")])
+        if not path:
+            return
+
+        def on_success(id_list):
+            self.file_ids = id_list
+            self.id_list_text.config(state=tk.NORMAL)
+            self.id_list_text.delete(1.0, tk.END)
+            self.id_list_text.insert(tk.END, f"[Using {len(id_list)} Token IDs loaded from {id_list.source}]\n"
+                                             f"First IDs:\n" + "\n".join(id_list.ids[:20]))
+            self.id_list_text.config(state=tk.DISABLED)
+            self.id_source_label.config(text=f"File {id_list.source}: {id_list.total} lines read, {id_list.summary()}")
+            self.clear_file_button.config(state=tk.NORMAL)
+            if id_list.invalid:
+                messagebox.showwarning("Invalid IDs", f"{len(id_list.invalid)} invalid ID(s) were skipped, e.g.:\n" + "\n".join(id_list.invalid[:10]))
+
+        self._run_task("Loading ID list", lambda task: load_ids_from_file(path), on_success)
+
+    def _clear_id_file(self):
+        self.file_ids = None
+        self.id_list_text.config(state=tk.NORMAL)
+        self.id_list_text.delete(1.0, tk.END)
+        self.id_source_label.config(text="")
+        self.clear_file_button.config(state=tk.DISABLED)
+
+    def _get_info(self, refresh=False):
         raise NotImplementedError
 
+    def _run_db_task(self, description, func, on_success, cancellable=False):
+        """Runs func(task, conn) in the background on a connection borrowed from the section's pool."""
+        def run(task):
+            with self.db.connection(self.section_name) as conn:
+                return func(task, conn)
+        self._run_task(description, run, on_success, cancellable)
+
+    def _run_get_info(self, get_info_func, refresh=False):
+        """Shows the token info from the info cache, or from the database on a miss or when refresh is set."""
+        token_id = self.token_id_entry.get().strip()
+
+        def run(task):
+            def fetch():
+                with self.db.connection(self.section_name) as conn:
+                    return get_info_func(conn, token_id)
+            if not token_id:
+                raise ValueError("Please enter a Token ID.")
+            return token_info_cache.get_or_fetch((self.section_name, self.schema, token_id), fetch, refresh)
+
+        self._run_task("Refresh Info" if refresh else "Get Info", run, self._show_info)
+
+    def _show_info(self, result):
+        result_str, fetched_at, from_cache = result
+        if result_str is None:
+            self.info_source_label.config(text="")
+            messagebox.showinfo("Thông báo", "Không tìm thấy Token ID đã nhập.")
+            return
+        fetched = time.strftime('%H:%M:%S', time.localtime(fetched_at))
+        if from_cache:
+            self.info_source_label.config(text=f"Cached - fetched at {fetched}, press Refresh to reload", foreground=COLOR_SECONDARY)
+        else:
+            self.info_source_label.config(text=f"Fresh from the database at {fetched}", foreground=COLOR_PRIMARY)
+        set_result_text(self.info_result_text, result_str)
+
+    def _run_batch(self, description, batch_func, *args):
+        """Runs one of the batch functions in the background with progress reporting and cancellation."""
+        if args[0] is None:
+            return  # invalid Token IDs that the user did not want to skip
+        if self.target_sections != [self.section_name]:
+            self._run_batch_on_sections(description, batch_func, *args)
+            return
+
+        def run(task):
+            with self.db.connections(self.section_name, app_config.BATCH_CONNECTIONS) as conns:
+                return batch_func(conns, *args, self.logger, progress_callback=task.report_progress,
+                                  cancel_event=task.cancel_event)
+
+        self._run_task(description, run,
+                       lambda affected: messagebox.showinfo("Success", f"{affected} records updated successfully"),
+                       cancellable=True)
+
+    def _run_batch_on_sections(self, description, batch_func, *args):
+        """Runs a batch function on every selected section in parallel and reports the result of each."""
+        sections = list(self.target_sections)
+
+        def run(task):
+            return run_batch_on_sections(self.db, self.vault, sections, batch_func, args,
+                                         progress_callback=task.report_progress, cancel_event=task.cancel_event)
+
+        def on_success(results):
+            summary = format_section_results(results)
+            if any(result["error"] for result in results):
+                messagebox.showwarning("Completed with errors", summary)
+            else:
+                messagebox.showinfo("Success", summary)
+
+        self._run_task(f"{description} on {len(sections)} systems", run, on_success, cancellable=True)
+
+    def _lookup_list(self):
+        """Looks up every ID in the batch list and shows the rows in a lookup window."""
+        token_hid = self._get_batch_ids()
+        if token_hid is None:
+            return
+
+        def on_success(result):
+            rows, missing_ids = result
+            TokenLookupWindow(self, f"Token Lookup - {self.section_name}", self.lookup_columns, rows, missing_ids)
+
+        self._run_db_task("Lookup List",
+                          lambda task, conn: self.lookup_func(conn, token_hid, progress_callback=task.report_progress,
+                                                              cancel_event=task.cancel_event),
+                          on_success, cancellable=True)
+
     def _uninitialize(self):
-        uninitialize_tms1(self.conn, self.token_id_entry.get(), self.logger)
+        token_id = self.token_id_entry.get()
+
+        def on_success(rowcount):
+            if rowcount == 0:
+                messagebox.showwarning("No Update", f"Token ID '{token_id}' not found or already in the desired state.")
+            else:
+                messagebox.showinfo("Success", f"Token ID '{token_id}' has been uninitialized.")
+
+        self._run_db_task("Uninitialize", lambda task, conn: uninitialize_tms1(conn, token_id, self.logger), on_success)
 
 class TMS1View(TMSView):
     """View for TMS1 functionalities."""
+    schema = "tms1"
+    repository = TMS1Repository
+    lookup_func = staticmethod(lookup_tokens_tms1)
+    lookup_columns = TMS1_LOOKUP_COLUMNS
+
     def _create_batch_widgets(self):
-        ttk.Label(self.batch_frame, text="Token ID List (one per line):").pack(anchor='w')
-        self.id_list_text = scrolledtext.ScrolledText(self.batch_frame, height=10, relief=tk.FLAT, font=FONT_NORMAL, bg=COLOR_WHITE, padx=5, pady=5)
-        self.id_list_text.pack(fill='both', expand=True, pady=5)
+        self._create_id_list_widgets()
 
         ttk.Label(self.batch_frame, text="Content / Note:").pack(anchor='w', pady=(10,0))
         self.content_text = tk.Text(self.batch_frame, height=4, relief=tk.FLAT, font=FONT_NORMAL, bg=COLOR_WHITE, padx=5, pady=5)
@@ -168,36 +905,45 @@ class TMS1View(TMSView):
         block_unblock_container = tk.Frame(self.batch_frame, bg=COLOR_CONTENT_BG)
         block_unblock_container.pack(fill='x', pady=5)
         self._create_styled_button(block_unblock_container, "Block", self._block).pack(side='left', expand=True, fill='x', padx=(0, 5))
-        self._create_styled_button(block_unblock_container, "Unblock", self._unblock).pack(side='left', expand=True, fill='x')
+        self._create_styled_button(block_unblock_container, "Unblock", self._unblock).pack(side='left', expand=True, fill='x', padx=(0, 5))
+        self._create_styled_button(block_unblock_container, "Lookup List", self._lookup_list).pack(side='left', expand=True, fill='x')
 
-    def _get_info(self):
-        get_info_TMS1(self.conn, self.token_id_entry.get(), self.info_result_text)
+    def _get_info(self, refresh=False):
+        self._run_get_info(get_info_TMS1, refresh)
     def _note_hotro(self):
-        note_hotro_tms1(self.conn, get_text_data(self.id_list_text), get_text_single(self.content_text), self.logger)
+        self._run_batch("ON Note (hotro)", note_hotro_tms1, self._get_batch_ids(), get_text_single(self.content_text))
     def _on_notifications(self):
-        notifications_tms1(self.conn, get_text_data(self.id_list_text), get_text_single(self.content_text), self.logger)
+        self._run_batch("ON Notifications", notifications_tms1, self._get_batch_ids(), get_text_single(self.content_text))
     def _off_notifications(self):
-        off_notifications_tms1(self.conn, get_text_data(self.id_list_text), self.logger)
+        self._run_batch("OFF Notifications", off_notifications_tms1, self._get_batch_ids())
     def _block(self):
-        block_tms1(self.conn, get_text_data(self.id_list_text), get_text_single(self.content_text), self.logger)
+        self._run_batch("Block", block_tms1, self._get_batch_ids(), get_text_single(self.content_text))
     def _unblock(self):
-        unblock_tms1(self.conn, get_text_data(self.id_list_text), self.logger)
+        self._run_batch("Unblock", unblock_tms1, self._get_batch_ids())
 
 class TMS2View(TMSView):
     """View for TMS2 functionalities."""
+    schema = "tms2"
+    repository = TMS2Repository
+    lookup_func = staticmethod(lookup_tokens_tms2)
+    lookup_columns = TMS2_LOOKUP_COLUMNS
+
     def _create_info_widgets(self):
         # Override to remove 'Uninitialize' button which is not applicable for TMS2
         ttk.Label(self.info_frame, text="Token ID:").pack(anchor='w')
         self.token_id_entry = ttk.Entry(self.info_frame, font=FONT_NORMAL, width=30)
         self.token_id_entry.pack(fill='x', expand=True, pady=(5, 10), ipady=4)
-        self._create_styled_button(self.info_frame, "Get Info", self._get_info).pack(fill='x')
+        info_button_frame = tk.Frame(self.info_frame, bg=COLOR_CONTENT_BG)
+        info_button_frame.pack(fill='x', pady=5)
+        self._create_styled_button(info_button_frame, "Get Info", self._get_info).pack(side='left', expand=True, fill='x', padx=(0, 5))
+        self._create_styled_button(info_button_frame, "Refresh", lambda: self._get_info(refresh=True)).pack(side='left', expand=True, fill='x')
+        self.info_source_label = ttk.Label(self.info_frame, text="", foreground=COLOR_SECONDARY)
+        self.info_source_label.pack(anchor='w')
         self.info_result_text = scrolledtext.ScrolledText(self.info_frame, state=tk.DISABLED, relief=tk.FLAT, font=FONT_NORMAL, bg=COLOR_WHITE, padx=5, pady=5)
         self.info_result_text.pack(fill='both', expand=True, pady=(10, 0))
 
     def _create_batch_widgets(self):
-        ttk.Label(self.batch_frame, text="Token ID List (one per line):").pack(anchor='w')
-        self.id_list_text = scrolledtext.ScrolledText(self.batch_frame, height=10, relief=tk.FLAT, font=FONT_NORMAL, bg=COLOR_WHITE, padx=5, pady=5)
-        self.id_list_text.pack(fill='both', expand=True, pady=5)
+        self._create_id_list_widgets()
 
         ttk.Label(self.batch_frame, text="Title:").pack(anchor='w', pady=(10,0))
         self.title_text = tk.Text(self.batch_frame, height=1, relief=tk.FLAT, font=FONT_NORMAL, bg=COLOR_WHITE, padx=5, pady=5)
@@ -214,18 +960,159 @@ class TMS2View(TMSView):
         self._create_styled_button(button_container, "OFF Notifications", self._off_notifications).pack(side='left', expand=True, fill='x')
         self._create_styled_button(button_container, "Block", self._block).pack(side='left', expand=True, fill='x', padx=(5, 0))
         self._create_styled_button(button_container, "Unblock", self._unblock).pack(side='left', expand=True, fill='x', padx=5)
+        self._create_styled_button(button_container, "Lookup List", self._lookup_list).pack(side='left', expand=True, fill='x')
 
-    def _get_info(self):
-        get_info_TMS2(self.conn, self.token_id_entry.get(), self.info_result_text)
+    def _get_info(self, refresh=False):
+        self._run_get_info(get_info_TMS2, refresh)
     def _uninitialize(self):
         # This method is not applicable for TMS2 but must be implemented
         # Or the base class could be designed differently. For now, do nothing.
         pass
     def _on_notifications(self):
-        notifications_tms2(self.conn, get_text_data(self.id_list_text), get_text_single(self.title_text), get_text_single(self.content_text), self.logger)
+        self._run_batch("ON Notifications", notifications_tms2, self._get_batch_ids(), get_text_single(self.title_text), get_text_single(self.content_text))
     def _off_notifications(self):
-        off_notifications_tms2(self.conn, get_text_data(self.id_list_text), self.logger)
+        self._run_batch("OFF Notifications", off_notifications_tms2, self._get_batch_ids())
     def _block(self):
-        block_tms2(self.conn, get_text_data(self.id_list_text), get_text_single(self.content_text), self.logger)
+        self._run_batch("Block", block_tms2, self._get_batch_ids(), get_text_single(self.content_text))
     def _unblock(self):
-        unblock_tms2(self.conn, get_text_data(self.id_list_text), self.logger)
\ No newline at end of file
+        self._run_batch("Unblock", unblock_tms2, self._get_batch_ids())
+
+class AuditSearchView(ThemedView):
+    """View for searching the history of a Token ID across all audit logs."""
+    COLUMNS = [("Token ID", 150), ("Time", 170), ("System", 100), ("Operation", 220), ("Status", 80),
+               ("User", 90), ("Note", 260), ("IDs in batch", 90), ("Log file", 200)]
+
+    def __init__(self, parent, executor, *args, **kwargs):
+        super().__init__(parent, *args, **kwargs)
+        self.executor = executor
+        self.task_key = "audit"
+        from audit_index import AuditIndex
+        self.index = AuditIndex()
+
+        main_container = tk.Frame(self, bg=COLOR_CONTENT_BG, padx=20, pady=20)
+        main_container.pack(fill='both', expand=True)
+
+        search_frame = ttk.Labelframe(main_container, text="Token History (a trailing * searches by prefix)")
+        search_frame.pack(fill='x')
+        self.token_id_entry = ttk.Entry(search_frame, font=FONT_NORMAL, width=40)
+        self.token_id_entry.pack(side='left', fill='x', expand=True, padx=10, pady=10, ipady=3)
+        self.token_id_entry.bind('<Return>', lambda e: self._search())
+        self._create_styled_button(search_frame, "Rebuild Index", self._rebuild).pack(side='right', padx=(0, 10), pady=10)
+        self._create_styled_button(search_frame, "Search", self._search, primary=True).pack(side='right', padx=(0, 5), pady=10)
+
+        self._create_task_bar(main_container).pack(fill='x', pady=5)
+
+        result_frame = ttk.Labelframe(main_container, text="Result")
+        result_frame.pack(fill='both', expand=True)
+        self.grid_view = VirtualGrid(result_frame, self.COLUMNS, bg=COLOR_CONTENT_BG)
+        self.grid_view.pack(fill='both', expand=True, padx=10, pady=10)
+
+    def _search(self):
+        token_id = self.token_id_entry.get()
+
+        def run(task):
+            # Pick up whatever was logged since the last search before querying
+            added = self.index.update()
+            return added, self.index.search(token_id)
+
+        def on_success(result):
+            added, rows = result
+            self.grid_view.set_rows(rows)
+            self.task_status_label.config(text=f"{len(rows)} event(s) for {token_id.strip()} ({added} new log entries indexed)")
+
+        self._run_task("Searching audit history", run, on_success)
+
+    def _rebuild(self):
+        self._run_task("Rebuilding audit index", lambda task: self.index.rebuild(),
+                       lambda added: self.task_status_label.config(text=f"Index rebuilt: {added} log entries"))
+
+class CertInventoryView(ThemedView):
+    """View for indexing certificate folders and querying them by serial, MST/UID/name or expiry."""
+    COLUMNS = [("Subject", 220), ("MST", 110), ("UID", 160), ("Serial (hex)", 160), ("Serial (dec)", 180),
+               ("Issuer", 160), ("Valid from (UTC)", 140), ("Valid to (UTC)", 140), ("OCSP URL", 200),
+               ("CRL URL", 200), ("CA", 40), ("File", 300)]
+    QUERIES = ["Serial number", "MST / UID / name", "Expiring this month", "Expiring within days"]
+
+    def __init__(self, parent, executor, *args, **kwargs):
+        super().__init__(parent, *args, **kwargs)
+        self.executor = executor
+        self.task_key = "cert_inventory"
+        from cert_inventory import CertificateInventory
+        self.inventory = CertificateInventory()
+        self.folder_text = tk.StringVar()
+        self.query_type = tk.StringVar(value=self.QUERIES[0])
+
+        main_container = tk.Frame(self, bg=COLOR_CONTENT_BG, padx=20, pady=20)
+        main_container.pack(fill='both', expand=True)
+
+        scan_frame = ttk.Labelframe(main_container, text="Certificate Folder (only new or changed files are parsed)")
+        scan_frame.pack(fill='x')
+        ttk.Entry(scan_frame, textvariable=self.folder_text, font=FONT_NORMAL, state='readonly').pack(side='left', fill='x', expand=True, padx=10, pady=10, ipady=3)
+        self._create_styled_button(scan_frame, "Scan", self._scan, primary=True).pack(side='right', padx=(0, 10), pady=10)
+        self._create_styled_button(scan_frame, "Folder...", self._select_folder).pack(side='right', padx=(0, 5), pady=10)
+
+        query_frame = ttk.Labelframe(main_container, text="Query")
+        query_frame.pack(fill='x', pady=(10, 0))
+        ttk.Combobox(query_frame, textvariable=self.query_type, values=self.QUERIES, state='readonly', width=22).pack(side='left', padx=10, pady=10)
+        self.query_entry = ttk.Entry(query_frame, font=FONT_NORMAL, width=40)
+        self.query_entry.pack(side='left', fill='x', expand=True, pady=10, ipady=3)
+        self.query_entry.bind('<Return>', lambda e: self._query())
+        self._create_styled_button(query_frame, "Search", self._query, primary=True).pack(side='right', padx=10, pady=10)
+
+        self._create_task_bar(main_container).pack(fill='x', pady=5)
+
+        result_frame = ttk.Labelframe(main_container, text="Result")
+        result_frame.pack(fill='both', expand=True)
+        self.grid_view = VirtualGrid(result_frame, self.COLUMNS, bg=COLOR_CONTENT_BG)
+        self.grid_view.pack(fill='both', expand=True, padx=10, pady=10)
+
+        files, certificates, failed = self.inventory.counts()
+        self.task_status_label.config(text=f"Index: {certificates} certificate(s) in {files} file(s)")
+
+    def _select_folder(self):
+        folder = filedialog.askdirectory(title="Select Certificate Folder")
+        if folder:
+            self.folder_text.set(folder)
+
+    def _scan(self):
+        folder = self.folder_text.get()
+        if not folder:
+            messagebox.showwarning("Warning", "Please select a certificate folder.")
+            return
+
+        def run(task):
+            return self.inventory.scan([folder], progress_callback=lambda *p: task.report_progress(*p),
+                                       cancel_event=task.cancel_event)
+
+        def on_success(stats):
+            state = "Scan cancelled" if stats["cancelled"] else "Scan finished"
+            self.task_status_label.config(
+                text=f"{state}: {stats['files']} file(s), {stats['parsed']} parsed, {stats['unchanged']} unchanged, "
+                     f"{stats['removed']} removed, {stats['failed']} unreadable")
+
+        self._run_task("Scanning certificates", run, on_success, cancellable=True,
+                       on_progress=lambda done, total, certs: self._on_task_progress(done, total, None, unit="files"))
+
+    def _query(self):
+        query_type = self.query_type.get()
+        text = self.query_entry.get()
+
+        def run(task):
+            if query_type == "Serial number":
+                return self.inventory.find_by_serial(text)
+            if query_type == "MST / UID / name":
+                return self.inventory.find_by_text(text)
+            if query_type == "Expiring this month":
+                return self.inventory.expiring_this_month()
+            try:
+                days = int(text)
+            except ValueError:
+                raise ValueError("Please enter the number of days.")
+            now = datetime.now(timezone.utc).replace(tzinfo=None)
+            return self.inventory.expiring_between(now, now + timedelta(days=days))
+
+        def on_success(rows):
+            self.grid_view.set_rows(rows)
+            self.task_status_label.config(text=f"{len(rows)} certificate(s) found")
+
+        self._run_task("Querying certificate index", run, on_success)
@@ -0,0 +1,110 @@
+import tkinter as tk
+from tkinter import ttk
+
+class VirtualGrid(tk.Frame):
+    """
+    A Treeview-based table that can hold hundreds of thousands of rows: only the rows that fit in
+    the visible area exist as Treeview items, and scrolling re-fills those items from the data.
+    Supports sorting by clicking a column heading and a case-insensitive text filter.
+    """
+    def __init__(self, parent, columns, *args, **kwargs):
+        super().__init__(parent, *args, **kwargs)
+        self.columns = columns  # list of (heading, width)
+        self._rows = []
+        self._view = []  # indices into _rows after filtering and sorting
+        self._offset = 0
+        self._visible = 0
+        self._sort_column = None
+        self._sort_reverse = False
+        self._filter = ""
+
+        keys = [f"c{i}" for i in range(len(columns))]
+        self.tree = ttk.Treeview(self, columns=keys, show='headings', selectmode='browse')
+        for index, (key, (heading, width)) in enumerate(zip(keys, columns)):
+            self.tree.heading(key, text=heading, command=lambda i=index: self.sort_by(i))
+            self.tree.column(key, width=width, stretch=False)
+        self.y_scroll = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self._on_scrollbar)
+        x_scroll = ttk.Scrollbar(self, orient=tk.HORIZONTAL, command=self.tree.xview)
+        self.tree.configure(xscrollcommand=x_scroll.set)
+        self.y_scroll.pack(side='right', fill='y')
+        x_scroll.pack(side='bottom', fill='x')
+        self.tree.pack(fill='both', expand=True)
+
+        self.tree.bind('<Configure>', lambda e: self._refresh())
+        self.tree.bind('<MouseWheel>', self._on_mousewheel)
+        self.tree.bind('<Button-4>', lambda e: self.scroll(-3))
+        self.tree.bind('<Button-5>', lambda e: self.scroll(3))
+        self.tree.bind('<Prior>', lambda e: self.scroll(-self._visible))
+        self.tree.bind('<Next>', lambda e: self.scroll(self._visible))
+
+    def set_rows(self, rows):
+        self._rows = [tuple("" if value is None else value for value in row) for row in rows]
+        self._apply_view()
+
+    def set_filter(self, text):
+        self._filter = text.strip().lower()
+        self._apply_view()
+
+    def sort_by(self, column_index):
+        if self._sort_column == column_index:
+            self._sort_reverse = not self._sort_reverse
+        else:
+            self._sort_column, self._sort_reverse = column_index, False
+        self._apply_view()
+
+    @property
+    def row_count(self):
+        return len(self._view)
+
+    def _apply_view(self):
+        indices = range(len(self._rows))
+        if self._filter:
+            indices = [i for i in indices if any(self._filter in str(value).lower() for value in self._rows[i])]
+        indices = list(indices)
+        if self._sort_column is not None:
+            column = self._sort_column
+            indices.sort(key=lambda i: _sort_key(self._rows[i][column]), reverse=self._sort_reverse)
+        self._view = indices
+        self._offset = 0
+        self._refresh()
+
+    def scroll(self, delta):
+        self._offset = max(0, min(self._offset + delta, max(0, len(self._view) - self._visible)))
+        self._refresh()
+
+    def _on_mousewheel(self, event):
+        self.scroll(-3 if event.delta > 0 else 3)
+
+    def _on_scrollbar(self, action, amount, unit=None):
+        if action == 'moveto':
+            self._offset = int(float(amount) * len(self._view))
+            self.scroll(0)
+        elif action == 'scroll':
+            step = self._visible if unit == 'pages' else 1
+            self.scroll(int(amount) * step)
+
+    def _refresh(self):
+        row_height = int(ttk.Style(self).lookup('Treeview', 'rowheight') or 20)
+        self._visible = max(1, (self.tree.winfo_height() - row_height) // row_height)
+        window = self._view[self._offset:self._offset + self._visible]
+        items = self.tree.get_children()
+        # Reuse the materialized items; only add or drop the difference
+        for item in items[len(window):]:
+            self.tree.delete(item)
+        for position, row_index in enumerate(window):
+            values = self._rows[row_index]
+            if position < len(items):
+                self.tree.item(items[position], values=values)
+            else:
+                self.tree.insert('', tk.END, values=values)
+        total = len(self._view)
+        if total:
+            self.y_scroll.set(self._offset / total, min(1.0, (self._offset + len(window)) / total))
+        else:
+            self.y_scroll.set(0, 1)
+
+def _sort_key(value):
+    """Sorts numbers numerically and everything else case-insensitively."""
+    if isinstance(value, (int, float)):
+        return (0, value, "")
+    return (1, 0, str(value).lower())
@@ -0,0 +1,196 @@
+import time
+import threading
+import mysql.connector
+import app_config
+from metrics import add_retry
+
+# MySQL errors after which a chunk is rolled back and run again: lock wait timeout, deadlock
+LOCK_ERRORS = (1205, 1213)
+
+# Governor settings: app_config.WRITE_<NAME> defaults, overridable per config section as write_<name>
+SETTINGS = {
+    "rows_per_second": float,
+    "burst_rows": int,
+    "max_threads_running": int,
+    "max_replication_lag": float,
+    "load_check_interval": float,
+    "backoff": float,
+    "backoff_max": float,
+    "lock_retries": int,
+}
+
+def _wait(seconds, cancel_event):
+    """Sleeps, or waits on cancel_event. Returns False if the wait was cancelled."""
+    if cancel_event is None:
+        time.sleep(seconds)
+        return True
+    return not cancel_event.wait(seconds)
+
+class TokenBucket:
+    """Token bucket of `rate` rows per second holding at most `capacity` rows. Thread-safe."""
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, amount, cancel_event=None):
+        """
+        Takes amount rows from the bucket, waiting until they are available. Requests larger than
+        the capacity wait for a full bucket and leave it in debt. Returns False if cancelled.
+        """
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                needed = min(amount, self.capacity)
+                if self._tokens >= needed:
+                    self._tokens -= amount
+                    return True
+                delay = (needed - self._tokens) / self.rate
+            if not _wait(delay, cancel_event):
+                return False
+
+class WriteGovernor:
+    """
+    Paces the batch UPDATE chunks of one config section so mass updates do not crowd out the live
+    token traffic on the same server: a token bucket limits rows per second, and while the server
+    reports more than max_threads_running running threads or replication lag above
+    max_replication_lag seconds, chunks wait with exponential backoff. The server is asked at most
+    every load_check_interval seconds. Chunks that hit a lock wait timeout or deadlock are retried
+    up to lock_retries times. Shared by every connection of a batch; thread-safe.
+    """
+    def __init__(self, settings=None):
+        settings = settings or {}
+        for name in SETTINGS:
+            setattr(self, name, settings.get(name, getattr(app_config, f"WRITE_{name.upper()}")))
+        self.bucket = (TokenBucket(self.rows_per_second, self.burst_rows or app_config.BATCH_CHUNK_SIZE)
+                       if self.rows_per_second else None)
+        self.last_wait = None  # (reason, monotonic time) of the most recent load back-off
+        self._checked = 0.0
+        self._overload = None
+        self._lag_available = True
+        self._lock = threading.Lock()
+
+    def throttle(self, conn, rows, cancel_event=None):
+        """
+        Waits until rows may be written: for the token bucket and until the server load is below
+        the limits. Returns False if cancel_event was set while waiting.
+        """
+        if self.bucket and not self.bucket.acquire(rows, cancel_event):
+            return False
+        attempt = 0
+        while True:
+            reason = self._check_load(conn, force=attempt > 0)
+            if reason is None:
+                return True
+            self.last_wait = (reason, time.monotonic())
+            if not _wait(min(self.backoff * 2 ** attempt, self.backoff_max), cancel_event):
+                return False
+            attempt += 1
+
+    def waiting_reason(self, within=3.0):
+        """Returns why chunks backed off within the last `within` seconds, or None."""
+        last_wait = self.last_wait
+        if last_wait is None or time.monotonic() - last_wait[1] > within:
+            return None
+        return last_wait[0]
+
+    def should_retry(self, error, attempt, cancel_event=None):
+        """
+        Returns True (after a backoff wait) if a chunk that failed with error on its attempt-th retry
+        should run again: only lock wait timeouts and deadlocks, at most lock_retries times.
+        """
+        if getattr(error, "errno", None) not in LOCK_ERRORS or attempt >= self.lock_retries:
+            return False
+        add_retry()
+        return _wait(min(self.backoff * 2 ** attempt, self.backoff_max), cancel_event)
+
+    def _check_load(self, conn, force=False):
+        """Returns why the server is overloaded, or None. Cached for load_check_interval seconds."""
+        if not self.max_threads_running and not self.max_replication_lag:
+            return None
+        with self._lock:
+            if not force and time.monotonic() - self._checked < self.load_check_interval:
+                return self._overload
+            overload = None
+            if self.max_threads_running:
+                _, rows = self._query(conn, "SHOW GLOBAL STATUS LIKE 'Threads_running'")
+                threads_running = int(rows[0][1]) if rows else 0
+                if threads_running > self.max_threads_running:
+                    overload = f"Threads_running {threads_running} > {self.max_threads_running}"
+            if overload is None and self.max_replication_lag and self._lag_available:
+                lag = self._replication_lag(conn)
+                if lag is not None and lag > self.max_replication_lag:
+                    overload = f"replication lag {lag:g}s > {self.max_replication_lag:g}s"
+            self._checked = time.monotonic()
+            self._overload = overload
+            return overload
+
+    def _replication_lag(self, conn):
+        """
+        Returns the lag reported by SHOW REPLICA STATUS (SHOW SLAVE STATUS before MySQL 8.0.22 and
+        MariaDB 10.5), or None where the server is not a replica. Without the privilege to ask, lag
+        is not checked again.
+        """
+        for statement in ("SHOW REPLICA STATUS", "SHOW SLAVE STATUS"):
+            try:
+                columns, rows = self._query(conn, statement)
+            except mysql.connector.Error as e:
+                if e.errno == 1227:  # access denied: needs REPLICATION CLIENT
+                    self._lag_available = False
+                    return None
+                continue  # syntax not supported by this server version
+            if not rows:
+                return None
+            status = dict(zip(columns, rows[0]))
+            # MySQL 8.0.22+ renamed the column; MariaDB keeps the old name
+            lag = status.get("Seconds_Behind_Source", status.get("Seconds_Behind_Master"))
+            return None if lag is None else float(lag)
+        self._lag_available = False
+        return None
+
+    @staticmethod
+    def _query(conn, statement):
+        """Returns (column_names, rows) of a statement."""
+        cursor = conn.cursor()
+        try:
+            cursor.execute(statement)
+            rows = cursor.fetchall()
+            return cursor.column_names, rows
+        finally:
+            cursor.close()
+
+def parse_settings(config):
+    """Returns the governor settings given as write_<name> keys of a config section, converted."""
+    settings = {}
+    for name, convert in SETTINGS.items():
+        value = config.get(f"write_{name}")
+        if value is None:
+            continue
+        value = value.strip()
+        try:
+            settings[name] = None if value.lower() in ("", "none", "off") else convert(value)
+        except ValueError:
+            raise ValueError(f"Invalid write_{name} value '{value}' in the configuration.")
+    return settings
+
+_governors = {}
+_governors_lock = threading.Lock()
+
+def configure_governor(section_name, config):
+    """Sets up the write governor of a section from the write_<name> keys of its config."""
+    governor = WriteGovernor(parse_settings(config))
+    with _governors_lock:
+        _governors[section_name] = governor
+    return governor
+
+def get_governor(section_name):
+    """Returns the write governor of a section, with the app_config defaults if it was not configured."""
+    with _governors_lock:
+        governor = _governors.get(section_name)
+        if governor is None:
+            governor = _governors[section_name] = WriteGovernor()
+        return governor